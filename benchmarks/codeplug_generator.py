@@ -0,0 +1,110 @@
+"""Seeded generator of realistic CHIRP and OpenGD77 CSV codeplugs for benchmarks."""
+import csv
+import random
+import sys
+from typing import Iterator, List
+
+from opengd77_chirp_csv_coverter import (CHIRP_FIELDNAMES, CTCSS_TONES, DCS_CODES, GD77_FIELDNAMES, format_mhz,
+                                         CONVERSION_OPERATIONS)
+
+DEFAULT_SEED = 77
+
+# (band start Hz, band end Hz, repeater offset Hz, weight)
+BANDS = (
+    (144000000, 146000000, 600000, 5),
+    (430000000, 440000000, 7600000, 4),
+    (430000000, 440000000, 1600000, 2),
+    (50000000, 52000000, 500000, 1),
+    (28000000, 29700000, 100000, 1),
+)
+CHANNEL_STEP_HZ = 6250
+NAME_PREFIXES = ("GB3", "GB7", "MB6", "W1", "K6", "VE3", "DL0", "ON0", "PI2", "F5Z")
+CHIRP_POWERS = ("50W", "5.0W", "4W", "2.5W", "1.5W", "1W", "0.5W")
+GD77_POWERS = ("Master", "P1", "P5", "P6", "P7", "P8", "P9")
+CROSS_MODES = ("Tone->Tone", "DTCS->DTCS", "Tone->DTCS", "DTCS->Tone", "->Tone", "->DTCS")
+TG_LISTS = ("UK", "BM Europe", "Local", "World", "TG 91-92", "Club")
+CONTACTS = ("TG 9", "TG 91", "TG 235", "TG 2350", "TG 23526", "Parrot", "Local 9")
+
+
+class CodeplugGenerator:
+    """Generate deterministic channel rows; the same seed always gives the same rows."""
+
+    def __init__(self, seed: int = DEFAULT_SEED):
+        self.random = random.Random(seed)
+
+    def _frequencies(self):
+        low, high, offset, _ = self.random.choices(BANDS, weights=[band[3] for band in BANDS])[0]
+        rx_hz = self.random.randrange(low, high, CHANNEL_STEP_HZ)
+        duplex = self.random.choices(("-", "+", ""), weights=(6, 1, 3))[0]
+        return rx_hz, duplex, offset if duplex else 0
+
+    def _name(self, index: int) -> str:
+        return f"{self.random.choice(NAME_PREFIXES)}{index % 1000:03d}"
+
+    def chirp_rows(self, count: int) -> Iterator[List[str]]:
+        """Yield count CHIRP rows mixing FM/NFM/DMR, all tone modes, duplex offsets and skip flags."""
+        choice = self.random.choice
+        for index in range(count):
+            rx_hz, duplex, offset_hz = self._frequencies()
+            tone = self.random.choices(("", "Tone", "TSQL", "DTCS", "Cross"), weights=(4, 3, 2, 1, 1))[0]
+            yield [
+                str(index), self._name(index), format_mhz(rx_hz, 6), duplex, format_mhz(offset_hz, 6), tone,
+                f"{choice(CTCSS_TONES):.1f}", f"{choice(CTCSS_TONES):.1f}", choice(DCS_CODES),
+                choice(("NN", "NR", "RN", "RR")), choice(DCS_CODES), choice(CROSS_MODES),
+                self.random.choices(("FM", "NFM", "DMR"), weights=(5, 3, 2))[0], "12.50",
+                self.random.choices(("", "S", "P"), weights=(8, 1, 1))[0], choice(CHIRP_POWERS), "", "", "", "", "",
+            ]
+
+    def _gd77_tone(self) -> str:
+        kind = self.random.choices(("none", "ctcss", "dcs"), weights=(5, 4, 1))[0]
+        if kind == "ctcss":
+            return f"{self.random.choice(CTCSS_TONES):.1f}"
+        if kind == "dcs":
+            return f"D{self.random.choice(DCS_CODES)}{self.random.choice(('N', 'I'))}"
+        return "None"
+
+    def gd77_rows(self, count: int) -> Iterator[List[str]]:
+        """Yield count OpenGD77 rows mixing analogue and digital channels, tones, offsets and skip flags."""
+        choice = self.random.choice
+        for index in range(count):
+            rx_hz, duplex, offset_hz = self._frequencies()
+            tx_hz = rx_hz + offset_hz if duplex == "+" else rx_hz - offset_hz
+            digital = self.random.random() < 0.3
+            rx_tone = "None" if digital else self._gd77_tone()
+            tx_tone = rx_tone if digital or self.random.random() < 0.7 else self._gd77_tone()
+            yield [
+                str(index + 1), self._name(index), "Digital" if digital else "Analogue", format_mhz(rx_hz),
+                format_mhz(tx_hz), "12.5" if digital or self.random.random() < 0.4 else "25",
+                str(self.random.randint(0, 15)) if digital else "", choice(("1", "2")) if digital else "",
+                choice(CONTACTS) if digital else "", choice(TG_LISTS) if digital else "",
+                str(self.random.randint(2340000, 2349999)) if digital else "", "Off", "Off", rx_tone, tx_tone,
+                "Disabled", choice(GD77_POWERS), choice(("No", "No", "No", "Yes")), "No",
+                choice(("No", "No", "No", "Yes")), "0", "Off", "No", "No", "None",
+                f"{self.random.uniform(-60, 60):.3f}", f"{self.random.uniform(-180, 180):.3f}",
+                choice(("No", "Yes")),
+            ]
+
+
+def write_codeplug(path: str, input_format: str, count: int, seed: int = DEFAULT_SEED):
+    """Write a generated codeplug; input_format is 'chirp' or 'gd77' (the format of the file, not the operation)."""
+    generator = CodeplugGenerator(seed)
+    if input_format == "chirp":
+        fieldnames, rows = CHIRP_FIELDNAMES, generator.chirp_rows(count)
+    else:
+        fieldnames, rows = GD77_FIELDNAMES, generator.gd77_rows(count)
+    with open(path, "w", newline="") as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(fieldnames)
+        writer.writerows(rows)
+
+
+def main():
+    if len(sys.argv) not in (4, 5) or sys.argv[1] not in CONVERSION_OPERATIONS:
+        print("Usage: python -m benchmarks.codeplug_generator [chirp|gd77] [rows] [output_file] [seed]")
+        sys.exit(1)
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_SEED
+    write_codeplug(sys.argv[3], sys.argv[1], int(sys.argv[2]), seed)
+
+
+if __name__ == "__main__":
+    main()
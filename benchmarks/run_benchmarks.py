@@ -0,0 +1,158 @@
+"""Throughput and memory benchmarks for the converter.
+
+Times transform_row, transform_chirp_row and end-to-end transform_channels on
+generated codeplugs, reports rows/sec and peak RSS, and saves the results as JSON.
+Every end-to-end case runs in a fresh process so its peak RSS is its own.
+
+Usage: python -m benchmarks.run_benchmarks [--sizes=1000,100000] [--output=results.json]
+       [--compare=previous.json] [--tolerance=0.10] [--seed=77]
+"""
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+import opengd77_chirp_csv_coverter as converter
+from benchmarks.codeplug_generator import DEFAULT_SEED, CodeplugGenerator, write_codeplug
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_OUTPUT_FILE = "benchmark_results.json"
+DEFAULT_TOLERANCE = 0.10
+ROW_BENCHMARK_ROWS = 20000
+# operation -> format of its input file
+INPUT_FORMATS = {"gd77": "chirp", "chirp": "gd77"}
+
+
+def peak_rss_kb() -> int:
+    """Return the peak resident set size of this process in KiB, or 0 if unavailable."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KiB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _result(name: str, operation: str, engine: str, rows: int, seconds: float, rss_kb: int) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "operation": operation,
+        "engine": engine,
+        "rows": rows,
+        "seconds": round(seconds, 6),
+        "rows_per_second": round(rows / seconds, 1) if seconds else None,
+        "peak_rss_kb": rss_kb,
+    }
+
+
+def bench_row_function(operation: str, rows: int, seed: int) -> Dict[str, Any]:
+    """Time the dictionary row transform of an operation on pre-parsed rows."""
+    generator = CodeplugGenerator(seed)
+    if operation == "gd77":
+        fieldnames, cells, transform = converter.CHIRP_FIELDNAMES, generator.chirp_rows(rows), converter.transform_row
+    else:
+        fieldnames, cells, transform = (converter.GD77_FIELDNAMES, generator.gd77_rows(rows),
+                                        converter.transform_chirp_row)
+    dict_rows = [dict(zip(fieldnames, row)) for row in cells]
+    start = time.perf_counter()
+    for channel_number, row in enumerate(dict_rows):
+        transform(row, channel_number)
+    return _result(transform.__name__, operation, converter.ENGINE_DICT, rows, time.perf_counter() - start,
+                   peak_rss_kb())
+
+
+def bench_transform_channels(operation: str, engine: str, input_file: str, rows: int) -> Dict[str, Any]:
+    """Time one end-to-end transform_channels run; meant to run in a fresh process."""
+    output_file = input_file + ".out"
+    start = time.perf_counter()
+    converter.transform_channels(operation, input_file, output_file, converter.DEFAULT_START_CHANNEL, engine=engine)
+    seconds = time.perf_counter() - start
+    os.remove(output_file)
+    return _result("transform_channels", operation, engine, rows, seconds, peak_rss_kb())
+
+
+def _run_isolated(function, *args) -> Dict[str, Any]:
+    """Run a benchmark in a freshly spawned process so peak RSS is not shared between cases."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(function, *args).result()
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed: int = DEFAULT_SEED, engines=converter.ENGINES) -> Dict[str, Any]:
+    """Run every benchmark and return the results document."""
+    results = []
+    for operation in converter.CONVERSION_OPERATIONS:
+        results.append(_run_isolated(bench_row_function, operation, ROW_BENCHMARK_ROWS, seed))
+    with tempfile.TemporaryDirectory() as work_dir:
+        for rows in sizes:
+            for operation, input_format in INPUT_FORMATS.items():
+                input_file = os.path.join(work_dir, f"{input_format}_{rows}.csv")
+                write_codeplug(input_file, input_format, rows, seed)
+                for engine in engines:
+                    result = _run_isolated(bench_transform_channels, operation, engine, input_file, rows)
+                    print(f"{result['name']} {operation} {engine} {rows} rows: "
+                          f"{result['rows_per_second']} rows/s, peak RSS {result['peak_rss_kb']} KiB")
+                    results.append(result)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def _result_key(result: Dict[str, Any]) -> tuple:
+    return result["name"], result["operation"], result["engine"], result["rows"]
+
+
+def find_regressions(current: Dict[str, Any], previous: Dict[str, Any],
+                     tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Compare two results documents and describe every case that got slower than tolerance allows."""
+    previous_results = {_result_key(result): result for result in previous["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous_results.get(_result_key(result))
+        if not before or not before["rows_per_second"] or not result["rows_per_second"]:
+            continue
+        change = result["rows_per_second"] / before["rows_per_second"] - 1
+        if change < -tolerance:
+            regressions.append(f"{' '.join(map(str, _result_key(result)))}: {before['rows_per_second']} -> "
+                               f"{result['rows_per_second']} rows/s ({change:+.1%})")
+    return regressions
+
+
+def main():
+    args, options = converter.split_arguments(sys.argv[1:])
+    if args:
+        print(__doc__)
+        sys.exit(1)
+    sizes = [int(size) for size in options["sizes"].split(",")] if "sizes" in options else DEFAULT_SIZES
+    seed = int(options.get("seed", DEFAULT_SEED))
+    output_file = options.get("output", DEFAULT_OUTPUT_FILE)
+
+    document = run_benchmarks(sizes, seed)
+    with open(output_file, "w") as outfile:
+        json.dump(document, outfile, indent=2)
+    print(f"Results written to {output_file}")
+
+    if "compare" in options:
+        with open(options["compare"]) as infile:
+            previous = json.load(infile)
+        regressions = find_regressions(document, previous, float(options.get("tolerance", DEFAULT_TOLERANCE)))
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Validate channel frequencies against band plans held in sorted interval indexes.
+
+A band plan is a list of non-overlapping (name, lowest Hz, highest Hz) bands,
+such as the amateur bands or the frequency ranges OpenGD77 radios can tune.
+BandPlan keeps the band starts in a sorted list, so the band holding a
+frequency is found with one bisect, in O(log bands). When NumPy is installed,
+frequencies are looked up a batch at a time with numpy.searchsorted instead;
+both give the same results.
+
+Every channel's RX frequency and, if it differs, its TX frequency (the RX
+frequency moved by the duplex offset for CHIRP codeplugs) must fall within a
+band of each plan. Each miss is reported as a Violation.
+"""
+import csv
+import logging
+import os
+from bisect import bisect_right
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from opengd77_chirp_csv_coverter import MANIFEST_PREFIX, NAME, format_mhz, open_output_file, parse_hz
+from opengd77_chirp_diff import CodeplugRow, open_codeplug
+from opengd77_chirp_filter import BANDS
+
+try:
+    import numpy
+except ImportError:  # Optional; bands are then looked up with bisect
+    numpy = None
+
+Band = Tuple[str, int, int]
+
+# Frequency ranges of the radios OpenGD77 runs on (GD-77, DM-1801, RD-5R)
+OPENGD77_BANDS = (
+    ("VHF", 136_000_000, 174_000_000),
+    ("UHF", 400_000_000, 470_000_000),
+)
+BAND_PLANS = {
+    "amateur": BANDS,
+    "opengd77": OPENGD77_BANDS,
+}
+DEFAULT_BAND_PLANS = "amateur,opengd77"
+PLAN_SEPARATOR = ","
+# Number of channels whose frequencies are looked up together
+VALIDATION_BATCH_ROWS = 4096
+VALIDATION_COLUMNS = ("Line", NAME, "Field", "Frequency", "Band Plan", "Problem")
+FIELD_RX = "RX"
+FIELD_TX = "TX"
+
+
+class Violation(NamedTuple):
+    """A channel frequency outside a band plan."""
+    line_number: int
+    name: str
+    field: str
+    hz: int
+    plan: str
+    problem: str
+
+
+class BandPlan:
+    """A named band plan, indexed for looking up the band holding a frequency."""
+
+    def __init__(self, name: str, bands: Iterable[Band]):
+        self.name = name
+        bands = sorted(bands, key=lambda band: band[1])
+        for label, start, end in bands:
+            if start > end:
+                raise ValueError(f"Band '{label}' in band plan '{name}' ends below its start")
+        # A bisect on the starts finds the only band that can hold a frequency if the bands do not overlap
+        for (previous, _, previous_end), (label, start, _) in zip(bands, bands[1:]):
+            if start <= previous_end:
+                raise ValueError(f"Band '{label}' overlaps band '{previous}' in band plan '{name}'")
+        self.labels = [label for label, _, _ in bands]
+        self.starts = [start for _, start, _ in bands]
+        self.ends = [end for _, _, end in bands]
+        self.start_array = numpy.array(self.starts, dtype=numpy.int64) if numpy is not None else None
+        self.end_array = numpy.array(self.ends, dtype=numpy.int64) if numpy is not None else None
+
+    def band(self, hz: int) -> Optional[str]:
+        """Return the name of the band holding a frequency, or None if it is outside the plan."""
+        position = bisect_right(self.starts, hz) - 1
+        if position >= 0 and hz <= self.ends[position]:
+            return self.labels[position]
+        return None
+
+    def bands(self, frequencies: Sequence[int]) -> List[Optional[str]]:
+        """Return the band of each frequency, as band() would, looking them up together when NumPy is available."""
+        if self.start_array is None or not self.starts:
+            return [self.band(hz) for hz in frequencies]
+        hz = numpy.array(frequencies, dtype=numpy.int64)
+        positions = numpy.searchsorted(self.start_array, hz, side="right") - 1
+        inside = (positions >= 0) & (hz <= self.end_array[numpy.maximum(positions, 0)])
+        labels = self.labels
+        return [labels[position] if ok else None for position, ok in zip(positions.tolist(), inside.tolist())]
+
+
+def read_band_plan(path: str) -> BandPlan:
+    """Read a band plan file with a 'name,lowest MHz,highest MHz' line per band; '#' starts a comment."""
+    bands = []
+    try:
+        with open(path, 'r', newline='') as infile:
+            for line_number, cells in enumerate(csv.reader(infile), 1):
+                if not cells or cells[0].lstrip().startswith("#"):
+                    continue
+                try:
+                    label, low, high = cells
+                    bands.append((label.strip(), parse_hz(low.strip()), parse_hz(high.strip())))
+                except ValueError:
+                    raise ValueError(f"{path} line {line_number}: expected name,lowest MHz,highest MHz")
+    except FileNotFoundError as e:
+        raise ValueError(f"File not found: {e.filename}")
+    return BandPlan(os.path.splitext(os.path.basename(path))[0], bands)
+
+
+def parse_band_plans(value: str) -> List[BandPlan]:
+    """Parse a list of built-in band plan names and '@FILE' band plan files."""
+    plans = []
+    for name in value.split(PLAN_SEPARATOR):
+        name = name.strip()
+        if name.startswith(MANIFEST_PREFIX):
+            plans.append(read_band_plan(name[len(MANIFEST_PREFIX):]))
+        elif name in BAND_PLANS:
+            plans.append(BandPlan(name, BAND_PLANS[name]))
+        else:
+            raise ValueError(f"Invalid band plan '{name}'. Allowed band plans are: {', '.join(BAND_PLANS)} "
+                             f"or @FILE.")
+    return plans
+
+
+def validate_rows(rows: Iterable[CodeplugRow], plans: Sequence[BandPlan]) -> Iterator[Violation]:
+    """Yield the violations of codeplug rows against every plan, in row order.
+
+    A TX frequency outside the plan whose RX frequency is inside it is reported
+    as an offset leaving the RX band; TX frequencies equal to RX are not checked again.
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, VALIDATION_BATCH_ROWS))
+        if not batch:
+            return
+        rx = [row.channel.rx_hz for row in batch]
+        tx = [row.channel.tx_hz for row in batch]
+        results = [(plan, plan.bands(rx), plan.bands(tx)) for plan in plans]
+        for position, row in enumerate(batch):
+            channel = row.channel
+            for plan, rx_bands, tx_bands in results:
+                rx_band = rx_bands[position]
+                if rx_band is None:
+                    yield Violation(row.line_number, channel.name, FIELD_RX, channel.rx_hz, plan.name,
+                                    f"outside the {plan.name} band plan")
+                if channel.tx_hz == channel.rx_hz or tx_bands[position] is not None:
+                    continue
+                problem = (f"offset takes TX out of the {rx_band} band" if rx_band is not None
+                           else f"outside the {plan.name} band plan")
+                yield Violation(row.line_number, channel.name, FIELD_TX, channel.tx_hz, plan.name, problem)
+
+
+def validate_codeplug(input_file: str, output_file: str, plans: Sequence[BandPlan]) -> Dict[str, int]:
+    """Write a report of the channels of a codeplug, in either format, that fall outside the band plans.
+
+    Returns the number of channels checked and of violations found.
+    """
+    counts = {"channels": 0, "violations": 0}
+
+    def counted(codeplug):
+        for row in codeplug:
+            counts["channels"] += 1
+            yield row
+
+    with open_codeplug(input_file) as codeplug, open_output_file(output_file) as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(VALIDATION_COLUMNS)
+        for violation in validate_rows(counted(codeplug), plans):
+            counts["violations"] += 1
+            writer.writerow([violation.line_number, violation.name, violation.field, format_mhz(violation.hz),
+                             violation.plan, violation.problem])
+    logging.info(f"Checked {counts['channels']} channels against {', '.join(plan.name for plan in plans)}: "
+                 f"{counts['violations']} violations")
+    return counts
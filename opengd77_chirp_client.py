@@ -0,0 +1,138 @@
+"""Thin client for the converter service.
+
+Sends a CSV file to a running opengd77_chirp_service and writes the converted
+file. It speaks HTTP/1.0 over a plain socket and imports nothing else, so it
+starts quickly; if no service is reachable, or the service is busy, the file is
+converted in-process instead.
+"""
+import io
+import os
+import socket
+import sys
+
+DEFAULT_SERVICE_HOST = "127.0.0.1"
+DEFAULT_SERVICE_PORT = 8077
+DEFAULT_TIMEOUT = 60.0
+CONVERT_PATH = "/convert/"
+HEALTH_PATH = "/health"
+METRICS_PATH = "/metrics"
+STDIO_PATH = "-"
+HTTP_OK = 200
+HTTP_SERVICE_UNAVAILABLE = 503
+USAGE = ("Usage: python opengd77_chirp_client.py operation input_file output_file [start_channel] "
+         "[--socket=PATH | --port=N]")
+
+
+class ServiceUnavailable(ConnectionError):
+    """Raised when the converter service cannot be reached or has no capacity left."""
+
+
+def connect(socket_path=None, port=DEFAULT_SERVICE_PORT, timeout=DEFAULT_TIMEOUT) -> socket.socket:
+    """Connect to the service on socket_path, or on localhost:port if no socket is given."""
+    if not socket_path:
+        return socket.create_connection((DEFAULT_SERVICE_HOST, port), timeout)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def request(method: str, path: str, body: bytes = b"", socket_path=None, port=DEFAULT_SERVICE_PORT,
+            timeout=DEFAULT_TIMEOUT):
+    """Send a request to the service and return (status, body), raising ServiceUnavailable if it cannot."""
+    head = (f"{method} {path} HTTP/1.0\r\nHost: localhost\r\nContent-Type: text/csv; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n")
+    try:
+        with connect(socket_path, port, timeout) as sock:
+            sock.sendall(head.encode("ascii") + body)
+            # HTTP/1.0: the service closes the connection after the response
+            response = b"".join(iter(lambda: sock.recv(1 << 16), b""))
+    except OSError as e:
+        raise ServiceUnavailable(f"Converter service unavailable: {e}")
+    status_line, _, rest = response.partition(b"\r\n")
+    fields = status_line.split()
+    if len(fields) < 2 or not fields[1].isdigit():
+        raise ServiceUnavailable("Converter service sent an invalid response")
+    return int(fields[1]), rest.partition(b"\r\n\r\n")[2]
+
+
+def convert_via_service(operation: str, csv_text: str, start_channel: int = 0, socket_path=None,
+                        port=DEFAULT_SERVICE_PORT, timeout=DEFAULT_TIMEOUT) -> str:
+    """Convert CSV text with the service and return the converted CSV text.
+
+    Raises ServiceUnavailable if the service cannot be reached or is busy, and
+    ValueError if the service could not convert the input.
+    """
+    path = f"{CONVERT_PATH}{operation}?start_channel={int(start_channel)}"
+    status, body = request("POST", path, csv_text.encode("utf-8"), socket_path, port, timeout)
+    if status == HTTP_SERVICE_UNAVAILABLE:
+        raise ServiceUnavailable("Converter service is busy")
+    if status != HTTP_OK:
+        raise ValueError(body.decode("utf-8", "replace").strip())
+    return body.decode("utf-8")
+
+
+def read_text(path: str) -> str:
+    """Read the input file, or stdin for '-'."""
+    if path == STDIO_PATH:
+        return sys.stdin.read()
+    try:
+        with open(path, 'r', newline='', encoding="utf-8") as infile:
+            return infile.read()
+    except FileNotFoundError as e:
+        raise ValueError(f"File not found: {e.filename}")
+
+
+def write_text(path: str, text: str):
+    """Write the output file through a temporary file, or to stdout for '-'."""
+    if path == STDIO_PATH:
+        sys.stdout.write(text)
+        return
+    temp_path = f"{path}.{os.getpid()}.part"
+    try:
+        with open(temp_path, 'w', newline='', encoding="utf-8") as outfile:
+            outfile.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def convert_file(operation: str, input_file: str, output_file: str, start_channel: int = 0, socket_path=None,
+                 port=DEFAULT_SERVICE_PORT):
+    """Convert a file with the service, falling back to an in-process conversion if it is unavailable."""
+    csv_text = read_text(input_file)
+    try:
+        converted = convert_via_service(operation, csv_text, start_channel, socket_path, port)
+    except ServiceUnavailable as e:
+        print(f"Warning: {e}; converting in-process", file=sys.stderr)
+        from opengd77_chirp_csv_coverter import transform_stream
+        outfile = io.StringIO(newline='')
+        transform_stream(operation, io.StringIO(csv_text, newline=''), outfile, start_channel)
+        converted = outfile.getvalue()
+    write_text(output_file, converted)
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = dict(arg[2:].partition("=")[::2] for arg in sys.argv[1:] if arg.startswith("--"))
+    if not 3 <= len(args) <= 4 or set(options) - {"socket", "port"}:
+        print(USAGE)
+        sys.exit(1)
+    operation, input_file, output_file = args[:3]
+    start_channel = int(args[3]) if len(args) > 3 else 0
+    port = int(options.get("port", DEFAULT_SERVICE_PORT))
+    try:
+        convert_file(operation, input_file, output_file, start_channel, options.get("socket"), port)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Collect the DMR contacts, TG lists and DMR IDs of a conversion to OpenGD77 while it streams.
+
+Digital channels refer to a Contact, a TG List and a DMR ID by value. As the
+converted rows are written, DmrReferences takes those three cells from each
+row and counts every distinct value in a dictionary, so each is numbered once,
+in order of first use, and memory grows with the number of distinct values,
+not of channels. A TG list holds the contacts of the channels using it, up to
+the MAX_TG_LIST_CONTACTS an OpenGD77 TG list can hold.
+
+Once the channels are written, the tables are written next to the output:
+OUTPUT.contacts.csv, OUTPUT.tg_lists.csv and OUTPUT.dmr_ids.csv.
+"""
+import csv
+import logging
+import os
+from typing import Dict, Iterable, Iterator, List
+
+from opengd77_chirp_csv_coverter import CONTACT, DMR_ID, GD77_FIELDNAMES, STDIO_PATH, TG_LIST, open_output_file
+
+CONTACTS_SUFFIX = '.contacts.csv'
+TG_LISTS_SUFFIX = '.tg_lists.csv'
+DMR_IDS_SUFFIX = '.dmr_ids.csv'
+# Tables of a conversion written to stdout
+DEFAULT_TABLES_STEM = 'Channels'
+# Number of contacts an OpenGD77 TG list can hold
+MAX_TG_LIST_CONTACTS = 32
+CONTACT_COLUMNS = ("Contact Number", "Contact Name", "Channels")
+TG_LIST_COLUMNS = ("TG List Number", "TG List Name", "Channels",
+                   *(f"Contact{number}" for number in range(1, MAX_TG_LIST_CONTACTS + 1)))
+DMR_ID_COLUMNS = ("DMR ID", "Channels")
+
+_CONTACT = GD77_FIELDNAMES.index(CONTACT)
+_TG_LIST = GD77_FIELDNAMES.index(TG_LIST)
+_DMR_ID = GD77_FIELDNAMES.index(DMR_ID)
+
+
+def tables_stem_for(output_file: str) -> str:
+    """Return the path the tables of an output file are named after."""
+    if output_file == STDIO_PATH:
+        return DEFAULT_TABLES_STEM
+    return os.path.splitext(output_file)[0]
+
+
+def table_files_for(stem: str) -> List[str]:
+    """Return the paths of the contacts, TG lists and DMR IDs tables named after stem."""
+    return [stem + CONTACTS_SUFFIX, stem + TG_LISTS_SUFFIX, stem + DMR_IDS_SUFFIX]
+
+
+class DmrReferences:
+    """The distinct contacts, TG lists and DMR IDs of OpenGD77 rows, with the number of channels using each."""
+
+    def __init__(self):
+        # Dictionaries keep the order of first use, which numbers the contacts and TG lists
+        self.contacts: Dict[str, int] = {}
+        self.tg_lists: Dict[str, int] = {}
+        self.dmr_ids: Dict[str, int] = {}
+        self.tg_list_contacts: Dict[str, Dict[str, None]] = {}
+        self.dropped: Dict[str, int] = {}
+
+    def add(self, contact: str, tg_list: str, dmr_id: str):
+        """Count the references of one channel."""
+        if contact:
+            self.contacts[contact] = self.contacts.get(contact, 0) + 1
+        if dmr_id:
+            self.dmr_ids[dmr_id] = self.dmr_ids.get(dmr_id, 0) + 1
+        if not tg_list:
+            return
+        self.tg_lists[tg_list] = self.tg_lists.get(tg_list, 0) + 1
+        members = self.tg_list_contacts.setdefault(tg_list, {})
+        if contact and contact not in members:
+            if len(members) < MAX_TG_LIST_CONTACTS:
+                members[contact] = None
+            else:
+                self.dropped[tg_list] = self.dropped.get(tg_list, 0) + 1
+
+    def collect(self, rows: Iterable) -> Iterator:
+        """Yield OpenGD77 output rows unchanged, counting their references; rows given as CSV text are parsed."""
+        add = self.add
+        for row in rows:
+            cells = next(csv.reader([row])) if row.__class__ is str else row
+            if cells[_CONTACT] or cells[_TG_LIST] or cells[_DMR_ID]:
+                add(cells[_CONTACT], cells[_TG_LIST], cells[_DMR_ID])
+            yield row
+
+    def write(self, stem: str):
+        """Write the contacts, TG lists and DMR IDs tables, named after stem."""
+        contacts_file, tg_lists_file, dmr_ids_file = table_files_for(stem)
+        with open_output_file(contacts_file) as outfile:
+            writer = csv.writer(outfile)
+            writer.writerow(CONTACT_COLUMNS)
+            writer.writerows((number, contact, channels)
+                             for number, (contact, channels) in enumerate(self.contacts.items(), 1))
+        with open_output_file(tg_lists_file) as outfile:
+            writer = csv.writer(outfile)
+            writer.writerow(TG_LIST_COLUMNS)
+            writer.writerows((number, tg_list, channels, *self.tg_list_contacts[tg_list])
+                             for number, (tg_list, channels) in enumerate(self.tg_lists.items(), 1))
+        with open_output_file(dmr_ids_file) as outfile:
+            writer = csv.writer(outfile)
+            writer.writerow(DMR_ID_COLUMNS)
+            writer.writerows(self.dmr_ids.items())
+        for tg_list, dropped in self.dropped.items():
+            logging.warning(f"TG list '{tg_list}' is used with {dropped} more contacts than the "
+                            f"{MAX_TG_LIST_CONTACTS} it can hold; they were left out")
+        logging.info(f"Found {len(self.contacts)} contacts, {len(self.tg_lists)} TG lists and "
+                     f"{len(self.dmr_ids)} DMR IDs; tables written to {stem}.*.csv")
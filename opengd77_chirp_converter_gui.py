@@ -1,5 +1,9 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import wx
-from opengd77_chirp_csv_coverter import transform_channels  # Import the function
+from opengd77_chirp_csv_coverter import transform_channels, input_compression, ConversionCancelled, ConversionStats
 
 # Constants for operations
 VALID_OPERATIONS = {
@@ -7,18 +11,50 @@ VALID_OPERATIONS = {
     "chirp": "Transform OpenGD77 format to CHIRP"
 }
 DEFAULT_START_CHANNEL = 0  # Default starting channel
+MAX_CONCURRENT_JOBS = 4  # Number of queued files converted at the same time
+GAUGE_RANGE = 1000
+
+# Job states shown in the queue
+PENDING = "Pending"
+RUNNING = "Running"
+DONE = "Done"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+
+
+class ConversionJob:
+    """A queued conversion of one input file."""
+
+    def __init__(self, operation, input_file, output_file):
+        self.operation = operation
+        self.input_file = input_file
+        self.output_file = output_file
+        self.status = PENDING
+        self.bytes_read = 0
+        # The size of a compressed input says nothing about how much is left to read
+        self.total_bytes = (max(os.path.getsize(input_file), 1)
+                            if os.path.isfile(input_file) and not input_compression(input_file) else None)
+        self.stats = ConversionStats()
+        self.error = None
 
 
 class FileConverterApp(wx.Frame):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        self.jobs = []
+        self.cancel_event = threading.Event()
+        self.executor = None
+        self.active_jobs = []
+        self.running_jobs = 0
+
         # Set up the main panel
         panel = wx.Panel(self)
 
         # Instructions label
         instructions = wx.StaticText(panel,
-                                     label="Select an operation, specify input/output files, and click Transform.")
+                                     label="Select an operation, specify input/output files, and click Transform. "
+                                           "Use Add to Queue to convert several files at once.")
 
         # Operation selection
         operation_label = wx.StaticText(panel, label="Operation:")
@@ -37,9 +73,25 @@ class FileConverterApp(wx.Frame):
         output_browse_button = wx.Button(panel, label="Browse")
         output_browse_button.Bind(wx.EVT_BUTTON, self.on_browse_output)
 
-        # Transform button
-        transform_button = wx.Button(panel, label="Transform")
-        transform_button.Bind(wx.EVT_BUTTON, self.on_transform)
+        # Queue of files to convert
+        self.queue_list = wx.ListCtrl(panel, style=wx.LC_REPORT | wx.LC_SINGLE_SEL, size=(-1, 120))
+        for column, (title, width) in enumerate((("Input File", 220), ("Output File", 220), ("Status", 100))):
+            self.queue_list.InsertColumn(column, title, width=width)
+
+        # Progress gauge, based on the bytes read from all queued files
+        self.gauge = wx.Gauge(panel, range=GAUGE_RANGE)
+
+        # Buttons
+        self.queue_button = wx.Button(panel, label="Add to Queue")
+        self.queue_button.Bind(wx.EVT_BUTTON, self.on_add_to_queue)
+        self.transform_button = wx.Button(panel, label="Transform")
+        self.transform_button.Bind(wx.EVT_BUTTON, self.on_transform)
+        self.cancel_button = wx.Button(panel, label="Cancel")
+        self.cancel_button.Bind(wx.EVT_BUTTON, self.on_cancel)
+        self.cancel_button.Disable()
+        button_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        for button in (self.queue_button, self.transform_button, self.cancel_button):
+            button_sizer.Add(button, flag=wx.ALL, border=5)
 
         # Layout using a grid sizer
         sizer = wx.GridBagSizer(5, 5)
@@ -52,15 +104,20 @@ class FileConverterApp(wx.Frame):
         sizer.Add(output_label, pos=(3, 0), flag=wx.ALIGN_CENTER_VERTICAL | wx.ALL, border=5)
         sizer.Add(self.output_text, pos=(3, 1), flag=wx.EXPAND | wx.ALL, border=5)
         sizer.Add(output_browse_button, pos=(3, 2), flag=wx.ALL, border=5)
-        sizer.Add(transform_button, pos=(4, 0), span=(1, 3), flag=wx.ALIGN_CENTER | wx.ALL, border=10)
+        sizer.Add(self.queue_list, pos=(4, 0), span=(1, 3), flag=wx.EXPAND | wx.ALL, border=5)
+        sizer.Add(self.gauge, pos=(5, 0), span=(1, 3), flag=wx.EXPAND | wx.ALL, border=5)
+        sizer.Add(button_sizer, pos=(6, 0), span=(1, 3), flag=wx.ALIGN_CENTER | wx.ALL, border=5)
 
         # Adjust layout
         sizer.AddGrowableCol(1)
+        sizer.AddGrowableRow(4)
         panel.SetSizerAndFit(sizer)  # Set the sizer on the panel
 
         # Set window properties
         self.SetTitle("File Converter")
+        self.Fit()
         self.Centre()
+        self.Bind(wx.EVT_CLOSE, self.on_close)
 
     def on_browse_input(self, event):
         """Open a file dialog to select the input file."""
@@ -76,8 +133,8 @@ class FileConverterApp(wx.Frame):
             if file_dialog.ShowModal() == wx.ID_OK:
                 self.output_text.SetValue(file_dialog.GetPath())
 
-    def on_transform(self, event):
-        """Perform the transformation operation."""
+    def queue_selected_files(self):
+        """Add the selected operation, input and output file to the queue; return False if they are invalid."""
         selected_description = self.operation_combo.GetValue()
         operation = next(key for key, value in VALID_OPERATIONS.items() if value == selected_description)
         input_file = self.input_text.GetValue()
@@ -86,20 +143,133 @@ class FileConverterApp(wx.Frame):
         # Validate input and output fields
         if not input_file:
             wx.MessageBox("Please select an input file.", "Error", wx.OK | wx.ICON_ERROR)
-            return
+            return False
         if not output_file:
             wx.MessageBox("Please select an output file.", "Error", wx.OK | wx.ICON_ERROR)
-            return
+            return False
+        if any(os.path.abspath(job.output_file) == os.path.abspath(output_file)
+               for job in self.jobs if job.status in (PENDING, RUNNING)):
+            wx.MessageBox("This output file is already queued.", "Error", wx.OK | wx.ICON_ERROR)
+            return False
+
+        job = ConversionJob(operation, input_file, output_file)
+        self.jobs.append(job)
+        index = self.queue_list.InsertItem(self.queue_list.GetItemCount(), input_file)
+        self.queue_list.SetItem(index, 1, output_file)
+        self.queue_list.SetItem(index, 2, job.status)
+        self.input_text.SetValue("")
+        self.output_text.SetValue("")
+        return True
+
+    def on_add_to_queue(self, event):
+        """Queue the selected files for conversion."""
+        self.queue_selected_files()
+
+    def on_transform(self, event):
+        """Convert all pending files on background threads."""
+        if not any(job.status == PENDING for job in self.jobs) or self.input_text.GetValue():
+            if not self.queue_selected_files():
+                return
+
+        pending = [(index, job) for index, job in enumerate(self.jobs) if job.status == PENDING]
+        self.cancel_event.clear()
+        self.active_jobs = [job for _, job in pending]
+        self.running_jobs = len(pending)
+        self.transform_button.Disable()
+        self.queue_button.Disable()
+        self.cancel_button.Enable()
+        self.executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS)
+        for index, job in pending:
+            job.status = RUNNING
+            self.queue_list.SetItem(index, 2, job.status)
+            self.executor.submit(self.run_job, index, job)
+        self.update_gauge()
+
+    def run_job(self, index, job):
+        """Convert one queued file; runs on a worker thread and reports back through wx.CallAfter."""
+        def progress(bytes_read, total_bytes):
+            if self.cancel_event.is_set():
+                raise ConversionCancelled()
+            wx.CallAfter(self.on_job_progress, index, bytes_read, total_bytes)
 
         try:
-            # Call the transform_channels function
-            transform_channels(operation, input_file, output_file, DEFAULT_START_CHANNEL)
-            # Show success notification
-            wx.MessageBox(f"Transformation successful!\nInput File: {input_file}\nOutput File: {output_file}",
-                          "Success", wx.OK | wx.ICON_INFORMATION)
+            transform_channels(job.operation, job.input_file, job.output_file, DEFAULT_START_CHANNEL,
+                               stats=job.stats, progress=progress)
+            status = DONE
+        except ConversionCancelled:
+            status = CANCELLED
         except Exception as e:
+            job.error = e
+            status = FAILED
+        wx.CallAfter(self.on_job_finished, index, status)
+
+    def on_job_progress(self, index, bytes_read, total_bytes):
+        """Update the progress of a running job; jobs with an unknown total show no percentage."""
+        job = self.jobs[index]
+        job.bytes_read = bytes_read
+        job.total_bytes = None if total_bytes is None else max(total_bytes, 1)
+        if job.total_bytes is not None:
+            self.queue_list.SetItem(index, 2, f"{min(100, 100 * bytes_read // job.total_bytes)}%")
+        self.update_gauge()
+
+    def on_job_finished(self, index, status):
+        """Record the outcome of a job and report once every running job has finished."""
+        job = self.jobs[index]
+        job.status = status
+        job.total_bytes = job.bytes_read = max(job.bytes_read, job.total_bytes or 1)
+        self.queue_list.SetItem(index, 2, status)
+        self.update_gauge()
+        self.running_jobs -= 1
+        if self.running_jobs == 0:
+            self.on_all_jobs_finished()
+
+    def on_all_jobs_finished(self):
+        """Re-enable the controls and show a summary of the finished jobs."""
+        self.executor.shutdown(wait=False)
+        self.executor = None
+        self.transform_button.Enable()
+        self.queue_button.Enable()
+        self.cancel_button.Disable()
+
+        finished = self.active_jobs
+        errors = [job for job in finished if job.status == FAILED]
+        if errors:
             # Show error notification
-            wx.MessageBox(f"An error occurred during transformation:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+            details = "\n".join(f"{job.input_file}: {job.error}" for job in errors)
+            wx.MessageBox(f"An error occurred during transformation:\n{details}", "Error", wx.OK | wx.ICON_ERROR)
+        elif self.cancel_event.is_set():
+            wx.MessageBox("Transformation cancelled. No partial output files were written.", "Cancelled",
+                          wx.OK | wx.ICON_INFORMATION)
+        else:
+            # Show success notification
+            details = "\n".join(f"{job.input_file} -> {job.output_file}: {job.stats.rows} channels in "
+                                f"{job.stats.total_seconds:.2f} s" for job in finished)
+            wx.MessageBox(f"Transformation successful!\n{details}", "Success", wx.OK | wx.ICON_INFORMATION)
+
+    def update_gauge(self):
+        """Show the bytes read from the running files as a share of their total size.
+
+        The gauge is indeterminate while a running file's size is unknown, as for compressed input.
+        """
+        active = self.active_jobs
+        if any(job.total_bytes is None for job in active):
+            self.gauge.Pulse()
+            return
+        total = sum(job.total_bytes for job in active)
+        done = sum(min(job.bytes_read, job.total_bytes) for job in active)
+        self.gauge.SetValue(GAUGE_RANGE * done // total if total else 0)
+
+    def on_cancel(self, event):
+        """Stop the running conversions; their output files are left untouched."""
+        self.cancel_event.set()
+        self.cancel_button.Disable()
+
+    def on_close(self, event):
+        """Cancel running conversions before closing the window."""
+        self.cancel_event.set()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        event.Skip()
 
 
 if __name__ == "__main__":
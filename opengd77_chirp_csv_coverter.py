@@ -1,9 +1,28 @@
+import cProfile
 import csv
+import glob
+import hashlib
+import io
+import json
 import logging
+import os
+import re
 import sys
-from typing import Dict, Any
+import tempfile
+import time
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from enum import Enum
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Any, IO, Iterable, Iterator, List, NamedTuple, Optional, Sequence, TextIO, Tuple
 from typing import Callable
 
+__version__ = "1.1.0"
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -83,6 +102,7 @@ P6 = "P6"
 P7 = "P7"
 P8 = "P8"
 P9 = "P9"
+HZ_PER_MHZ = 1_000_000
 
 # Constants
 DEFAULT_GD_INPUT_FILE = 'chirp_to_opengd77_channels.csv'
@@ -90,8 +110,58 @@ DEFAULT_GD_OUTPUT_FILE = 'Channels.csv'
 DEFAULT_CHIRP_INPUT_FILE = 'Channels.csv'
 DEFAULT_CHIRP_OUTPUT_FILE = 'exported_channels.csv'
 DEFAULT_START_CHANNEL = 0
+DEFAULT_BATCH_OUTPUT_DIR = 'converted'
+BATCH_INPUT_PATTERNS = ('*.csv', '*.csv.gz', '*.csv.bz2', '*.csv.xz')
+MANIFEST_PREFIX = '@'
+# Input or output path that refers to stdin / stdout
+STDIO_PATH = '-'
+# Output files are compressed according to their suffix; input files are recognised by their magic bytes
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+COMPRESSION_MAGIC = {b'\x1f\x8b': 'gzip', b'BZh': 'bz2', b'\xfd7zXZ\x00': 'xz'}
+MAGIC_LENGTH = max(len(magic) for magic in COMPRESSION_MAGIC)
+DEFAULT_COMPRESS_LEVELS = {'gzip': 6, 'bz2': 9, 'xz': 6}
+MAX_COMPRESS_LEVEL = 9
+# bzip2 has no uncompressed level 0
+MIN_COMPRESS_LEVELS = {'gzip': 0, 'bz2': 1, 'xz': 0}
+COMPRESSION_NAMES = {'gzip': 'gzip', 'bz2': 'bzip2', 'xz': 'xz'}
+# Buffer size of compressed streams; large reads and writes keep the per-call overhead of the codecs low
+IO_BUFFER_SIZE = 1 << 20
+# Suffix of the temporary file output is written to before it replaces the output file
+PARTIAL_SUFFIX = '.part'
+# Number of input lines between two progress callbacks
+PROGRESS_INTERVAL = 1000
+DEFAULT_DIFF_OUTPUT_FILE = STDIO_PATH
+DEFAULT_MERGE_OUTPUT_FILE = 'merged_channels.csv'
+DEFAULT_VALIDATE_OUTPUT_FILE = STDIO_PATH
+DEFAULT_SNAPSHOT_FILE = 'channels.snap'
+# Snapshot files are recognised by their magic bytes; see opengd77_chirp_snapshot
+SNAPSHOT_MAGIC = b'GD77SNAP'
 # Default operation mode
 DEFAULT_OPERATION = "gd77"
+# Instrumented conversion stages
+STAGE_READ = "read"
+STAGE_TRANSFORM = "transform"
+STAGE_WRITE = "write"
+STAGES = (STAGE_READ, STAGE_TRANSFORM, STAGE_WRITE)
+DEFAULT_PROFILE_FILE = 'converter.prof'
+# Row transformation engines: header-compiled lists, or the dictionary based reference
+ENGINE_COMPILED = "compiled"
+ENGINE_DICT = "dict"
+ENGINE_BATCH = "batch"
+ENGINES = (ENGINE_COMPILED, ENGINE_DICT, ENGINE_BATCH)
+DEFAULT_ENGINE = ENGINE_COMPILED
+# Channel numbering of lenient conversions: keep a gap for every rejected row, or number rows consecutively
+NUMBERING_SKIP = "skip"
+NUMBERING_COMPACT = "compact"
+NUMBERINGS = (NUMBERING_SKIP, NUMBERING_COMPACT)
+# Reject file written next to the output file, and the columns preceding the rejected row's cells
+REJECT_SUFFIX = '.rejects.csv'
+DEFAULT_REJECT_FILE = 'rejects' + REJECT_SUFFIX
+REJECT_COLUMNS = ("Line", "Column", "Reason")
+# Number of rejected rows logged individually; later rejects are only summarized
+REJECT_LOG_LIMIT = 10
+# Sidecar of an incremental conversion, holding a hash of every input row, written next to the output file
+ROW_MANIFEST_SUFFIX = '.manifest.json'
 
 # Define a dictionary for valid operations with default input and output files
 VALID_OPERATIONS = {
@@ -105,6 +175,59 @@ VALID_OPERATIONS = {
         "default_input_file": DEFAULT_CHIRP_INPUT_FILE,
         "default_output_file": DEFAULT_CHIRP_OUTPUT_FILE,
     },
+    "diff": {
+        "description": "Report channels added, removed and changed between two codeplugs",
+        "default_output_file": DEFAULT_DIFF_OUTPUT_FILE,
+    },
+    "merge": {
+        "description": "Merge two codeplugs into one list without duplicate channels",
+        "default_output_file": DEFAULT_MERGE_OUTPUT_FILE,
+    },
+    "validate": {
+        "description": "Check the channel frequencies of a codeplug against band plans",
+        "default_input_file": DEFAULT_CHIRP_INPUT_FILE,
+        "default_output_file": DEFAULT_VALIDATE_OUTPUT_FILE,
+    },
+    "snapshot": {
+        "description": "Save the parsed channels of a codeplug as a binary snapshot that converts without CSV parsing",
+        "default_input_file": DEFAULT_CHIRP_INPUT_FILE,
+        "default_output_file": DEFAULT_SNAPSHOT_FILE,
+    },
+}
+# Operations converting a codeplug, named after the format they write
+CONVERSION_OPERATIONS = ("gd77", "chirp")
+# Operations comparing two codeplugs: operation left_file right_file [output_file] [start_channel]
+CODEPLUG_OPERATIONS = ("diff", "merge")
+
+# Command line options, as --name or --name=value
+VALID_OPTIONS = {
+    "jobs": "Number of worker processes used in batch and parallel mode",
+    "parallel": "Split a single large input file into chunks and convert them in worker processes",
+    "engine": "Row transformation engine: compiled (default), dict or batch",
+    "stats": "Print per-stage timings and row counters as JSON to stderr, or write them to --stats=FILE",
+    "profile": f"Run under cProfile and write the stats to --profile=FILE (default {DEFAULT_PROFILE_FILE})",
+    "lenient": f"Write failing rows to OUTPUT{REJECT_SUFFIX} and continue instead of stopping",
+    "rejects": "Reject file of a lenient single file conversion (implies --lenient)",
+    "max-errors": "Stop a lenient conversion after more than N rejected rows (implies --lenient)",
+    "numbering": f"Channel numbering around rejected rows: {NUMBERING_SKIP} (default) or {NUMBERING_COMPACT}",
+    "incremental": f"Only convert rows changed since the last run, tracked in OUTPUT{ROW_MANIFEST_SUFFIX}",
+    "near": "Only convert channels near LAT,LON (with --radius and/or --nearest), nearest first",
+    "route": "Only convert channels along a route of LAT,LON;LAT,LON;... waypoints, or @FILE with one per line",
+    "radius": "Distance in km from --near or --route within which channels are converted",
+    "nearest": "Convert the N channels nearest to --near or --route",
+    "sort": "Sort the channels by frequency, name or band before numbering them",
+    "sort-memory": "Memory in MB for sorting before sorted runs are spilled to disk (default 64)",
+    "where": "Only convert rows matching a filter such as 'band=2m,70cm;type=digital;skip=no'",
+    "format": "Output format of merge: gd77 or chirp (defaults to the format of the first codeplug)",
+    "compress-level": "Compression level of outputs named *.gz or *.xz (0-9, default 6) or *.bz2 (1-9, default 9)",
+    "bandplan": "Band plans validate checks against: amateur, opengd77 and/or @FILE (default amateur,opengd77)",
+    "also": "Also write the converted channels to FORMAT:FILE,... (gd77, chirp or jsonl) in the same pass",
+    "range": "Only convert rows START-END (counting from 1), found through an index kept in INPUT.index.json",
+    "shard": "Split the channels by band, mode or prefix[:N] into codeplug files and zones in the OUTPUT directory",
+    "shard-size": "Channels per file when sharding (default and at most 1024)",
+    "zone-size": "Channels per zone when sharding (default and at most 80)",
+    "contacts": "Also write the DMR contacts, TG lists and DMR IDs of a gd77 conversion to OUTPUT.contacts.csv, "
+                "OUTPUT.tg_lists.csv and OUTPUT.dmr_ids.csv",
 }
 
 # Default values for fields not in the input format
@@ -159,60 +282,249 @@ CHIRP_FIELDNAMES = [
     TSTEP, SKIP, POWER, COMMENT, URCALL, RPT1CALL, RPT2CALL, DVCODE
 ]
 
+# === DMR COMMENT ===
+# Leading tag of the DMR details in a CHIRP comment, holding the version of their encoding
+DMR_COMMENT_TAG = "DMR1"
+DMR_COMMENT_PREFIX = DMR_COMMENT_TAG + "|"
+DMR_COMMENT_FIELDS = 5
+_COMMENT_FIELD = r"\|((?:[^|\\]|\\.)*)"
+DMR_COMMENT_PATTERN = re.compile(re.escape(DMR_COMMENT_TAG) + _COMMENT_FIELD * DMR_COMMENT_FIELDS + r"\Z", re.DOTALL)
+# Unversioned comments written by earlier releases
+LEGACY_DMR_COMMENT_PATTERN = re.compile(
+    r"DMR ID: (.*), TG List: (.*), Colour Code: (.*), Timeslot: (.*), Contact: (.*)\Z", re.DOTALL)
+ESCAPED_CHARACTER = re.compile(r"\\(.)", re.DOTALL)
+
+# === TONE AND POWER TABLES ===
+# Standard CTCSS tones (Hz)
+CTCSS_TONES = (
+    67.0, 69.3, 71.9, 74.4, 77.0, 79.7, 82.5, 85.4, 88.5, 91.5, 94.8, 97.4, 100.0, 103.5, 107.2, 110.9,
+    114.8, 118.8, 123.0, 127.3, 131.8, 136.5, 141.3, 146.2, 150.0, 151.4, 156.7, 159.8, 162.2, 165.5,
+    167.9, 171.3, 173.8, 177.3, 179.9, 183.5, 186.2, 189.9, 192.8, 196.6, 199.5, 203.5, 206.5, 210.7,
+    218.1, 225.7, 229.1, 233.6, 241.8, 250.3, 254.1
+)
+
+# Standard DCS codes (octal)
+DCS_CODES = (
+    "023", "025", "026", "031", "032", "036", "043", "047", "051", "053", "054", "065", "071", "072",
+    "073", "074", "114", "115", "116", "122", "125", "131", "132", "134", "143", "145", "152", "155",
+    "156", "162", "165", "172", "174", "205", "212", "223", "225", "226", "243", "244", "245", "246",
+    "251", "252", "255", "261", "263", "265", "266", "271", "274", "306", "311", "315", "325", "331",
+    "332", "343", "346", "351", "356", "364", "365", "371", "411", "412", "413", "423", "431", "432",
+    "445", "446", "452", "454", "455", "462", "464", "465", "466", "503", "506", "516", "523", "526",
+    "532", "546", "565", "606", "612", "624", "627", "631", "632", "654", "662", "664", "703", "712",
+    "723", "731", "732", "734", "743", "754"
+)
+
+# Values CHIRP expects in the tone columns of channels that do not use them
+DEFAULT_CHIRP_TONE_FREQUENCY = 88.5
+DEFAULT_CHIRP_DTCS_CODE = 23
+
+# OpenGD77 DCS polarity suffixes: normal, inverted, or unspecified
+POLARITY_NORMAL = "N"
+POLARITY_INVERTED = "I"
+
+# CHIRP DtcsPolarity (TX, RX) -> OpenGD77 DCS polarity suffix
+CHIRP_POLARITIES = {
+    "NN": POLARITY_NORMAL,
+    "RR": POLARITY_INVERTED,
+    "NR": "",
+    "RN": "",
+}
+
+# Lower bounds (W) of the OpenGD77 power levels below 5W
+POWER_THRESHOLDS = (1.0, 2.0, 3.0, 4.0, 5.0)
+POWER_LEVELS = (P1, P5, P6, P7, P8)
+
+
+class ToneKind(Enum):
+    """Kind of squelch tone stored in an OpenGD77 tone cell."""
+    NONE = "none"
+    CTCSS = "ctcss"
+    DCS = "dcs"
+
+
+class Tone(NamedTuple):
+    """An OpenGD77 tone cell resolved into the values of the CHIRP tone columns."""
+    kind: ToneKind
+    frequency: float
+    code: Any
+    polarity: str
+    cell: str
+
+
+def _build_gd77_tones() -> Dict[str, Tone]:
+    """Build the table of every standard OpenGD77 tone cell."""
+    tones = {NONE: Tone(ToneKind.NONE, DEFAULT_CHIRP_TONE_FREQUENCY, DEFAULT_CHIRP_DTCS_CODE, "", NONE)}
+    for frequency in CTCSS_TONES:
+        cell = f"{frequency:.1f}"
+        tones[cell] = Tone(ToneKind.CTCSS, frequency, DEFAULT_CHIRP_DTCS_CODE, "", cell)
+    for code in DCS_CODES:
+        for polarity in (POLARITY_NORMAL, POLARITY_INVERTED, ""):
+            cell = f"D{code}{polarity}"
+            tones[cell] = Tone(ToneKind.DCS, DEFAULT_CHIRP_TONE_FREQUENCY, code, polarity, cell)
+    return tones
+
+
+def _build_chirp_tone_settings() -> Dict[tuple, tuple]:
+    """Build the (Tone, DtcsPolarity, CrossMode) CHIRP settings for every combination of RX/TX tone kinds.
+
+    Keys are (rx kind, tx kind, rx and tx cells equal, either tone inverted).
+    """
+    settings = {}
+    for rx_kind in ToneKind:
+        for tx_kind in ToneKind:
+            uses_dcs = ToneKind.DCS in (rx_kind, tx_kind)
+            for same in (True, False):
+                if rx_kind is not ToneKind.NONE and tx_kind is not ToneKind.NONE and not same:
+                    tone = CROSS
+                elif uses_dcs:
+                    tone = DTCS
+                elif rx_kind is ToneKind.NONE and tx_kind is ToneKind.NONE:
+                    tone = ""
+                elif rx_kind is ToneKind.NONE:
+                    tone = TSQL
+                else:
+                    tone = TONE_STR
+                for inverted in (True, False):
+                    settings[(rx_kind, tx_kind, same, inverted)] = (
+                        tone, "RR" if inverted else "NN", DTCS_TO_DTCS if uses_dcs else TONE_TONE)
+    return settings
+
+
+# OpenGD77 tone cell -> Tone, for all standard tones
+GD77_TONES = _build_gd77_tones()
+# OpenGD77 (DCS code, polarity suffix) -> tone cell, for all standard codes
+GD77_DCS_TONES = {(tone.code, tone.polarity): cell for cell, tone in GD77_TONES.items() if tone.kind is ToneKind.DCS}
+# Standard CTCSS tones as they appear in CHIRP and OpenGD77 cells
+CTCSS_TONE_CELLS = frozenset(f"{frequency:.1f}" for frequency in CTCSS_TONES)
+CHIRP_TONE_SETTINGS = _build_chirp_tone_settings()
+NO_TONE = GD77_TONES[NONE]
+# (CHIRP Tone mode, 'r' or 'c') -> column the OpenGD77 tone is taken from; Cross means Cross with DTCS
+CHIRP_TONE_SOURCES = {
+    (DTCS, "r"): DTCS_CODE,
+    (DTCS, "c"): DTCS_CODE,
+    (TONE_STR, "r"): TONE_STR,
+    (TONE_STR, "c"): TONE_STR,
+    (CROSS, "r"): RX_DTCS_CODE,
+    (CROSS, "c"): DTCS_CODE,
+}
+
 
 # Helper functions
+@lru_cache(maxsize=4096)
+def parse_hz(value: str) -> int:
+    """Parse a frequency or offset in MHz, such as '145.775000', into integer Hz without float rounding."""
+    whole, _, fraction = value.partition(".")
+    if whole.isdecimal() and len(fraction) <= 6 and (fraction.isdecimal() or not fraction):
+        return int(whole) * HZ_PER_MHZ + int(fraction.ljust(6, "0"))
+    try:
+        return int((Decimal(value.strip()) * HZ_PER_MHZ).to_integral_value(ROUND_HALF_UP))
+    except (InvalidOperation, OverflowError, ValueError):
+        raise ValueError(f"could not convert string to frequency: '{value}'")
+
+
+@lru_cache(maxsize=4096)
+def format_mhz(hz: int, decimals: int = 5) -> str:
+    """Format integer Hz as MHz with a fixed number of decimals, rounding half up."""
+    scale = 10 ** (6 - decimals)
+    units = (abs(hz) + scale // 2) // scale
+    whole, fraction = divmod(units, 10 ** decimals)
+    return f"{'-' if hz < 0 else ''}{whole}.{fraction:0{decimals}d}"
+
+
 def calculate_tx_frequency(row):
     """Calculate Tx Frequency based on Duplex and Offset."""
-    if row[DUPLEX] == "" or row[OFFSET] == "" or abs(float(row[OFFSET]) - 0.0) < 1e-9:
-        return row[FREQUENCY]
-    offset = float(row[OFFSET])
-    frequency = float(row[FREQUENCY])
-    return str(frequency + offset if row[DUPLEX] == "+" else frequency - offset)
+    rx_hz = parse_hz(row[FREQUENCY])
+    tx_hz = tx_hz_from_offset(rx_hz, row[DUPLEX], row[OFFSET])
+    return row[FREQUENCY] if tx_hz == rx_hz else format_mhz(tx_hz, 6)
+
+
+def tx_hz_from_offset(rx_hz: int, duplex: str, offset: str) -> int:
+    """Calculate the Tx frequency in Hz from the Rx frequency and the CHIRP Duplex and Offset cells."""
+    if duplex == "" or offset == "":
+        return rx_hz
+    offset_hz = parse_hz(offset)
+    return rx_hz + offset_hz if duplex == "+" else rx_hz - offset_hz
 
 
 def calculate_power(row):
     """Determine Power level based on the value in row['Power']."""  # docstring can keep 'Power'
-    power = float(row[POWER].rstrip("W"))
-    if power < 1.0:
-        return P1
-    elif 1.0 <= power < 2.0:
-        return P5
-    elif 2.0 <= power < 3.0:
-        return P6
-    elif 3.0 <= power < 4.0:
-        return P7
-    elif 4.0 <= power < 5.0:
-        return P8
-    elif row[POWER].rstrip("W") == "5.0":
+    return power_level(row[POWER])
+
+
+@lru_cache(maxsize=256)
+def power_level(value: str) -> str:
+    """Map a CHIRP power cell such as '5.0W' to an OpenGD77 power level."""
+    watts = value.rstrip("W")
+    level = bisect_right(POWER_THRESHOLDS, float(watts))
+    if level < len(POWER_LEVELS):
+        return POWER_LEVELS[level]
+    elif watts == "5.0":
         return P9
     return GD77_DEFAULT_VALUES[POWER]
 
 
 def extract_polarity(value):
-    """Extract polarity 'R' if 'II' is present, 'N' if 'NN' is present."""
+    """Extract polarity 'I' if 'RR' is present, 'N' if 'NN' is present."""
+    polarity = CHIRP_POLARITIES.get(value)
+    if polarity is None:
+        polarity = _extract_unknown_polarity(value)
+    return polarity
+
+
+@lru_cache(maxsize=64)
+def _extract_unknown_polarity(value):
+    logging.warning(f"Unknown DTCS polarity '{value}'")
     if "RR" in value:
-        return "I"
+        return POLARITY_INVERTED
     elif "NN" in value:
-        return "N"
+        return POLARITY_NORMAL
     return ""
 
 
+def dcs_tone(code: str, polarity: str) -> str:
+    """Return the OpenGD77 tone cell for a DCS code and polarity suffix."""
+    tone = GD77_DCS_TONES.get((code, polarity))
+    if tone is None:
+        tone = _unknown_dcs_tone(code, polarity)
+    return tone
+
+
+@lru_cache(maxsize=1024)
+def _unknown_dcs_tone(code: str, polarity: str) -> str:
+    logging.warning(f"Unknown DCS code '{code}'")
+    return f"D{code}{polarity}"
+
+
+def ctcss_tone(frequency: str) -> str:
+    """Return the OpenGD77 tone cell for a CHIRP CTCSS tone frequency."""
+    if frequency not in CTCSS_TONE_CELLS:
+        _flag_unknown_ctcss_tone(frequency)
+    return frequency
+
+
+@lru_cache(maxsize=1024)
+def _flag_unknown_ctcss_tone(frequency: str):
+    logging.warning(f"Unknown CTCSS tone '{frequency}'")
+
+
 def calculate_tone(row: Dict[str, Any], tone_type: str) -> str:
     """Calculate RX or TX Tone based on the Tone type."""
-    if row[TONE] == DTCS:
-        return f"D{row[DTCS_CODE]}{extract_polarity(row[DTCS_POLARITY])}"
-    elif row[TONE] == TONE_STR:
-        return row[f"{tone_type}ToneFreq"]
-    elif row[TONE] == TSQL:
+    return tone_from_chirp(tone_type, row[TONE], row[CROSS_MODE], row[f"{tone_type}ToneFreq"],
+                           row[DTCS_CODE], row[RX_DTCS_CODE], row[DTCS_POLARITY])
+
+
+def tone_from_chirp(tone_type: str, tone: str, cross_mode: str, tone_freq: str, dtcs_code: str,
+                    rx_dtcs_code: str, dtcs_polarity: str) -> str:
+    """Calculate the RX ('r') or TX ('c') Tone from the CHIRP tone cells."""
+    if tone == CROSS:
+        tone = TONE_STR if cross_mode == TONE_TONE else CROSS
+    source = CHIRP_TONE_SOURCES.get((tone, tone_type))
+    if source is None:
         return NONE
-    elif row[TONE] == CROSS:
-        if row[CROSS_MODE] == TONE_TONE:
-            return row[f"{tone_type}ToneFreq"]
-        elif tone_type == "r":
-            return f"D{row[RX_DTCS_CODE]}{extract_polarity(row[DTCS_POLARITY])}"
-        elif tone_type == "c":
-            return f"D{row[DTCS_CODE]}{extract_polarity(row[DTCS_POLARITY])}"
-    return NONE
+    elif source == TONE_STR:
+        return ctcss_tone(tone_freq)
+    return dcs_tone(rx_dtcs_code if source == RX_DTCS_CODE else dtcs_code, extract_polarity(dtcs_polarity))
 
 
 def determine_channel_type(mode):
@@ -222,93 +534,101 @@ def determine_channel_type(mode):
         return ANALOGUE
     
     
-def transform_row(row: Dict[str, Any], channel_number: int) -> Dict[str, Any]:
-    """Transform a single row into the target format."""
-    try:
-        return {
-            **GD77_DEFAULT_VALUES,
-            CHANNEL_NUMBER: channel_number,
-            CHANNEL_TYPE: determine_channel_type(row[MODE]),
-            CHANNEL_NAME: row[NAME],
-            BANDWIDTH_KHZ: 12.5 if row[MODE] == NFM else 25,
-            RX_FREQUENCY: f"{float(row[FREQUENCY]):.5f}",
-            TX_FREQUENCY: f"{float(calculate_tx_frequency(row)):.5f}",
-            RX_TONE: calculate_tone(row, "r"),
-            TX_TONE: calculate_tone(row, "c"),
-            POWER: calculate_power(row),
-            ALL_SKIP: YES if row[SKIP] == "S" else GD77_DEFAULT_VALUES[ALL_SKIP]
-        }
-    except KeyError as e:
-        logging.error(f"Missing key {e} in row: {row}")
-        raise
-    except ValueError as e:
-        logging.error(f"Invalid value in row: {row}")
-        raise
-
-
 def determine_duplex(tx_frequency, rx_frequency):
     """Determine the Duplex value."""
-    tx = float(tx_frequency)
-    rx = float(rx_frequency)
-    if tx > rx:
+    return duplex_sign(parse_hz(tx_frequency), parse_hz(rx_frequency))
+
+
+def duplex_sign(tx_hz: int, rx_hz: int) -> str:
+    """Return the CHIRP Duplex for a pair of frequencies in Hz."""
+    if tx_hz > rx_hz:
         return "+"
-    elif tx == rx:
+    elif tx_hz == rx_hz:
         return ""
     return "-"
 
 
 def calculate_offset(tx_frequency, rx_frequency):
     """Calculate the Offset value."""
-    tx = float(tx_frequency)
-    rx = float(rx_frequency)
-    if tx != rx:
-        return abs(int(tx * 1000) - int(rx * 1000)) / 1000
+    return offset_mhz(parse_hz(tx_frequency), parse_hz(rx_frequency))
+
+
+def offset_mhz(tx_hz: int, rx_hz: int):
+    """Return the CHIRP Offset in MHz for a pair of frequencies in Hz, or '' for simplex."""
+    if tx_hz != rx_hz:
+        return abs(tx_hz - rx_hz) / HZ_PER_MHZ
     return ""
 
 
+def parse_gd77_tone(tone: str) -> Tone:
+    """Resolve an OpenGD77 tone cell such as '88.5', 'D023N' or 'None'."""
+    parsed = GD77_TONES.get(tone)
+    if parsed is None:
+        parsed = _parse_unknown_gd77_tone(tone)
+    return parsed
+
+
+@lru_cache(maxsize=1024)
+def _parse_unknown_gd77_tone(tone: str) -> Tone:
+    logging.warning(f"Unknown tone '{tone}'")
+    if tone.startswith("D"):
+        kind = ToneKind.DCS
+        code = tone.lstrip("D").rstrip("I").rstrip("N")
+    else:
+        kind = ToneKind.CTCSS
+        code = DEFAULT_CHIRP_DTCS_CODE
+    frequency = DEFAULT_CHIRP_TONE_FREQUENCY
+    if tone != "" and not tone.isalnum():
+        try:
+            frequency = float(tone)
+        except ValueError:
+            # Reported by calculate_tone_frequency, the only consumer of the frequency
+            frequency = None
+    if tone.endswith(POLARITY_INVERTED):
+        polarity = POLARITY_INVERTED
+    elif tone.endswith(POLARITY_NORMAL):
+        polarity = POLARITY_NORMAL
+    else:
+        polarity = ""
+    return Tone(kind, frequency, code, polarity, tone)
+
+
+def chirp_tone_settings(rx_tone: str, tx_tone: str) -> tuple:
+    """Return the CHIRP (Tone, DtcsPolarity, CrossMode) values for a pair of OpenGD77 tone cells."""
+    return _chirp_tone_settings(parse_gd77_tone(rx_tone), parse_gd77_tone(tx_tone), rx_tone == tx_tone)
+
+
+def _chirp_tone_settings(rx: Tone, tx: Tone, same: bool) -> tuple:
+    inverted = rx.polarity == POLARITY_INVERTED or tx.polarity == POLARITY_INVERTED
+    return CHIRP_TONE_SETTINGS[(rx.kind, tx.kind, same, inverted)]
+
+
 def determine_tone(rx_tone, tx_tone):
     """Determine the Tone value."""
-    if rx_tone != NONE and tx_tone != NONE and rx_tone != tx_tone:
-        return CROSS
-    if rx_tone.startswith("D") or tx_tone.startswith("D"):
-        return DTCS
-    if rx_tone == NONE and tx_tone == NONE:
-        return ""
-    if rx_tone == NONE:
-        return TSQL
-    return TONE_STR
+    return chirp_tone_settings(rx_tone, tx_tone)[0]
 
 
 def calculate_tone_frequency(tone):
     """Calculate the Tone Frequency."""
-    if tone != NONE and tone != "" and not tone.isalnum():
-        return float(tone)
-    return 88.5
+    frequency = parse_gd77_tone(tone).frequency
+    if frequency is None:
+        raise ValueError(f"could not convert string to float: '{tone}'")
+    return frequency
 
 
 def calculate_dtcs_code(tone):
     """Calculate the DTCS Code."""
-    if tone.startswith("D"):
-        return tone.lstrip("D").rstrip("I").rstrip("N")
-    return 23
+    return parse_gd77_tone(tone).code
 
 
 def determine_dtcs_polarity(rx_tone, tx_tone):
     """Determine the DTCS Polarity."""
-    if rx_tone.endswith("I") or tx_tone.endswith("I"):
-        return "RR"
-    if rx_tone.endswith("N") or tx_tone.endswith("N"):
-        return "NN"
-    return "NN"
+    return chirp_tone_settings(rx_tone, tx_tone)[1]
 
 
 def determine_cross_mode(rx_tone, tx_tone):
     """Determine the Cross Mode."""
-    if rx_tone.startswith("D") or tx_tone.startswith("D"):
-        return DTCS_TO_DTCS
-    if rx_tone != NONE or tx_tone != NONE:
-        return TONE_TONE
-    return TONE_TONE
+    return chirp_tone_settings(rx_tone, tx_tone)[2]
 
 
 def determine_mode(bandwidth, channel_type):
@@ -321,51 +641,949 @@ def determine_mode(bandwidth, channel_type):
 
 def determine_chirp_comment(row):
     if row[CHANNEL_TYPE] == DIGITAL:
-        return f"DMR ID: {row[DMR_ID]}, TG List: {row[TG_LIST]}, Colour Code: {row[COLOUR_CODE]}, Timeslot: {row[TIME_SLOT]}, Contact: {row[CONTACT]}"
+        return chirp_comment(row[DMR_ID], row[TG_LIST], row[COLOUR_CODE], row[TIME_SLOT], row[CONTACT])
     else:
         return ""
 
+
+class DmrDetails(NamedTuple):
+    """The DMR details of a digital channel, as stored in the CHIRP comment."""
+    dmr_id: str = ""
+    tg_list: str = ""
+    colour_code: str = ""
+    timeslot: str = ""
+    contact: str = ""
+
+
+NO_DMR_DETAILS = DmrDetails()
+
+
+def _escape_comment_field(value: str) -> str:
+    if "|" in value or "\\" in value:
+        return value.replace("\\", "\\\\").replace("|", "\\|")
+    return value
+
+
+def chirp_comment(dmr_id, tg_list, colour_code, timeslot, contact):
+    """Pack the DMR details of a digital channel into a versioned CHIRP comment.
+
+    The comment is DMR_COMMENT_TAG followed by the DMR ID, TG list, colour code,
+    timeslot and contact, each after a '|'. '|' and '\\' in a value are escaped
+    with a backslash, so parse_chirp_comment reads every value back unchanged.
+    """
+    return DMR_COMMENT_TAG + "".join("|" + _escape_comment_field(str(value))
+                                     for value in (dmr_id, tg_list, colour_code, timeslot, contact))
+
+
+@lru_cache(maxsize=4096)
+def parse_chirp_comment(comment: str) -> DmrDetails:
+    """Read the DMR details back from a CHIRP comment written by chirp_comment.
+
+    Comments in the unversioned format of earlier releases are read too. Other
+    comments hold no DMR details. Repeated comments share one cached result, and
+    TG lists and contacts are interned, so large DMR lists hold each once.
+    """
+    if comment.startswith(DMR_COMMENT_PREFIX) and "\\" not in comment:
+        # Without escapes every '|' separates two values
+        values = comment.split("|")[1:]
+        if len(values) != DMR_COMMENT_FIELDS:
+            return NO_DMR_DETAILS
+    else:
+        match = DMR_COMMENT_PATTERN.match(comment)
+        if match is not None:
+            values = [ESCAPED_CHARACTER.sub(r"\1", value) for value in match.groups()]
+        else:
+            match = LEGACY_DMR_COMMENT_PATTERN.match(comment)
+            if match is None:
+                return NO_DMR_DETAILS
+            values = match.groups()
+    dmr_id, tg_list, colour_code, timeslot, contact = values
+    return DmrDetails(dmr_id, sys.intern(tg_list), colour_code, timeslot, sys.intern(contact))
+
+
+class Channel:
+    """A channel in a format independent form, shared by the OpenGD77 and CHIRP readers and writers.
+
+    Frequencies are integer Hz and tones are Tone values, so every cell is parsed once
+    per row and offsets are computed without float drift.
+    """
+    __slots__ = ("name", "rx_hz", "tx_hz", "mode", "rx_tone", "tx_tone", "power", "skip",
+                 "dmr_id", "tg_list", "colour_code", "timeslot", "contact")
+
+    def __init__(self, name: str, rx_hz: int, tx_hz: int, mode: str, rx_tone: Tone = NO_TONE,
+                 tx_tone: Tone = NO_TONE, power: str = MASTER, skip: bool = False, dmr_id: str = "",
+                 tg_list: str = "", colour_code: str = "", timeslot: str = "", contact: str = ""):
+        self.name = name
+        self.rx_hz = rx_hz
+        self.tx_hz = tx_hz
+        self.mode = mode
+        self.rx_tone = rx_tone
+        self.tx_tone = tx_tone
+        self.power = power
+        self.skip = skip
+        self.dmr_id = dmr_id
+        self.tg_list = tg_list
+        self.colour_code = colour_code
+        self.timeslot = timeslot
+        self.contact = contact
+
+    def __repr__(self):
+        return (f"Channel(name={self.name!r}, rx_hz={self.rx_hz}, tx_hz={self.tx_hz}, mode={self.mode!r}, "
+                f"rx_tone={self.rx_tone.cell!r}, tx_tone={self.tx_tone.cell!r})")
+
+    def __eq__(self, other):
+        if not isinstance(other, Channel):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    @classmethod
+    def from_chirp(cls, name, frequency, duplex, offset, tone, rtone_freq, ctone_freq, dtcs_code, dtcs_polarity,
+                   rx_dtcs_code, cross_mode, mode, skip, power, comment="") -> "Channel":
+        """Parse the cells of a CHIRP row; DMR channels take their DMR details from the comment."""
+        rx_hz = parse_hz(frequency)
+        dmr = parse_chirp_comment(comment) if mode == DMR and comment else NO_DMR_DETAILS
+        return cls(
+            name, rx_hz, tx_hz_from_offset(rx_hz, duplex, offset), mode,
+            parse_gd77_tone(tone_from_chirp("r", tone, cross_mode, rtone_freq, dtcs_code, rx_dtcs_code,
+                                            dtcs_polarity)),
+            parse_gd77_tone(tone_from_chirp("c", tone, cross_mode, ctone_freq, dtcs_code, rx_dtcs_code,
+                                            dtcs_polarity)),
+            power_level(power), skip == "S", *dmr)
+
+    @classmethod
+    def from_chirp_row(cls, row: Dict[str, Any]) -> "Channel":
+        """Parse a CHIRP row dictionary."""
+        return cls.from_chirp(*(row[column] for column in CHIRP_CHANNEL_INPUTS), row.get(COMMENT, ""))
+
+    @classmethod
+    def from_gd77(cls, channel_name, rx_frequency, tx_frequency, rx_tone, tx_tone, bandwidth, channel_type,
+                  all_skip, dmr_id, tg_list, colour_code, timeslot, contact, power=MASTER) -> "Channel":
+        """Parse the cells of an OpenGD77 row."""
+        # TG lists and contacts repeat across many channels; interning keeps one copy of each
+        return cls(channel_name, parse_hz(rx_frequency), parse_hz(tx_frequency),
+                   determine_mode(bandwidth, channel_type), parse_gd77_tone(rx_tone), parse_gd77_tone(tx_tone),
+                   power, all_skip == YES, dmr_id, tg_list and sys.intern(tg_list), colour_code, timeslot,
+                   contact and sys.intern(contact))
+
+    @classmethod
+    def from_gd77_row(cls, row: Dict[str, Any]) -> "Channel":
+        """Parse an OpenGD77 row dictionary."""
+        return cls.from_gd77(*(row[column] for column in GD77_CHANNEL_INPUTS), row.get(POWER, MASTER))
+
+    @property
+    def channel_type(self) -> str:
+        return determine_channel_type(self.mode)
+
+    def gd77_cells(self) -> tuple:
+        """Return the values of the GD77_CHANNEL_OUTPUTS columns."""
+        return (
+            determine_channel_type(self.mode), self.name, 12.5 if self.mode == NFM else 25,
+            format_mhz(self.rx_hz), format_mhz(self.tx_hz), self.rx_tone.cell, self.tx_tone.cell, self.power,
+            YES if self.skip else GD77_DEFAULT_VALUES[ALL_SKIP], self.colour_code, self.timeslot, self.contact,
+            self.tg_list, self.dmr_id,
+        )
+
+    def chirp_cells(self) -> tuple:
+        """Return the values of the CHIRP_CHANNEL_OUTPUTS columns."""
+        rx = self.rx_tone
+        tx = self.tx_tone
+        tone, dtcs_polarity, cross_mode = _chirp_tone_settings(rx, tx, rx.cell == tx.cell)
+        if self.mode == DMR:
+            comment = chirp_comment(self.dmr_id, self.tg_list, self.colour_code, self.timeslot, self.contact)
+        else:
+            comment = ""
+        return (
+            self.name, format_mhz(self.rx_hz), duplex_sign(self.tx_hz, self.rx_hz),
+            offset_mhz(self.tx_hz, self.rx_hz), tone,
+            rx.frequency if rx.frequency is not None else calculate_tone_frequency(rx.cell),
+            tx.frequency if tx.frequency is not None else calculate_tone_frequency(tx.cell),
+            tx.code, dtcs_polarity, rx.code, cross_mode, self.mode, "S" if self.skip else "", comment,
+        )
+
+    def to_gd77_row(self, channel_number: int) -> Dict[str, Any]:
+        """Format the channel as an OpenGD77 row dictionary."""
+        return {**GD77_DEFAULT_VALUES, CHANNEL_NUMBER: channel_number,
+                **dict(zip(GD77_CHANNEL_OUTPUTS, self.gd77_cells()))}
+
+    def to_chirp_row(self, channel_number: int) -> Dict[str, Any]:
+        """Format the channel as a CHIRP row dictionary."""
+        return {**CHIRP_DEFAULT_VALUES, LOCATION: channel_number,
+                **dict(zip(CHIRP_CHANNEL_OUTPUTS, self.chirp_cells()))}
+
+
+# Columns read by Channel.from_chirp / Channel.from_gd77, in argument order; Comment / Power follow if present
+CHIRP_CHANNEL_INPUTS = (NAME, FREQUENCY, DUPLEX, OFFSET, TONE, RTONE_FREQ, CTONE_FREQ, DTCS_CODE, DTCS_POLARITY,
+                        RX_DTCS_CODE, CROSS_MODE, MODE, SKIP, POWER)
+GD77_CHANNEL_INPUTS = (CHANNEL_NAME, RX_FREQUENCY, TX_FREQUENCY, RX_TONE, TX_TONE, BANDWIDTH_KHZ, CHANNEL_TYPE,
+                       ALL_SKIP, DMR_ID, TG_LIST, COLOUR_CODE, TIME_SLOT, CONTACT)
+# Columns written from Channel.gd77_cells / Channel.chirp_cells, in value order
+GD77_CHANNEL_OUTPUTS = (CHANNEL_TYPE, CHANNEL_NAME, BANDWIDTH_KHZ, RX_FREQUENCY, TX_FREQUENCY, RX_TONE, TX_TONE,
+                        POWER, ALL_SKIP, COLOUR_CODE, TIME_SLOT, CONTACT, TG_LIST, DMR_ID)
+CHIRP_CHANNEL_OUTPUTS = (NAME, FREQUENCY, DUPLEX, OFFSET, TONE, RTONE_FREQ, CTONE_FREQ, DTCS_CODE, DTCS_POLARITY,
+                         RX_DTCS_CODE, CROSS_MODE, MODE, SKIP, COMMENT)
+
+
+def transform_row(row: Dict[str, Any], channel_number: int) -> Dict[str, Any]:
+    """Transform a single row into the target format."""
+    try:
+        return Channel.from_chirp_row(row).to_gd77_row(channel_number)
+    except KeyError as e:
+        logging.error(f"Missing key {e} in row: {row}")
+        raise
+    except ValueError as e:
+        logging.error(f"Invalid value in row: {row}")
+        raise
+
+
 def transform_chirp_row(row, channel_number):
     """Transform a single row into the target format for CHIRP."""
-    return {
-        **CHIRP_DEFAULT_VALUES,
-        LOCATION: channel_number,
-        NAME: row[CHANNEL_NAME],
-        FREQUENCY: row[RX_FREQUENCY],
-        DUPLEX: determine_duplex(row[TX_FREQUENCY], row[RX_FREQUENCY]),
-        OFFSET: calculate_offset(row[TX_FREQUENCY], row[RX_FREQUENCY]),
-        TONE: determine_tone(row[RX_TONE], row[TX_TONE]),
-        RTONE_FREQ: calculate_tone_frequency(row[RX_TONE]),
-        CTONE_FREQ: calculate_tone_frequency(row[TX_TONE]),
-        DTCS_CODE: calculate_dtcs_code(row[TX_TONE]),
-        DTCS_POLARITY: determine_dtcs_polarity(row[RX_TONE], row[TX_TONE]),
-        RX_DTCS_CODE: calculate_dtcs_code(row[RX_TONE]),
-        CROSS_MODE: determine_cross_mode(row[RX_TONE], row[TX_TONE]),
-        MODE: determine_mode(row[BANDWIDTH_KHZ], row[CHANNEL_TYPE]),
-        SKIP: "S" if row[ALL_SKIP] == YES else "",
-        COMMENT: determine_chirp_comment(row),
-    }
+    return Channel.from_gd77_row(row).to_chirp_row(channel_number)
+
+
+def _resolve_columns(header_index: Dict[str, int], columns) -> List[int]:
+    """Look up the position of each column in the header, raising KeyError for missing ones."""
+    return [header_index[column] for column in columns]
+
+
+def _output_template(fieldnames: list, default_values: dict) -> list:
+    """Build an output row filled with the constant default columns."""
+    return [default_values.get(field, "") for field in fieldnames]
+
+
+def _input_reader(header_index: Dict[str, int], inputs: tuple, optional_inputs: tuple) -> Callable[[list], tuple]:
+    """Return a function picking the cells of the inputs, and of the optional inputs in the header, from a row."""
+    positions = _resolve_columns(header_index, inputs)
+    positions += [header_index[column] for column in optional_inputs if column in header_index]
+    return itemgetter(*positions)
+
+
+def _output_picker(outputs: tuple, fieldnames: list, default_values: dict) -> Tuple[tuple, Callable[[tuple], tuple]]:
+    """Return the output template and a function picking the output row from (number, *cells, *template)."""
+    template = tuple(_output_template(fieldnames, default_values))
+    offset = 1 + len(outputs)
+    sources = {field: 1 + position for position, field in enumerate(outputs)}
+    sources[fieldnames[0]] = 0
+    return template, itemgetter(*(sources.get(field, offset + position) for position, field in enumerate(fieldnames)))
+
+
+def _compile_transformer(header_index: Dict[str, int], parse: Callable, inputs: tuple, optional_inputs: tuple,
+                         format_cells: Callable, outputs: tuple, fieldnames: list, default_values: dict):
+    """Compile a row transformer that parses input cells into a Channel and formats it into a prefilled row."""
+    read_inputs = _input_reader(header_index, inputs, optional_inputs)
+    # Output cells are picked from (channel number, *formatted cells, *template) in a single call
+    template, pick_outputs = _output_picker(outputs, fieldnames, default_values)
+
+    def transform(cells: list, channel_number: int) -> list:
+        channel = parse(*read_inputs(cells))
+        return list(pick_outputs((channel_number, *format_cells(channel), *template)))
+
+    return transform
+
+
+def compile_row_transformer(operation: str, header: List[str]) -> Callable[[list, int], list]:
+    """Resolve the input header once and return a list based row transformer.
+
+    The returned function turns the cells of a csv.reader row into the cells of a
+    csv.writer row in output_fieldnames(operation) order. It produces the same values
+    as transform_row / transform_chirp_row without building dictionaries per row.
+    Raises KeyError if the header lacks a column the transformer reads.
+    """
+    header_index = {column: position for position, column in enumerate(header)}
+    if operation == "gd77":
+        return _compile_transformer(header_index, Channel.from_chirp, CHIRP_CHANNEL_INPUTS, (COMMENT,),
+                                    Channel.gd77_cells, GD77_CHANNEL_OUTPUTS, GD77_FIELDNAMES, GD77_DEFAULT_VALUES)
+    return _compile_transformer(header_index, Channel.from_gd77, GD77_CHANNEL_INPUTS, (POWER,),
+                                Channel.chirp_cells, CHIRP_CHANNEL_OUTPUTS, CHIRP_FIELDNAMES, CHIRP_DEFAULT_VALUES)
+
+
+def compile_channel_reader(operation: str, header: List[str]) -> Callable[[list], Channel]:
+    """Resolve the input header of the operation once and return a function parsing row cells into a Channel.
+
+    Raises KeyError if the header lacks a column the reader needs.
+    """
+    header_index = {column: position for position, column in enumerate(header)}
+    if operation == "gd77":
+        parse, read_inputs = Channel.from_chirp, _input_reader(header_index, CHIRP_CHANNEL_INPUTS, (COMMENT,))
+    else:
+        parse, read_inputs = Channel.from_gd77, _input_reader(header_index, GD77_CHANNEL_INPUTS, (POWER,))
+    return lambda cells: parse(*read_inputs(cells))
+
+
+def compile_channel_formatter(operation: str) -> Callable[[Channel, int], list]:
+    """Return a function formatting a Channel as a row of the operation's output format."""
+    if operation == "gd77":
+        format_cells = Channel.gd77_cells
+        template, pick_outputs = _output_picker(GD77_CHANNEL_OUTPUTS, GD77_FIELDNAMES, GD77_DEFAULT_VALUES)
+    else:
+        format_cells = Channel.chirp_cells
+        template, pick_outputs = _output_picker(CHIRP_CHANNEL_OUTPUTS, CHIRP_FIELDNAMES, CHIRP_DEFAULT_VALUES)
+    return lambda channel, channel_number: list(pick_outputs((channel_number, *format_cells(channel), *template)))
+
+
+def _dict_row_transformer(operation: str, header: List[str], log_errors: bool = True) -> Callable[[list, int], list]:
+    """Return a list based row transformer built on the dictionary transform functions.
+
+    Rows are mapped to dictionaries exactly as csv.DictReader does and the result is
+    projected onto the output columns exactly as csv.DictWriter does. Without
+    log_errors, failing rows raise without being logged.
+    """
+    if log_errors:
+        transform_func = transform_row if operation == "gd77" else transform_chirp_row
+    elif operation == "gd77":
+        transform_func = lambda row, channel_number: Channel.from_chirp_row(row).to_gd77_row(channel_number)
+    else:
+        transform_func = transform_chirp_row
+    fieldnames = output_fieldnames(operation)
+    width = len(header)
+
+    def transform(cells: list, channel_number: int) -> list:
+        row = dict(zip(header, cells))
+        if len(cells) > width:
+            row[None] = cells[width:]
+        elif len(cells) < width:
+            for column in header[len(cells):]:
+                row[column] = None
+        if log_errors:
+            transformed = process_row(row, channel_number, transform_func)
+        else:
+            transformed = transform_func(row, channel_number)
+        return [transformed.get(field, "") for field in fieldnames]
+
+    return transform
+
+
+class ConversionStats:
+    """Counters collected by an instrumented conversion.
+
+    Pass an instance as the stats argument of transform_channels / transform_stream.
+    Runs without one skip the instrumentation entirely.
+    """
+
+    def __init__(self):
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+        self.total_seconds = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.filtered = 0
+        self.channel_types = Counter()
+        self.tone_modes = Counter()
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.total_seconds if self.total_seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the counters as a JSON serialisable dictionary."""
+        return {
+            "rows": self.rows,
+            "errors": self.errors,
+            "filtered": self.filtered,
+            "total_seconds": round(self.total_seconds, 6),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "stage_seconds": {stage: round(seconds, 6) for stage, seconds in self.stage_seconds.items()},
+            "channel_types": dict(self.channel_types),
+            "tone_modes": dict(self.tone_modes),
+        }
+
+    def merge(self, other: "ConversionStats"):
+        """Add the stage timings and counters of other, e.g. from a worker process; total_seconds is kept."""
+        for stage, seconds in other.stage_seconds.items():
+            self.stage_seconds[stage] += seconds
+        self.rows += other.rows
+        self.errors += other.errors
+        self.filtered += other.filtered
+        self.channel_types.update(other.channel_types)
+        self.tone_modes.update(other.tone_modes)
+
+    def instrument(self, operation: str, header: List[str],
+                   transform: Callable[[list, int], list]) -> Callable[[list, int], list]:
+        """Wrap a list based row transformer so it records its time and counts the rows it produces."""
+        fieldnames = output_fieldnames(operation)
+        clock = time.perf_counter
+        stage_seconds = self.stage_seconds
+        if operation == "gd77":
+            # The tone mode is the CHIRP Tone cell of the input, which the OpenGD77 tones cannot always tell back;
+            # no row converts without that column, so without it nothing is counted
+            type_index, tone_index = fieldnames.index(CHANNEL_TYPE), header.index(TONE) if TONE in header else None
+
+            def classify(cells, out):
+                return out[type_index], cells[tone_index]
+        else:
+            mode_index, tone_index = fieldnames.index(MODE), fieldnames.index(TONE)
+
+            def classify(cells, out):
+                return determine_channel_type(out[mode_index]), out[tone_index]
+
+        def instrumented(cells: list, channel_number: int) -> list:
+            start = clock()
+            out = transform(cells, channel_number)
+            stage_seconds[STAGE_TRANSFORM] += clock() - start
+            channel_type, tone_mode = classify(cells, out)
+            self.rows += 1
+            self.channel_types[channel_type] += 1
+            self.tone_modes[tone_mode or NONE] += 1
+            return out
+
+        return instrumented
+
+    def timed_rows(self, rows: Iterable[list]) -> Iterator[list]:
+        """Yield rows from a csv.reader, recording the time spent parsing them."""
+        clock = time.perf_counter
+        stage_seconds = self.stage_seconds
+        rows = iter(rows)
+        while True:
+            start = clock()
+            cells = next(rows, None)
+            stage_seconds[STAGE_READ] += clock() - start
+            if cells is None:
+                return
+            yield cells
+
+    def write_rows(self, writer, rows: Iterable[list]):
+        """Write rows with a csv.writer, recording the time spent formatting and writing them."""
+        clock = time.perf_counter
+        stage_seconds = self.stage_seconds
+        writerow = writer.writerow
+        for out in rows:
+            start = clock()
+            writerow(out)
+            stage_seconds[STAGE_WRITE] += clock() - start
 
 
-def read_input_file(input_file: str):
-    """Read the input CSV file and return a DictReader."""
+# Errors that reject a row in lenient mode; short rows read by the dict engine fail with the latter two
+ROW_ERRORS = (KeyError, ValueError, TypeError, AttributeError)
+
+# Input cells checked, in order, to find the column that made a row fail
+CELL_CHECKS = {
+    "gd77": (
+        (FREQUENCY, parse_hz),
+        (OFFSET, lambda value: value == "" or parse_hz(value)),
+        (POWER, power_level),
+    ),
+    "chirp": (
+        (RX_FREQUENCY, parse_hz),
+        (TX_FREQUENCY, parse_hz),
+        (RX_TONE, calculate_tone_frequency),
+        (TX_TONE, calculate_tone_frequency),
+    ),
+}
+
+
+def invalid_column(operation: str, header: List[str], cells: list, error: Exception) -> str:
+    """Return the name of the input column that made a row fail, or '' if it cannot be told."""
+    if isinstance(error, KeyError):
+        return str(error.args[0])
+    if len(cells) < len(header):
+        return header[len(cells)]
+    row = dict(zip(header, cells))
+    for column, check in CELL_CHECKS[operation]:
+        if column in row:
+            try:
+                check(row[column])
+            except ROW_ERRORS:
+                return column
+    return ""
+
+
+class LenientPolicy(NamedTuple):
+    """Settings of a lenient conversion, which writes failing rows to a reject file instead of stopping."""
+    reject_file: Optional[str] = None  # Defaults to the output file name with REJECT_SUFFIX
+    max_errors: Optional[int] = None  # Error budget; None allows any number of rejected rows
+    numbering: str = NUMBERING_SKIP
+
+
+class ErrorBudgetExceeded(ValueError):
+    """Raised when a lenient conversion rejects more rows than its error budget allows."""
+
+
+class RejectLog:
+    """Writes the rows rejected by a lenient conversion to a reject CSV.
+
+    Each reject row holds the input line number, the failing column and the reason,
+    followed by the original cells, so the file can be fixed up and converted again.
+    Only the first REJECT_LOG_LIMIT rejects are logged.
+    """
+
+    def __init__(self, outfile: TextIO, operation: str, policy: LenientPolicy = LenientPolicy()):
+        self.writer = csv.writer(outfile)
+        self.operation = operation
+        self.policy = policy
+        self.skip_numbers = policy.numbering == NUMBERING_SKIP
+        self.count = 0
+
+    def begin(self, header: List[str]):
+        """Write the header of the reject file."""
+        self.writer.writerow([*REJECT_COLUMNS, *header])
+
+    def reject(self, line_number: int, header: List[str], cells: list, error: Exception):
+        """Record a failing row, raising ErrorBudgetExceeded once the error budget is used up."""
+        self.count += 1
+        column = invalid_column(self.operation, header, cells, error)
+        # A short row fails on whichever of its missing cells is read first, which says little about the row
+        if len(cells) < len(header):
+            reason = f"row has {len(cells)} of {len(header)} columns"
+        else:
+            reason = f"{type(error).__name__}: {error}"
+        self.writer.writerow([line_number, column, reason, *cells])
+        if self.count <= REJECT_LOG_LIMIT:
+            logging.warning(f"Rejected line {line_number}{f' ({column})' if column else ''}: {reason}")
+            if self.count == REJECT_LOG_LIMIT:
+                logging.warning("Further rejected rows are not logged")
+        if self.policy.max_errors is not None and self.count > self.policy.max_errors:
+            raise ErrorBudgetExceeded(f"More than {self.policy.max_errors} rows rejected, stopping at line "
+                                      f"{line_number}")
+
+
+def reject_file_for(output_file: str) -> str:
+    """Return the default reject file of an output file."""
+    if output_file == STDIO_PATH:
+        return DEFAULT_REJECT_FILE
+    return os.path.splitext(output_file)[0] + REJECT_SUFFIX
+
+
+def row_manifest_file_for(output_file: str) -> str:
+    """Return the row manifest of an incremental conversion's output file."""
+    return os.path.splitext(output_file)[0] + ROW_MANIFEST_SUFFIX
+
+
+def file_sha256(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as infile:
+        for block in iter(lambda: infile.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def conversion_fingerprint(operation: str, where: Optional[str] = None) -> str:
+    """Hash everything besides the input that determines the output rows: version, operation, defaults and filter."""
+    settings = [__version__, operation, DMR_COMMENT_TAG, GD77_DEFAULT_VALUES, CHIRP_DEFAULT_VALUES]
+    if where:
+        settings.append(where)
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+def row_key(cells: list) -> str:
+    """Hash the cells of an input row."""
+    # csv.reader rejects NUL characters, so they cannot occur in a cell
+    return hashlib.blake2b("\0".join(cells).encode(), digest_size=16).hexdigest()
+
+
+def iter_csv_records(lines: Iterable[str]) -> Iterator[str]:
+    """Join the lines of CSV text written by csv.writer into records, keeping quoted newlines in their record."""
+    pending = ""
+    for line in lines:
+        pending += line
+        # csv.writer doubles quotes inside quoted fields, so an odd count means the record continues
+        if pending.count('"') % 2 == 0:
+            yield pending
+            pending = ""
+    if pending:
+        yield pending
+
+
+class RowCache:
+    """Output rows of the previous conversion of a file, for an incremental conversion.
+
+    The row manifest written next to the output lists the hash of every input row in
+    output order. If the conversion fingerprint, the output file and the input header
+    are unchanged, rows whose hash is known are copied from the previous output as CSV
+    text and only changed or added rows are transformed. up_to_date tells whether the
+    input file itself is unchanged, in which case no conversion is needed at all. tables
+    lists the files the conversion writes besides the output; it is only up to date if
+    the last conversion wrote the same tables and they still exist.
+    """
+
+    def __init__(self, operation: str, input_file: str, output_file: str, start_channel: int,
+                 where: Optional[str] = None, tables: Sequence[str] = ()):
+        if STDIO_PATH in (input_file, output_file):
+            raise ValueError("Incremental conversions need an input and an output file, not stdin or stdout")
+        self.fingerprint = conversion_fingerprint(operation, where)
+        self.start_channel = start_channel
+        self.tables = list(tables)
+        self.input_sha256 = file_sha256(input_file)
+        self.outputs = {}
+        self.previous_header = None
+        self.header = None
+        self.keys = []
+        self.reused = 0
+        self.up_to_date = False
+
+        manifest = load_row_manifest(row_manifest_file_for(output_file))
+        if manifest is None or manifest.get("fingerprint") != self.fingerprint or not os.path.exists(output_file):
+            return
+        if file_sha256(output_file) != manifest.get("output_sha256"):
+            logging.info(f"{output_file} changed since the last conversion, converting all rows")
+            return
+        if (manifest.get("input_sha256") == self.input_sha256 and manifest.get("start_channel") == start_channel
+                and manifest.get("tables", []) == self.tables and all(map(os.path.exists, self.tables))):
+            self.up_to_date = True
+            return
+        self.previous_header = manifest.get("header")
+        with open_csv_file(output_file, 'r') as outfile:
+            records = iter_csv_records(outfile)
+            next(records, None)
+            for key, record in zip(manifest.get("rows", ()), records):
+                # Keep the text after the channel number, which is assigned afresh
+                self.outputs[key] = record.partition(",")[2]
+
+    def begin(self, header: List[str]):
+        """Record the input header, dropping the previous rows if the input columns changed."""
+        if header != self.previous_header:
+            self.outputs = {}
+        self.header = header
+
+    def save(self, output_file: str):
+        """Write the row manifest of a completed conversion."""
+        manifest = {
+            "version": __version__,
+            "fingerprint": self.fingerprint,
+            "start_channel": self.start_channel,
+            "input_sha256": self.input_sha256,
+            "output_sha256": file_sha256(output_file),
+            "header": self.header,
+            "tables": self.tables,
+            "rows": self.keys,
+        }
+        with open_output_file(row_manifest_file_for(output_file)) as outfile:
+            outfile.write(json.dumps(manifest))
+
+
+def load_row_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """Load a row manifest, returning None if it is missing or unreadable."""
+    try:
+        with open(path, 'r') as infile:
+            return json.load(infile)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        logging.warning(f"Ignoring invalid row manifest {path}")
+        return None
+
+
+def _screen_rows(rows: Iterable[list], matches: Optional[Callable[[list], bool]],
+                 cache: Optional[RowCache]) -> Iterator[Tuple[list, bool, Optional[str], Optional[str]]]:
+    """Yield each row as (cells, matched, key, cached) for the batch engine.
+
+    matched tells whether the row passes the where filter; the cache key and
+    cached output of matching rows are looked up once, for the conversion loop.
+    """
+    for cells in rows:
+        if not cells or (matches is not None and not matches(cells)):
+            yield cells, False, None, None
+        elif cache is None:
+            yield cells, True, None, None
+        else:
+            key = row_key(cells)
+            yield cells, True, key, cache.outputs.get(key)
+
+
+def iter_transformed_cells(header: List[str], rows: Iterable[list], operation: str, start_channel: int,
+                           engine: str = DEFAULT_ENGINE, stats: Optional[ConversionStats] = None,
+                           rejects: Optional[RejectLog] = None, cache: Optional[RowCache] = None,
+                           where: Optional[str] = None) -> Iterator[list]:
+    """Lazily transform csv.reader rows into csv.writer rows.
+
+    The 'compiled' engine uses compile_row_transformer, the 'dict' engine the
+    transform_row / transform_chirp_row functions and the 'batch' engine a
+    BatchTransformer, which computes blocks of rows column by column. All yield
+    identical rows; rows whose length does not match the header, and headers
+    missing a required column, are handled by the dict engine. Transform time, row counts and errors are recorded
+    in stats when given. With rejects, failing rows are passed to it and skipped
+    instead of stopping the conversion. With cache, rows of the previous conversion
+    are yielded as their CSV text, for a CachedRowWriter, and the hash of every
+    converted row is recorded. With a where filter expression, rows that do not
+    match it are skipped on their input cells, before they are transformed.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Invalid engine '{engine}'. Allowed engines are: {', '.join(ENGINES)}.")
+    dict_transform = _dict_row_transformer(operation, header, log_errors=rejects is None)
+    transform = dict_transform
+    if engine == ENGINE_COMPILED:
+        try:
+            transform = compile_row_transformer(operation, header)
+        except KeyError as e:
+            logging.warning(f"Missing column {e}, using the dict engine")
+    elif engine == ENGINE_BATCH:
+        from opengd77_chirp_vectorized import BatchTransformer
+        try:
+            transform = BatchTransformer(operation, header, stats)
+        except KeyError as e:
+            logging.warning(f"Missing column {e}, using the dict engine")
+    batch = transform if engine == ENGINE_BATCH and transform is not dict_transform else None
+
+    if stats is not None:
+        uses_dict_engine = transform is dict_transform
+        dict_transform = stats.instrument(operation, header, dict_transform)
+        transform = dict_transform if uses_dict_engine else stats.instrument(operation, header, transform)
+
+    matches = None
+    if where:
+        from opengd77_chirp_filter import compile_row_filter
+        matches = compile_row_filter(where, operation, header)
+
+    if rejects is not None:
+        rejects.begin(header)
+    if cache is not None:
+        cache.begin(header)
+    # The batch engine has to know ahead of the loop below which rows it filters out or copies from the cache,
+    # so those rows are screened as they are read and come with the result
+    screened = batch is not None
+    if screened:
+        rows = batch.blocks(_screen_rows(rows, matches, cache))
+    width = len(header)
+    channel_number = first_channel_number(operation, start_channel)
+    # The header is line 1; records with embedded newlines count as one line
+    for line_number, cells in enumerate(rows, 2):
+        if screened:
+            cells, matched, key, cached = cells
+        if not cells:
+            # csv.DictReader skips blank lines
+            continue
+        if matches is not None and not (matched if screened else matches(cells)):
+            if stats is not None:
+                stats.filtered += 1
+            continue
+        if cache is not None:
+            if not screened:
+                key = row_key(cells)
+                cached = cache.outputs.get(key)
+            if cached is not None:
+                cache.keys.append(key)
+                cache.reused += 1
+                yield f"{channel_number},{cached}"
+                channel_number += 1
+                continue
+        row_transform = transform if len(cells) == width else dict_transform
+        try:
+            out = row_transform(cells, channel_number)
+        except ROW_ERRORS as e:
+            if rejects is None and not isinstance(e, (KeyError, ValueError)):
+                raise
+            if stats is not None:
+                stats.errors += 1
+            if rejects is not None:
+                rejects.reject(line_number, header, cells, e)
+                if rejects.skip_numbers:
+                    channel_number += 1
+                continue
+            # The dict engine logs its own errors in process_row
+            if row_transform is not dict_transform:
+                if isinstance(e, KeyError):
+                    logging.error(f"Missing key {e} in row: {cells}")
+                else:
+                    logging.error(f"Invalid value in row: {cells}")
+            raise
+        if cache is not None:
+            cache.keys.append(key)
+        yield out
+        channel_number += 1
+
+
+def output_compression(path: str) -> Optional[str]:
+    """Return the compression an output file gets from its suffix, or None for a plain file."""
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(path)[1].lower())
+
+
+def is_snapshot(path: str) -> bool:
+    """Return True if path is a binary channel snapshot rather than a CSV file."""
+    if path == STDIO_PATH:
+        return False
+    try:
+        with open(path, 'rb') as infile:
+            return infile.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+    except OSError:
+        return False
+
+
+def sniff_compression(head: bytes) -> Optional[str]:
+    """Return the compression of a file starting with the bytes head, or None for a plain file."""
+    return next((compression for magic, compression in COMPRESSION_MAGIC.items() if head.startswith(magic)), None)
+
+
+def input_compression(path: str) -> Optional[str]:
+    """Return the compression of an input file from its magic bytes; None for plain files and stdin."""
+    if path == STDIO_PATH:
+        return None
+    try:
+        with open(path, 'rb') as infile:
+            return sniff_compression(infile.read(MAGIC_LENGTH))
+    except OSError:
+        return None
+
+
+def compression_level(value) -> int:
+    """Validate a --compress-level value."""
+    try:
+        level = int(value)
+    except (TypeError, ValueError):
+        level = -1
+    if not 0 <= level <= MAX_COMPRESS_LEVEL:
+        raise ValueError(f"Invalid compression level '{value}', expected 0 to {MAX_COMPRESS_LEVEL}")
+    return level
+
+
+def _codec_file(binary, compression: str, mode: str, level: Optional[int] = None, name: str = ''):
+    """Wrap a binary file in the codec of compression; closing the codec file leaves binary open."""
+    if level is None:
+        level = DEFAULT_COMPRESS_LEVELS[compression]
+    elif 'w' in mode and not MIN_COMPRESS_LEVELS[compression] <= level <= MAX_COMPRESS_LEVEL:
+        raise ValueError(f"Invalid compression level {level} for {COMPRESSION_NAMES[compression]} output, "
+                         f"expected {MIN_COMPRESS_LEVELS[compression]} to {MAX_COMPRESS_LEVEL}")
+    if compression == 'gzip':
+        import gzip
+        # The gzip header records a file name, which should not be the temporary file's
+        return gzip.GzipFile(filename=name, mode=mode, fileobj=binary, compresslevel=level)
+    if compression == 'bz2':
+        import bz2
+        return bz2.BZ2File(binary, mode, compresslevel=level)
+    import lzma
+    return lzma.LZMAFile(binary, mode, preset=level if 'w' in mode else None)
+
+
+def _text_reader(binary) -> TextIO:
+    """Return a text stream over a buffered binary input, decompressing it if its magic bytes say so."""
+    compression = sniff_compression(binary.peek(MAGIC_LENGTH)[:MAGIC_LENGTH])
+    if compression is not None:
+        binary = io.BufferedReader(_codec_file(binary, compression, 'rb'), IO_BUFFER_SIZE)
+    return io.TextIOWrapper(binary, newline='')
+
+
+def _text_writer(binary, compression: Optional[str], level: Optional[int], name: str) -> TextIO:
+    """Return a text stream writing to a binary output, compressing it unless compression is None."""
+    if compression is not None:
+        binary = io.BufferedWriter(_codec_file(binary, compression, 'wb', level, name), IO_BUFFER_SIZE)
+    return io.TextIOWrapper(binary, newline='')
+
+
+@contextmanager
+def open_csv_file(path: str, mode: str, compress_level: Optional[int] = None) -> Iterator[TextIO]:
+    """Open a CSV file for reading or writing; '-' refers to stdin or stdout.
+
+    Inputs compressed with gzip, bzip2 or xz are decompressed as they are read,
+    whatever their name. Outputs named *.gz, *.bz2 or *.xz are compressed at
+    compress_level (0-9 for gzip and xz, by default 6, and 1-9 for bzip2, by default 9).
+    The file is closed when the context exits. The standard streams are flushed
+    but left open so they can be reused by the caller.
+    """
+    reading = "r" in mode
+    if path == STDIO_PATH:
+        stream = sys.stdin if reading else sys.stdout
+        try:
+            fd = stream.fileno()
+        except (AttributeError, OSError):
+            # Replaced streams (e.g. io.StringIO) are used as they are
+            yield stream
+            return
+        stream.flush()
+        if not reading:
+            with open(fd, mode, newline='', closefd=False) as csvfile:
+                yield csvfile
+            return
+        binary = open(fd, 'rb', closefd=False)
+    else:
+        try:
+            binary = open(path, 'rb' if reading else 'wb', buffering=IO_BUFFER_SIZE)
+        except FileNotFoundError as e:
+            raise ValueError(f"File not found: {e.filename}")
+        except PermissionError as e:
+            raise ValueError(f"Permission error: {e}")
+    # Closing the text stream closes a codec but not the file underneath it
+    with binary, (_text_reader(binary) if reading else
+                  _text_writer(binary, output_compression(path), compress_level, os.path.basename(path))) as csvfile:
+        yield csvfile
+
+
+@contextmanager
+def open_output_file(path: str, compress_level: Optional[int] = None, binary: bool = False) -> Iterator[IO]:
+    """Open an output CSV file that only replaces path once the block completes without error.
+
+    Rows are written to a temporary file next to path, so a failed or cancelled
+    conversion leaves no partial output behind and any existing file untouched.
+    The output is compressed if path ends in .gz, .bz2 or .xz; see open_csv_file.
+    With binary, the temporary file itself is yielded, uncompressed and seekable.
+    '-' writes to stdout directly.
+    """
+    if path == STDIO_PATH:
+        if binary:
+            yield sys.stdout.buffer
+            return
+        with open_csv_file(path, 'w') as outfile:
+            yield outfile
+        return
+
+    directory = os.path.dirname(os.path.abspath(path))
     try:
-        return csv.DictReader(open(input_file, 'r'))
-    except FileNotFoundError as e:
-        raise ValueError(f"File not found: {e.filename}")
+        fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=PARTIAL_SUFFIX, dir=directory)
+    except FileNotFoundError:
+        raise ValueError(f"File not found: {path}")
     except PermissionError as e:
         raise ValueError(f"Permission error: {e}")
+    try:
+        with open(fd, 'wb', buffering=IO_BUFFER_SIZE) as raw:
+            if binary:
+                yield raw
+            else:
+                with _text_writer(raw, output_compression(path), compress_level, os.path.basename(path)) as outfile:
+                    yield outfile
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = DEFAULT_FILE_MODE
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
 
 
-def write_output_file(output_file: str, fieldnames: list):
-    """Open the output CSV file and return a DictWriter."""
-    try:
-        outfile = open(output_file, 'w', newline='')
+def _default_file_mode() -> int:
+    """Return the permissions open() gives new files under the current umask."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+DEFAULT_FILE_MODE = _default_file_mode()
+
+
+class ConversionCancelled(Exception):
+    """Raised from a progress callback to stop a conversion; no output file is written."""
+
+
+def _report_progress(lines: Iterable[str], progress: Callable[[int, Optional[int]], Any],
+                     total: Optional[int], position: Optional[Callable[[], int]] = None) -> Iterator[str]:
+    """Yield input lines, calling progress(read, total) every PROGRESS_INTERVAL lines.
+
+    read is the byte position position() returns, or the number of characters read without it.
+    """
+    done = 0
+    pending = 0
+    for line in lines:
+        done += len(line)
+        pending += 1
+        if pending == PROGRESS_INTERVAL:
+            progress(done if position is None else position(), total)
+            pending = 0
+        yield line
+    progress(done if position is None else position(), total)
+
+
+@contextmanager
+def read_input_file(input_file: str) -> Iterator[csv.DictReader]:
+    """Open the input CSV file and yield a DictReader; the file is closed on exit."""
+    with open_csv_file(input_file, 'r') as infile:
+        yield csv.DictReader(infile)
+
+
+@contextmanager
+def write_output_file(output_file: str, fieldnames: list,
+                      compress_level: Optional[int] = None) -> Iterator[csv.DictWriter]:
+    """Open the output CSV file and yield a DictWriter with the header written; the file is closed on exit."""
+    with open_csv_file(output_file, 'w', compress_level) as outfile:
         writer = csv.DictWriter(outfile, fieldnames=fieldnames)
         writer.writeheader()
-        return writer
-    except PermissionError as e:
-        raise ValueError(f"Permission error: {e}")
+        yield writer
 
 
 def process_row(row: dict, channel_number: int, transform_func: Callable):
@@ -380,45 +1598,515 @@ def process_row(row: dict, channel_number: int, transform_func: Callable):
         raise
 
 
-def transform_channels(operation, input_file, output_file, start_channel):
-    """Transform channels based on the operation."""
-    reader = read_input_file(input_file)
-    writer = write_output_file(output_file, GD77_FIELDNAMES if operation == "gd77" else CHIRP_FIELDNAMES)
+def output_fieldnames(operation: str) -> list:
+    """Return the output column names for the operation."""
+    return GD77_FIELDNAMES if operation == "gd77" else CHIRP_FIELDNAMES
+
+
+def first_channel_number(operation: str, start_channel: int) -> int:
+    """Return the number of the first output channel; OpenGD77 channels are numbered from start_channel + 1."""
+    return start_channel + 1 if operation == "gd77" else start_channel
+
+
+def iter_transformed(rows: Iterable[Dict[str, Any]], operation: str, start_channel: int) -> Iterator[Dict[str, Any]]:
+    """Lazily transform input rows, yielding one output row per input row.
 
+    Rows are consumed one at a time, so memory use does not depend on the input size.
+    """
     transform_func = transform_row if operation == "gd77" else transform_chirp_row
-    channel_number = start_channel + 1 if operation == "gd77" else start_channel
+    channel_number = first_channel_number(operation, start_channel)
 
-    for row in reader:
-        transformed_row = process_row(row, channel_number, transform_func)
-        writer.writerow(transformed_row)
+    for row in rows:
+        yield process_row(row, channel_number, transform_func)
         channel_number += 1
 
 
+class CachedRowWriter:
+    """A csv.writer that writes rows given as CSV text, copied from a RowCache, unchanged."""
+
+    def __init__(self, outfile: TextIO):
+        self.writer = csv.writer(outfile)
+        self.write = outfile.write
+
+    def writerow(self, row):
+        if row.__class__ is str:
+            self.write(row)
+        else:
+            self.writer.writerow(row)
+
+    def writerows(self, rows: Iterable):
+        for row in rows:
+            self.writerow(row)
+
+
+def transform_stream(operation: str, infile: TextIO, outfile: TextIO, start_channel: int,
+                     engine: str = DEFAULT_ENGINE, stats: Optional[ConversionStats] = None,
+                     rejects: Optional[RejectLog] = None, cache: Optional[RowCache] = None,
+                     select: Optional[Callable[[List[str], Iterable[list]], Iterable[list]]] = None,
+                     where: Optional[str] = None, references=None):
+    """Transform CSV text read from infile and write the result to outfile.
+
+    If stats is given, the time spent reading, transforming and writing rows is recorded in it.
+    If rejects is given, failing rows are written to it instead of stopping the conversion.
+    If cache is given, unchanged rows are copied from the previous conversion.
+    If select is given, select(header, rows) picks and orders the input rows that are converted.
+    If where is given, only rows matching the filter expression are converted.
+    If references (an opengd77_chirp_contacts.DmrReferences) is given, the written rows are counted in it.
+    """
+    reader = csv.reader(infile)
+    writer = csv.writer(outfile) if cache is None else CachedRowWriter(outfile)
+    if stats is None:
+        header = next(reader, [])
+        rows = reader if select is None else select(header, reader)
+        writer.writerow(output_fieldnames(operation))
+        cells = iter_transformed_cells(header, rows, operation, start_channel, engine, None, rejects, cache, where)
+        writer.writerows(cells if references is None else references.collect(cells))
+        return
+
+    started = time.perf_counter()
+    try:
+        rows = stats.timed_rows(reader)
+        header = next(rows, [])
+        if select is not None:
+            rows = select(header, rows)
+        writer.writerow(output_fieldnames(operation))
+        cells = iter_transformed_cells(header, rows, operation, start_channel, engine, stats, rejects, cache, where)
+        stats.write_rows(writer, cells if references is None else references.collect(cells))
+    finally:
+        stats.total_seconds += time.perf_counter() - started
+
+
+@contextmanager
+def open_reject_log(operation: str, output_file: str, lenient: Optional[LenientPolicy]) -> Iterator[Optional[RejectLog]]:
+    """Open the reject file of a lenient conversion and yield its RejectLog, or yield None if not lenient."""
+    if lenient is None:
+        yield None
+        return
+    reject_file = lenient.reject_file or reject_file_for(output_file)
+    with open_csv_file(reject_file, 'w') as outfile:
+        rejects = RejectLog(outfile, operation, lenient)
+        try:
+            yield rejects
+        finally:
+            if rejects.count:
+                logging.warning(f"Rejected {rejects.count} rows, written to {reject_file}")
+
+
+def transform_channels(operation, input_file, output_file, start_channel, engine=DEFAULT_ENGINE, stats=None,
+                       progress=None, lenient=None, incremental=False, select=None, where=None, compress_level=None,
+                       row_range=None, contacts=False):
+    """Transform channels based on the operation; '-' streams from stdin or to stdout.
+
+    Pass a ConversionStats as stats to collect per-stage timings and row counters.
+    progress(bytes_read, total_bytes) is called periodically while reading, with
+    total_bytes None for stdin and compressed input, whose progress is counted in
+    characters read; raise ConversionCancelled from it to stop. Compressed input is decompressed while it is read, and output named
+    *.gz, *.bz2 or *.xz is compressed at compress_level; see open_csv_file. The output
+    file is only replaced once the conversion succeeds. With a LenientPolicy as
+    lenient, failing rows are written to its reject file and the conversion continues.
+    With incremental, rows unchanged since the previous conversion are copied from
+    its output, and the conversion is skipped if the input file is unchanged.
+    With select, only the rows picked by select(header, rows) are converted, in the
+    order it returns them; see opengd77_chirp_geo.ChannelSelection, and
+    opengd77_chirp_sort.ChannelSort, which sorts the rows before they are numbered.
+    With a where filter expression, only matching rows are converted; see
+    opengd77_chirp_filter. With a (first, last) row_range, only those rows,
+    counted from 1, are read and converted, numbered as in a conversion of the
+    whole file; see opengd77_chirp_index. With contacts, the DMR contacts, TG lists
+    and DMR IDs the converted channels refer to are collected as they are written
+    and saved in tables next to the output; see opengd77_chirp_contacts.
+    """
+    cache = None
+    references = None
+    if contacts:
+        if operation != "gd77":
+            raise ValueError("Contacts and TG lists are only collected in conversions to OpenGD77")
+        from opengd77_chirp_contacts import DmrReferences, table_files_for, tables_stem_for
+        references = DmrReferences()
+    open_input = open_csv_file(input_file, 'r')
+    if row_range is not None:
+        if incremental:
+            raise ValueError("Incremental conversions cannot convert a range of rows")
+        from opengd77_chirp_index import open_row_range
+        open_input = open_row_range(input_file, row_range)
+        start_channel += row_range[0] - 1
+    if incremental:
+        if select is not None:
+            raise ValueError("Incremental conversions cannot select or sort channels")
+        tables = table_files_for(tables_stem_for(output_file)) if references is not None else ()
+        cache = RowCache(operation, input_file, output_file, start_channel, where, tables)
+        if cache.up_to_date:
+            logging.info(f"{input_file} is unchanged since the last conversion, skipping")
+            return
+    with open_input as infile, open_output_file(output_file, compress_level) as outfile, \
+            open_reject_log(operation, output_file, lenient) as rejects:
+        lines = infile
+        if progress is not None:
+            # Characters read from stdin, a compressed file or a range of rows are no measure of the bytes left
+            compressed = input_file == STDIO_PATH or row_range is not None or input_compression(input_file)
+            total = None if compressed else os.path.getsize(input_file)
+            # Characters are not bytes in non-ASCII input, so the position of the file underneath is reported
+            lines = _report_progress(infile, progress, total, None if compressed else infile.buffer.tell)
+        transform_stream(operation, lines, outfile, start_channel, engine, stats, rejects, cache, select, where,
+                         references)
+        if references is not None:
+            references.write(tables_stem_for(output_file))
+    if cache is not None:
+        cache.save(output_file)
+        logging.info(f"Reused {cache.reused} of {len(cache.keys)} rows from the last conversion")
+
+
+class BatchResult(NamedTuple):
+    """Outcome of converting a single file in batch mode."""
+    input_file: str
+    output_file: str
+    error: Optional[str] = None
+    stats: Optional[Dict[str, Any]] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def is_batch_source(source: str) -> bool:
+    """Return True if the input refers to a directory, a glob pattern or a manifest file."""
+    # An existing file is converted on its own, even if its name looks like a pattern or a manifest
+    if os.path.isfile(source):
+        return False
+    return (source.startswith(MANIFEST_PREFIX) or os.path.isdir(source)
+            or any(char in source for char in "*?["))
+
+
+def collect_batch_inputs(source: str) -> List[str]:
+    """Expand a directory, glob pattern or '@manifest' file into a sorted list of input files."""
+    if source.startswith(MANIFEST_PREFIX):
+        manifest = source[len(MANIFEST_PREFIX):]
+        try:
+            with open(manifest, 'r') as infile:
+                lines = (line.strip() for line in infile)
+                base_dir = os.path.dirname(manifest)
+                return [os.path.join(base_dir, line) for line in lines if line and not line.startswith("#")]
+        except FileNotFoundError as e:
+            raise ValueError(f"File not found: {e.filename}")
+    if os.path.isdir(source):
+        return sorted(path for pattern in BATCH_INPUT_PATTERNS for path in glob.glob(os.path.join(source, pattern)))
+    return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+
+
+def _convert_batch_file(operation: str, input_file: str, output_file: str, start_channel: int,
+                        convert_options: Dict[str, Any], collect_stats: bool) -> BatchResult:
+    """Convert one file of a batch, capturing the error instead of raising it."""
+    if os.path.abspath(input_file) == os.path.abspath(output_file):
+        return BatchResult(input_file, output_file, "Output file would overwrite the input file")
+    stats = ConversionStats() if collect_stats else None
+    try:
+        transform_channels(operation, input_file, output_file, start_channel, stats=stats, **convert_options)
+    except Exception as e:
+        return BatchResult(input_file, output_file, f"{type(e).__name__}: {e}", stats and stats.as_dict())
+    return BatchResult(input_file, output_file, None, stats and stats.as_dict())
+
+
+def transform_batch(operation: str, input_files: List[str], output_dir: str, start_channel: int,
+                    max_workers: Optional[int] = None, collect_stats: bool = False,
+                    **convert_options) -> List[BatchResult]:
+    """Convert every input file into output_dir using a process pool.
+
+    Each file is numbered independently from start_channel, exactly as a single
+    transform_channels run would number it. convert_options are passed on to
+    transform_channels. With collect_stats, each result carries the file's
+    ConversionStats.as_dict(). Results are returned in input order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    output_files = [os.path.join(output_dir, os.path.basename(path)) for path in input_files]
+    if len(set(output_files)) != len(output_files):
+        raise ValueError("Batch inputs contain duplicate file names and would overwrite each other.")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_convert_batch_file, operation, input_file, output_file, start_channel,
+                                   convert_options, collect_stats)
+                   for input_file, output_file in zip(input_files, output_files)]
+        results = []
+        for future in futures:
+            result = future.result()
+            if result.ok:
+                logging.info(f"Converted {result.input_file} -> {result.output_file}")
+            else:
+                logging.error(f"Failed to convert {result.input_file}: {result.error}")
+            results.append(result)
+    return results
+
+
+def run_batch(operation: str, source: str, output_dir: str, start_channel: int,
+              max_workers: Optional[int] = None, collect_stats: bool = False,
+              **convert_options) -> List[BatchResult]:
+    """Collect the batch inputs from source, convert them and log a summary."""
+    input_files = collect_batch_inputs(source)
+    if not input_files:
+        raise ValueError(f"No input files found for '{source}'")
+    results = transform_batch(operation, input_files, output_dir, start_channel, max_workers, collect_stats,
+                              **convert_options)
+    failed = sum(1 for result in results if not result.ok)
+    logging.info(f"Batch finished: {len(results) - failed} converted, {failed} failed")
+    return results
+
+
+def split_arguments(argv: List[str]):
+    """Split command line arguments into positional arguments and '--name[=value]' options."""
+    positional = []
+    options = {}
+    for arg in argv:
+        if arg.startswith("--"):
+            name, has_value, value = arg[2:].partition("=")
+            options[name] = value if has_value else True
+        else:
+            positional.append(arg)
+    return positional, options
+
+
+def conversion_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate command line options into transform_channels keyword arguments."""
+    convert_options = {}
+    if "engine" in options:
+        if options["engine"] not in ENGINES:
+            raise ValueError(f"Invalid engine '{options['engine']}'. Allowed engines are: {', '.join(ENGINES)}.")
+        convert_options["engine"] = options["engine"]
+    if any(name in options for name in ("lenient", "rejects", "max-errors", "numbering")):
+        numbering = options.get("numbering", NUMBERING_SKIP)
+        if numbering not in NUMBERINGS:
+            raise ValueError(f"Invalid numbering '{numbering}'. Allowed values are: {', '.join(NUMBERINGS)}.")
+        if options.get("rejects") is True:
+            raise ValueError("--rejects requires a file name: --rejects=FILE")
+        max_errors = int(options["max-errors"]) if "max-errors" in options else None
+        convert_options["lenient"] = LenientPolicy(options.get("rejects"), max_errors, numbering)
+    if "incremental" in options:
+        convert_options["incremental"] = True
+    if any(name in options for name in ("near", "route", "radius", "nearest")):
+        from opengd77_chirp_geo import selection_from_options
+        convert_options["select"] = selection_from_options(options)
+    if "sort" in options or "sort-memory" in options:
+        if options.get("sort", True) is True:
+            raise ValueError("--sort requires a key: --sort=frequency, --sort=name or --sort=band")
+        from opengd77_chirp_sort import ChannelSort, DEFAULT_SORT_MEMORY_MB
+        memory_mb = float(options["sort-memory"]) if "sort-memory" in options else DEFAULT_SORT_MEMORY_MB
+        convert_options["select"] = ChannelSort(options["sort"], memory_mb, select=convert_options.get("select"))
+    if "where" in options:
+        if options["where"] is True:
+            raise ValueError("--where requires a filter expression: --where=EXPRESSION")
+        from opengd77_chirp_filter import parse_where
+        parse_where(options["where"])
+        convert_options["where"] = options["where"]
+    if "compress-level" in options:
+        convert_options["compress_level"] = compression_level(options["compress-level"])
+    if "range" in options:
+        if options["range"] is True:
+            raise ValueError("--range requires the rows to convert: --range=START-END")
+        from opengd77_chirp_index import parse_row_range
+        convert_options["row_range"] = parse_row_range(options["range"])
+    if "contacts" in options:
+        convert_options["contacts"] = True
+    return convert_options
+
+
+def write_stats(summary: Dict[str, Any], destination):
+    """Write a stats summary as JSON to a file, or to stderr if destination is True."""
+    text = json.dumps(summary, indent=2)
+    if destination is True:
+        print(text, file=sys.stderr)
+        return
+    with open(destination, 'w') as outfile:
+        outfile.write(text + "\n")
+
+
+def batch_stats_summary(results: List[BatchResult]) -> Dict[str, Any]:
+    """Combine the per-file stats of a batch into one summary."""
+    files = [{"input_file": result.input_file, "output_file": result.output_file, "error": result.error,
+              **(result.stats or {})} for result in results]
+    return {
+        "files": files,
+        "rows": sum(entry.get("rows", 0) for entry in files),
+        "errors": sum(entry.get("errors", 0) for entry in files),
+        "failed_files": sum(1 for result in results if not result.ok),
+    }
+
+
+def run_codeplug_operation(operation: str, args: List[str], options: Dict[str, Any]):
+    """Run diff or merge on the two codeplugs given as positional arguments."""
+    if len(args) < 3:
+        raise ValueError(f"{operation} needs two codeplugs: {operation} left_file right_file [output_file]"
+                         f"{' [start_channel]' if operation == 'merge' else ''}")
+    allowed_options = ("profile", "format") if operation == "merge" else ("profile",)
+    unsupported = sorted(set(options) - set(allowed_options))
+    if unsupported:
+        raise ValueError(f"{operation} does not support {', '.join('--' + name for name in unsupported)}")
+    output_file = args[3] if len(args) > 3 else VALID_OPERATIONS[operation]["default_output_file"]
+
+    from opengd77_chirp_diff import diff_codeplugs, merge_codeplugs
+    if operation == "diff":
+        if len(args) > 4:
+            raise ValueError("diff does not take a start channel")
+        diff_codeplugs(args[1], args[2], output_file)
+        return
+    output_format = options.get("format")
+    if output_format is not None and output_format not in CONVERSION_OPERATIONS:
+        raise ValueError(f"Invalid format '{output_format}'. Allowed formats are: {', '.join(CONVERSION_OPERATIONS)}.")
+    start_channel = int(args[4]) if len(args) > 4 else DEFAULT_START_CHANNEL
+    merge_codeplugs(args[1], args[2], output_file, start_channel, output_format)
+
+
+def run_validation(args: List[str], options: Dict[str, Any]):
+    """Run validate on the codeplug given as positional argument, exiting with status 1 on violations."""
+    if len(args) > 3:
+        raise ValueError("validate does not take a start channel")
+    unsupported = sorted(set(options) - {"profile", "bandplan"})
+    if unsupported:
+        raise ValueError(f"validate does not support {', '.join('--' + name for name in unsupported)}")
+    input_file = args[1] if len(args) > 1 else VALID_OPERATIONS["validate"]["default_input_file"]
+    output_file = args[2] if len(args) > 2 else VALID_OPERATIONS["validate"]["default_output_file"]
+
+    from opengd77_chirp_bandplan import DEFAULT_BAND_PLANS, parse_band_plans, validate_codeplug
+    plans = options.get("bandplan", DEFAULT_BAND_PLANS)
+    if plans is True:
+        raise ValueError("--bandplan requires a list of band plans: --bandplan=amateur,opengd77,@FILE")
+    if validate_codeplug(input_file, output_file, parse_band_plans(plans))["violations"]:
+        sys.exit(1)
+
+
+def run_snapshot(operation: str, args: List[str], options: Dict[str, Any]):
+    """Save a codeplug as a snapshot, or convert a snapshot given as the input of gd77 or chirp."""
+    allowed_options = ("profile",) if operation == "snapshot" else ("profile", "compress-level")
+    unsupported = sorted(set(options) - set(allowed_options))
+    if unsupported:
+        raise ValueError(f"Snapshots do not support {', '.join('--' + name for name in unsupported)}")
+    input_file = args[1] if len(args) > 1 else VALID_OPERATIONS[operation]["default_input_file"]
+    output_file = args[2] if len(args) > 2 else VALID_OPERATIONS[operation]["default_output_file"]
+
+    from opengd77_chirp_snapshot import convert_snapshot, write_snapshot
+    if operation == "snapshot":
+        if len(args) > 3:
+            raise ValueError("snapshot does not take a start channel")
+        write_snapshot(input_file, output_file)
+        return
+    start_channel = int(args[3]) if len(args) > 3 else DEFAULT_START_CHANNEL
+    convert_snapshot(operation, input_file, output_file, start_channel,
+                     conversion_options(options).get("compress_level"))
+
+
+def run(operation: str, args: List[str], options: Dict[str, Any]):
+    """Run the conversion described by the positional arguments and options."""
+    if operation in CODEPLUG_OPERATIONS:
+        run_codeplug_operation(operation, args, options)
+        return
+    if operation == "validate":
+        run_validation(args, options)
+        return
+    if operation == "snapshot" or (len(args) > 1 and is_snapshot(args[1])):
+        run_snapshot(operation, args, options)
+        return
+
+    # Retrieve default input and output files from the dictionary
+    input_file_default = VALID_OPERATIONS[operation]["default_input_file"]
+    output_file_default = VALID_OPERATIONS[operation]["default_output_file"]
+
+    # Assign input and output files based on arguments or defaults
+    input_file = args[1] if len(args) > 1 else input_file_default
+
+    start_channel = int(args[3]) if len(args) > 3 else DEFAULT_START_CHANNEL
+    convert_options = conversion_options(options)
+
+    if is_batch_source(input_file):
+        if "also" in options:
+            raise ValueError("--also cannot be used in batch mode")
+        if "rejects" in options:
+            raise ValueError("--rejects cannot be used in batch mode; each file gets its own reject file")
+        output_dir = args[2] if len(args) > 2 else DEFAULT_BATCH_OUTPUT_DIR
+        max_workers = int(options["jobs"]) if "jobs" in options else None
+        results = run_batch(operation, input_file, output_dir, start_channel, max_workers, "stats" in options,
+                            **convert_options)
+        if "stats" in options:
+            write_stats(batch_stats_summary(results), options["stats"])
+        if not all(result.ok for result in results):
+            sys.exit(1)
+        return
+
+    if "shard" in options:
+        unsupported = sorted(set(options) & {"parallel", "stats", "lenient", "rejects", "max-errors", "numbering",
+                                             "incremental", "range", "also", "compress-level", "contacts"})
+        if unsupported:
+            raise ValueError(f"--shard cannot be combined with {', '.join('--' + name for name in unsupported)}")
+        if options["shard"] is True:
+            raise ValueError("--shard requires a key: --shard=band, --shard=mode or --shard=prefix[:N]")
+        from opengd77_chirp_shard import MAX_CHANNELS, MAX_ZONE_CHANNELS, transform_sharded
+        output_dir = args[2] if len(args) > 2 else DEFAULT_BATCH_OUTPUT_DIR
+        shard_channels = int(options["shard-size"]) if "shard-size" in options else MAX_CHANNELS
+        zone_channels = int(options["zone-size"]) if "zone-size" in options else MAX_ZONE_CHANNELS
+        transform_sharded(operation, input_file, output_dir, start_channel, options["shard"], shard_channels,
+                          zone_channels, convert_options.get("select"), convert_options.get("where"))
+        return
+    if "shard-size" in options or "zone-size" in options:
+        raise ValueError("--shard-size and --zone-size require --shard")
+
+    output_file = args[2] if len(args) > 2 else output_file_default
+    if "also" in options:
+        unsupported = sorted(set(options) & {"parallel", "stats", "lenient", "rejects", "max-errors", "numbering",
+                                             "incremental", "range", "contacts"})
+        if unsupported:
+            raise ValueError(f"--also cannot be combined with {', '.join('--' + name for name in unsupported)}")
+        if options["also"] is True:
+            raise ValueError("--also requires a list of outputs: --also=FORMAT:FILE,...")
+        from opengd77_chirp_fanout import parse_sinks, transform_fanout
+        transform_fanout(operation, input_file, [(operation, output_file), *parse_sinks(options["also"])],
+                         start_channel, convert_options.get("select"), convert_options.get("where"),
+                         convert_options.get("compress_level"))
+        return
+    if "stats" in options:
+        convert_options["stats"] = ConversionStats()
+    if "parallel" in options:
+        if any(name in convert_options for name in ("lenient", "incremental", "select", "where", "row_range",
+                                                    "contacts")):
+            raise ValueError("Lenient, incremental, filtered, sorted, ranged, channel selecting and contact "
+                             "collecting conversions cannot be combined with --parallel")
+        from opengd77_chirp_parallel import transform_channels_parallel
+        max_workers = int(options["jobs"]) if "jobs" in options else None
+        transform_channels_parallel(operation, input_file, output_file, start_channel, max_workers,
+                                    **convert_options)
+    else:
+        transform_channels(operation, input_file, output_file, start_channel, **convert_options)
+    if "stats" in options:
+        write_stats(convert_options["stats"].as_dict(), options["stats"])
+
+
 def main():
-    # Validate input arguments
-    if len(sys.argv) > 5:
+    args, options = split_arguments(sys.argv[1:])
+
+    # Validate input arguments; diff and merge take a second input file
+    if len(args) > (5 if args and args[0] in CODEPLUG_OPERATIONS else 4):
         print(
-            "Error: Too many arguments provided. Usage: python opengd77-chirp-csv-coverter.py [input_file] [output_file] ["
-            "start_channel]")
+            "Error: Too many arguments provided. Usage: python opengd77-chirp-csv-coverter.py [operation] [input_file] "
+            "[output_file] [start_channel] [--option=value ...]")
+        sys.exit(1)
+    unknown_options = sorted(set(options) - set(VALID_OPTIONS))
+    if unknown_options:
+        print(f"Error: Unknown option(s): {', '.join('--' + name for name in unknown_options)}. "
+              f"Allowed options are: {', '.join('--' + name for name in VALID_OPTIONS)}.")
         sys.exit(1)
 
     # Assign values based on input or defaults
-    operation = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_OPERATION
+    operation = args[0] if len(args) > 0 else DEFAULT_OPERATION
     # Validate operation
     if operation not in VALID_OPERATIONS:
         print(f"Error: Invalid operation '{operation}'. Allowed operations are: {', '.join(VALID_OPERATIONS.keys())}.")
         sys.exit(1)
 
-    # Retrieve default input and output files from the dictionary
-    input_file_default = VALID_OPERATIONS[operation]["default_input_file"]
-    output_file_default = VALID_OPERATIONS[operation]["default_output_file"]
-
-    # Assign input and output files based on arguments or defaults
-    input_file = sys.argv[2] if len(sys.argv) > 2 else input_file_default
-    output_file = sys.argv[3] if len(sys.argv) > 3 else output_file_default
-
-    start_channel = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_START_CHANNEL
-    transform_channels(operation, input_file, output_file, start_channel)
+    if "profile" in options:
+        profile_file = DEFAULT_PROFILE_FILE if options["profile"] is True else options["profile"]
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run, operation, args, options)
+        finally:
+            profiler.dump_stats(profile_file)
+            logging.info(f"Profile written to {profile_file}")
+    else:
+        run(operation, args, options)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,190 @@
+"""Diff and merge two codeplugs, in either format, with a hash join on the channel key.
+
+Channels are matched on their key: RX and TX frequency in Hz, RX and TX tone and
+mode. Both sides are parsed into Channel values by the same functions the
+conversions use, so an OpenGD77 codeplug can be compared with, or merged into,
+a CHIRP one. The left codeplug is held in a dictionary keyed on the channel key
+and the right one is streamed past it, so both operations take linear time.
+"""
+import csv
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from opengd77_chirp_csv_coverter import (CHANNEL_NUMBER, LOCATION, MODE, NAME, RX_FREQUENCY, RX_TONE, TX_FREQUENCY,
+                                         TX_TONE, Channel, compile_channel_reader, compile_row_transformer,
+                                         first_channel_number, format_mhz, open_csv_file, open_output_file,
+                                         output_fieldnames)
+
+CHANGE_ADDED = "added"
+CHANGE_REMOVED = "removed"
+CHANGE_CHANGED = "changed"
+DIFF_COLUMNS = ("Change", "Left Line", "Right Line", NAME, RX_FREQUENCY, TX_FREQUENCY, RX_TONE, TX_TONE, MODE,
+                "Details")
+# Channel attributes compared for matching channels; the DMR details are only compared between OpenGD77 codeplugs
+COMPARED_ATTRIBUTES = ("name", "power", "skip")
+GD77_COMPARED_ATTRIBUTES = COMPARED_ATTRIBUTES + ("dmr_id", "tg_list", "colour_code", "timeslot", "contact")
+
+ChannelKey = Tuple[int, int, str, str, str]
+
+
+class CodeplugRow(NamedTuple):
+    """A parsed row of a codeplug."""
+    line_number: int
+    cells: list
+    channel: Channel
+
+
+def codeplug_format(header: List[str]) -> str:
+    """Return the format of a codeplug from its header: 'gd77' for OpenGD77, 'chirp' for CHIRP."""
+    if CHANNEL_NUMBER in header:
+        return "gd77"
+    if LOCATION in header:
+        return "chirp"
+    raise ValueError(f"Unknown codeplug format, the header has neither '{CHANNEL_NUMBER}' nor '{LOCATION}'")
+
+
+def channel_parser(codeplug: str, header: List[str]) -> Callable[[list], Channel]:
+    """Resolve the header once and return a function parsing the cells of a row into a Channel."""
+    # The operation named after the other format reads this one
+    try:
+        return compile_channel_reader("gd77" if codeplug == "chirp" else "chirp", header)
+    except KeyError as e:
+        raise ValueError(f"Missing column {e} in the {codeplug} codeplug")
+
+
+def channel_key(channel: Channel) -> ChannelKey:
+    """Return the key channels are matched on: RX and TX Hz, RX and TX tone and mode."""
+    return channel.rx_hz, channel.tx_hz, channel.rx_tone.cell, channel.tx_tone.cell, channel.mode
+
+
+class Codeplug:
+    """A codeplug being read; iterate over it for its CodeplugRow values."""
+
+    def __init__(self, path: str, infile: TextIO):
+        self.path = path
+        self.reader = csv.reader(infile)
+        self.header = next(self.reader, [])
+        self.format = codeplug_format(self.header)
+        self.parse = channel_parser(self.format, self.header)
+
+    def __iter__(self) -> Iterator[CodeplugRow]:
+        # The header is line 1
+        for line_number, cells in enumerate(self.reader, 2):
+            if not cells:
+                continue
+            try:
+                channel = self.parse(cells)
+            except (IndexError, KeyError, ValueError) as e:
+                raise ValueError(f"{self.path} line {line_number}: {type(e).__name__}: {e}")
+            yield CodeplugRow(line_number, cells, channel)
+
+
+@contextmanager
+def open_codeplug(path: str) -> Iterator[Codeplug]:
+    """Open a codeplug file, or stdin for '-', and detect its format."""
+    with open_csv_file(path, 'r') as infile:
+        yield Codeplug(path, infile)
+
+
+def channel_differences(left: Channel, right: Channel, attributes=COMPARED_ATTRIBUTES) -> List[str]:
+    """Describe the attributes that differ between two channels with the same key."""
+    return [f"{attribute}: {getattr(left, attribute)!r} -> {getattr(right, attribute)!r}"
+            for attribute in attributes if getattr(left, attribute) != getattr(right, attribute)]
+
+
+def _diff_row(change: str, left: Optional[CodeplugRow], right: Optional[CodeplugRow], details: str = "") -> list:
+    channel = (right or left).channel
+    return [change, left.line_number if left else "", right.line_number if right else "", channel.name,
+            format_mhz(channel.rx_hz), format_mhz(channel.tx_hz), channel.rx_tone.cell, channel.tx_tone.cell,
+            channel.mode, details]
+
+
+def diff_codeplugs(left_file: str, right_file: str, output_file: str) -> Dict[str, int]:
+    """Write a report of the channels added to, removed from and changed in right_file compared to left_file.
+
+    Channels with the same key are paired in file order, so a key listed twice on
+    the left and once on the right reports one removed channel. Added and changed
+    channels are reported in right file order, then removed ones in left file
+    order. Returns the number of channels per kind of change and of unchanged ones.
+    """
+    counts = {CHANGE_ADDED: 0, CHANGE_REMOVED: 0, CHANGE_CHANGED: 0, "unchanged": 0}
+    with open_codeplug(left_file) as left, open_codeplug(right_file) as right, \
+            open_output_file(output_file) as outfile:
+        attributes = GD77_COMPARED_ATTRIBUTES if left.format == right.format == "gd77" else COMPARED_ATTRIBUTES
+        index: Dict[ChannelKey, deque] = {}
+        for row in left:
+            # The cells are not needed for the report; dropping them keeps the index small
+            index.setdefault(channel_key(row.channel), deque()).append(row._replace(cells=None))
+
+        writer = csv.writer(outfile)
+        writer.writerow(DIFF_COLUMNS)
+        for row in right:
+            matches = index.get(channel_key(row.channel))
+            if not matches:
+                counts[CHANGE_ADDED] += 1
+                writer.writerow(_diff_row(CHANGE_ADDED, None, row))
+                continue
+            previous = matches.popleft()
+            differences = channel_differences(previous.channel, row.channel, attributes)
+            if differences:
+                counts[CHANGE_CHANGED] += 1
+                writer.writerow(_diff_row(CHANGE_CHANGED, previous, row, "; ".join(differences)))
+            else:
+                counts["unchanged"] += 1
+        removed = sorted((row for matches in index.values() for row in matches), key=lambda row: row.line_number)
+        counts[CHANGE_REMOVED] = len(removed)
+        writer.writerows(_diff_row(CHANGE_REMOVED, row, None) for row in removed)
+    logging.info(f"{counts[CHANGE_ADDED]} added, {counts[CHANGE_REMOVED]} removed, {counts[CHANGE_CHANGED]} changed, "
+                 f"{counts['unchanged']} unchanged channels")
+    return counts
+
+
+def _row_writer(codeplug: Codeplug, output_format: str) -> Callable[[CodeplugRow, int], list]:
+    """Return a function formatting rows of a codeplug as output_format rows with a new channel number."""
+    fieldnames = output_fieldnames(output_format)
+    if codeplug.format == output_format:
+        # Rows already in the output format keep every cell, projected onto the output columns
+        header_index = {column: position for position, column in enumerate(codeplug.header)}
+        positions = [header_index.get(field) for field in fieldnames[1:]]
+
+        def copy(row: CodeplugRow, channel_number: int) -> list:
+            cells = row.cells
+            return [channel_number, *(cells[position] if position is not None and position < len(cells) else ""
+                                      for position in positions)]
+        return copy
+    # The operation named after a format converts into it
+    transform = compile_row_transformer(output_format, codeplug.header)
+    return lambda row, channel_number: transform(row.cells, channel_number)
+
+
+def merge_codeplugs(left_file: str, right_file: str, output_file: str, start_channel: int = 0,
+                    output_format: Optional[str] = None) -> int:
+    """Merge two codeplugs into one list without duplicate channels and return its number of channels.
+
+    The channels of left_file come first, followed by the channels of right_file
+    whose key is not in left_file. Of channels sharing a key, the first one is
+    kept. Channels are renumbered from start_channel, as a conversion numbers
+    them, in output_format (by default the format of left_file).
+    """
+    with open_codeplug(left_file) as left, open_codeplug(right_file) as right, \
+            open_output_file(output_file) as outfile:
+        output_format = output_format or left.format
+        channel_number = first_channel_number(output_format, start_channel)
+        first_channel = channel_number
+        seen = set()
+        writer = csv.writer(outfile)
+        writer.writerow(output_fieldnames(output_format))
+        for codeplug in (left, right):
+            format_row = _row_writer(codeplug, output_format)
+            for row in codeplug:
+                key = channel_key(row.channel)
+                if key in seen:
+                    continue
+                seen.add(key)
+                writer.writerow(format_row(row, channel_number))
+                channel_number += 1
+    merged = channel_number - first_channel
+    logging.info(f"Merged {merged} channels into {output_file}")
+    return merged
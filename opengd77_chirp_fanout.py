@@ -0,0 +1,133 @@
+"""Fan-out conversion: read a codeplug once and write it to several outputs in the same pass.
+
+Every input row is parsed into a Channel once, and each sink formats that
+Channel: as an OpenGD77 CSV row, a CHIRP CSV row or a JSON Lines record. Each
+sink collects its formatted rows in its own buffer and writes them in batches,
+so publishing a list in three formats costs one read and one parse per row.
+"""
+import csv
+import json
+import logging
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from opengd77_chirp_csv_coverter import (CONVERSION_OPERATIONS, Channel, compile_channel_formatter,
+                                         compile_channel_reader, first_channel_number, open_csv_file,
+                                         open_output_file, output_fieldnames)
+
+JSONL = "jsonl"
+SINK_FORMATS = (*CONVERSION_OPERATIONS, JSONL)
+SINK_SEPARATOR = ","
+# Number of rows a sink buffers before writing them
+FANOUT_BATCH_ROWS = 1024
+
+
+def channel_record(channel: Channel, channel_number: int) -> Dict[str, Any]:
+    """Return a Channel as a JSON serialisable dictionary."""
+    return {
+        "number": channel_number,
+        "name": channel.name,
+        "type": channel.channel_type,
+        "mode": channel.mode,
+        "rx_hz": channel.rx_hz,
+        "tx_hz": channel.tx_hz,
+        "rx_tone": channel.rx_tone.cell,
+        "tx_tone": channel.tx_tone.cell,
+        "power": channel.power,
+        "skip": channel.skip,
+        "dmr_id": channel.dmr_id,
+        "tg_list": channel.tg_list,
+        "colour_code": channel.colour_code,
+        "timeslot": channel.timeslot,
+        "contact": channel.contact,
+    }
+
+
+def parse_sinks(value: str) -> List[Tuple[str, str]]:
+    """Parse 'FORMAT:FILE,FORMAT:FILE,...' into (format, file) pairs."""
+    sinks = []
+    for entry in value.split(SINK_SEPARATOR):
+        sink_format, found, path = entry.partition(":")
+        if not found or not path:
+            raise ValueError(f"Invalid output '{entry}', expected FORMAT:FILE")
+        if sink_format not in SINK_FORMATS:
+            raise ValueError(f"Invalid output format '{sink_format}'. Allowed formats are: {', '.join(SINK_FORMATS)}.")
+        sinks.append((sink_format, path))
+    return sinks
+
+
+class Sink:
+    """An output of a fan-out conversion, numbering and buffering its own rows."""
+
+    def __init__(self, sink_format: str, outfile: TextIO, start_channel: int):
+        self.format = sink_format
+        self.pending = []
+        if sink_format == JSONL:
+            self.channel_number = start_channel
+            self.format_row = lambda channel, number: json.dumps(channel_record(channel, number)) + "\n"
+            self.write_rows = outfile.writelines
+            return
+        self.channel_number = first_channel_number(sink_format, start_channel)
+        self.format_row = compile_channel_formatter(sink_format)
+        writer = csv.writer(outfile)
+        writer.writerow(output_fieldnames(sink_format))
+        self.write_rows = writer.writerows
+
+    def add(self, channel: Channel):
+        self.pending.append(self.format_row(channel, self.channel_number))
+        self.channel_number += 1
+        if len(self.pending) >= FANOUT_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        self.write_rows(self.pending)
+        self.pending = []
+
+
+def transform_fanout(operation: str, input_file: str, sinks: List[Tuple[str, str]], start_channel: int,
+                     select=None, where: Optional[str] = None, compress_level: Optional[int] = None) -> int:
+    """Read the input of the operation once and write every channel to each (format, file) sink.
+
+    Formats are 'gd77' and 'chirp', which write the same rows as a conversion into
+    that format, and 'jsonl', which writes a JSON object per channel numbered like
+    CHIRP locations. select and where pick the converted rows as in
+    transform_channels. Files named *.gz, *.bz2 or *.xz are compressed at
+    compress_level. Output files are only replaced once every sink is written.
+    Returns the number of channels written.
+    """
+    paths = [path for _, path in sinks]
+    if len(set(paths)) != len(paths):
+        raise ValueError("Each output needs its own file, and only one can be written to stdout")
+
+    with open_csv_file(input_file, 'r') as infile, ExitStack() as stack:
+        reader = csv.reader(infile)
+        header = next(reader, [])
+        rows = reader if select is None else select(header, reader)
+        try:
+            read_channel = compile_channel_reader(operation, header)
+        except KeyError as e:
+            raise ValueError(f"Missing column {e} in the input")
+        matches = None
+        if where:
+            from opengd77_chirp_filter import compile_row_filter
+            matches = compile_row_filter(where, operation, header)
+        outputs = [Sink(sink_format, stack.enter_context(open_output_file(path, compress_level)), start_channel)
+                   for sink_format, path in sinks]
+
+        count = 0
+        # The header is line 1
+        for line_number, cells in enumerate(rows, 2):
+            if not cells or (matches is not None and not matches(cells)):
+                continue
+            try:
+                channel = read_channel(cells)
+            except (IndexError, KeyError, ValueError) as e:
+                logging.error(f"Invalid value in row: {cells}")
+                raise ValueError(f"Line {line_number}: {type(e).__name__}: {e}")
+            for sink in outputs:
+                sink.add(channel)
+            count += 1
+        for sink in outputs:
+            sink.flush()
+    logging.info(f"Wrote {count} channels to {', '.join(paths)}")
+    return count
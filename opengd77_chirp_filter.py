@@ -0,0 +1,186 @@
+"""Row filters for the --where option, evaluated on the raw input cells.
+
+A filter expression is a list of clauses separated by ';', all of which must
+hold for a row to be converted:
+
+    band=2m,70cm;type=digital;skip=no
+    mode!=AM;rx_only=no;tone=tsql,dtcs
+
+Each clause compares a field with one or more comma separated values, with '='
+(the field has one of the values) or '!=' (it has none of them); values are
+case-insensitive. compile_row_filter resolves the fields against the input
+header once, so rows are tested on their csv.reader cells before any Channel
+or output row is built for them.
+"""
+from bisect import bisect_right
+from typing import Callable, Dict, List, NamedTuple
+
+from opengd77_chirp_csv_coverter import (ALL_SKIP, BANDWIDTH_KHZ, CHANNEL_TYPE, DUPLEX, FREQUENCY, MODE, ROW_ERRORS,
+                                         RX_FREQUENCY, RX_ONLY, RX_TONE, SKIP, TONE, TX_TONE, YES,
+                                         determine_channel_type, determine_mode, determine_tone, parse_hz)
+
+CLAUSE_SEPARATOR = ";"
+VALUE_SEPARATOR = ","
+# Longest operators first, so '!=' is not read as '='
+OPERATORS = ("!=", "=")
+
+# Amateur bands matched by the band field, as (name, lowest Hz, highest Hz), covering all ITU regions
+BANDS = (
+    ("160m", 1_800_000, 2_000_000),
+    ("80m", 3_500_000, 4_000_000),
+    ("60m", 5_250_000, 5_450_000),
+    ("40m", 7_000_000, 7_300_000),
+    ("30m", 10_100_000, 10_150_000),
+    ("20m", 14_000_000, 14_350_000),
+    ("17m", 18_068_000, 18_168_000),
+    ("15m", 21_000_000, 21_450_000),
+    ("12m", 24_890_000, 24_990_000),
+    ("10m", 28_000_000, 29_700_000),
+    ("6m", 50_000_000, 54_000_000),
+    ("4m", 70_000_000, 70_500_000),
+    ("2m", 144_000_000, 148_000_000),
+    ("1.25m", 219_000_000, 225_000_000),
+    ("70cm", 420_000_000, 450_000_000),
+    ("23cm", 1_240_000_000, 1_300_000_000),
+)
+# Band of frequencies outside every amateur band
+OTHER_BAND = "other"
+BAND_STARTS = [start for _, start, _ in BANDS]
+
+YES_NO = ("yes", "no")
+# Allowed values of the fields with a fixed set of values; mode takes any value
+FIELD_VALUES = {
+    "band": tuple(name for name, _, _ in BANDS) + (OTHER_BAND,),
+    "mode": None,
+    "type": ("analogue", "digital"),
+    "tone": ("none", "tone", "tsql", "dtcs", "cross"),
+    "skip": YES_NO,
+    "rx_only": YES_NO,
+}
+
+
+class Clause(NamedTuple):
+    """A clause of a filter expression: field has (or with negate, has not) one of values."""
+    field: str
+    values: frozenset
+    negate: bool = False
+
+
+def band_name(hz: int) -> str:
+    """Return the name of the amateur band holding a frequency, or OTHER_BAND."""
+    position = bisect_right(BAND_STARTS, hz) - 1
+    if position >= 0 and hz <= BANDS[position][2]:
+        return BANDS[position][0]
+    return OTHER_BAND
+
+
+def parse_where(expression: str) -> List[Clause]:
+    """Parse a filter expression into its clauses, raising ValueError if it is invalid."""
+    clauses = []
+    for text in expression.split(CLAUSE_SEPARATOR):
+        if not text.strip():
+            continue
+        for operator in OPERATORS:
+            field, found, values = text.partition(operator)
+            if found:
+                break
+        else:
+            raise ValueError(f"Invalid filter clause '{text}', expected FIELD=VALUE or FIELD!=VALUE")
+        field = field.strip().lower()
+        if field not in FIELD_VALUES:
+            raise ValueError(f"Invalid filter field '{field}'. Allowed fields are: {', '.join(FIELD_VALUES)}.")
+        values = frozenset(value.strip().lower() for value in values.split(VALUE_SEPARATOR) if value.strip())
+        if not values:
+            raise ValueError(f"Filter clause '{text}' has no values")
+        allowed = FIELD_VALUES[field]
+        unknown = sorted(values - set(allowed)) if allowed is not None else []
+        if unknown:
+            raise ValueError(f"Invalid {field} '{unknown[0]}'. Allowed values are: {', '.join(allowed)}.")
+        clauses.append(Clause(field, values, operator == "!="))
+    if not clauses:
+        raise ValueError("Empty filter expression")
+    return clauses
+
+
+def _yes_no(flag: bool) -> str:
+    return "yes" if flag else "no"
+
+
+def _chirp_field_getters(header_index: Dict[str, int]) -> Callable[[str], Callable[[list], str]]:
+    """Return getters of the filter fields from the cells of a CHIRP row, for the gd77 operation."""
+    def getter(field):
+        if field == "band":
+            frequency = header_index[FREQUENCY]
+            return lambda cells: band_name(parse_hz(cells[frequency]))
+        if field == "mode":
+            mode = header_index[MODE]
+            return lambda cells: cells[mode].lower()
+        if field == "type":
+            mode = header_index[MODE]
+            return lambda cells: determine_channel_type(cells[mode]).lower()
+        if field == "tone":
+            tone = header_index[TONE]
+            return lambda cells: cells[tone].lower() or "none"
+        if field == "skip":
+            skip = header_index[SKIP]
+            return lambda cells: _yes_no(cells[skip] == "S")
+        duplex = header_index[DUPLEX]
+        return lambda cells: _yes_no(cells[duplex] == "off")
+    return getter
+
+
+def _gd77_field_getters(header_index: Dict[str, int]) -> Callable[[str], Callable[[list], str]]:
+    """Return getters of the filter fields from the cells of an OpenGD77 row, for the chirp operation."""
+    def getter(field):
+        if field == "band":
+            frequency = header_index[RX_FREQUENCY]
+            return lambda cells: band_name(parse_hz(cells[frequency]))
+        if field == "mode":
+            bandwidth, channel_type = header_index[BANDWIDTH_KHZ], header_index[CHANNEL_TYPE]
+            return lambda cells: determine_mode(cells[bandwidth], cells[channel_type]).lower()
+        if field == "type":
+            channel_type = header_index[CHANNEL_TYPE]
+            return lambda cells: cells[channel_type].lower()
+        if field == "tone":
+            rx_tone, tx_tone = header_index[RX_TONE], header_index[TX_TONE]
+            return lambda cells: determine_tone(cells[rx_tone], cells[tx_tone]).lower() or "none"
+        if field == "skip":
+            all_skip = header_index[ALL_SKIP]
+            return lambda cells: _yes_no(cells[all_skip] == YES)
+        rx_only = header_index[RX_ONLY]
+        return lambda cells: _yes_no(cells[rx_only] == YES)
+    return getter
+
+
+def compile_row_filter(expression: str, operation: str, header: List[str]) -> Callable[[list], bool]:
+    """Resolve a filter expression against the input header and return a predicate on csv.reader rows.
+
+    Rows shorter than the header, and rows whose cells a field cannot be derived
+    from (such as an invalid frequency), are kept, so the conversion reports them
+    as it would without a filter. Raises ValueError if the header lacks a column
+    a field is read from.
+    """
+    header_index = {column: position for position, column in enumerate(header)}
+    field_getter = _chirp_field_getters(header_index) if operation == "gd77" else _gd77_field_getters(header_index)
+    tests = []
+    for clause in parse_where(expression):
+        try:
+            tests.append((field_getter(clause.field), clause.values, clause.negate))
+        except KeyError as e:
+            raise ValueError(f"Filter field '{clause.field}' needs the column {e} in the input")
+    width = len(header)
+
+    def matches(cells: list) -> bool:
+        if len(cells) < width:
+            return True
+        for get, values, negate in tests:
+            try:
+                value = get(cells)
+            except ROW_ERRORS:
+                return True
+            if (value in values) == negate:
+                return False
+        return True
+
+    return matches
+
@@ -0,0 +1,293 @@
+"""Geographic channel selection using the Latitude and Longitude columns.
+
+Channels with a location are put in a GridIndex, a uniform latitude/longitude
+grid, so "within R km of a point", "nearest N to a point" and "nearest N along
+a route" only measure distances to channels in nearby cells instead of
+scanning every row for each query. A ChannelSelection runs such a query on the
+input rows of a conversion and passes the selected rows on to the transform.
+"""
+import math
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from opengd77_chirp_csv_coverter import LATITUDE, LONGITUDE, MANIFEST_PREFIX, USE_LOCATION, YES
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+HALF_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+DEFAULT_CELL_DEGREES = 0.5
+
+Point = Tuple[float, float]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the great-circle distance in km between two points given in degrees."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_point(value: str) -> Point:
+    """Parse a 'LAT,LON' pair in degrees."""
+    try:
+        lat, lon = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError(f"Invalid coordinates '{value}', expected LAT,LON")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"Coordinates out of range: '{value}'")
+    return lat, lon
+
+
+def parse_route(value: str) -> List[Point]:
+    """Parse route waypoints given as 'LAT,LON;LAT,LON;...' or as '@FILE' with one 'LAT,LON' per line."""
+    if value.startswith(MANIFEST_PREFIX):
+        path = value[len(MANIFEST_PREFIX):]
+        try:
+            with open(path, 'r') as infile:
+                lines = [line.strip() for line in infile]
+        except FileNotFoundError as e:
+            raise ValueError(f"File not found: {e.filename}")
+        waypoints = [line for line in lines if line and not line.startswith("#")]
+    else:
+        waypoints = [waypoint for waypoint in value.split(";") if waypoint.strip()]
+    if not waypoints:
+        raise ValueError("A route needs at least one waypoint")
+    return [parse_point(waypoint) for waypoint in waypoints]
+
+
+class GridIndex:
+    """A uniform latitude/longitude grid over a list of points.
+
+    Queries visit only the cells that can hold points within the search radius,
+    wrapping around the antimeridian and covering every longitude near the poles.
+    Query results hold point indexes into the list the index was built from.
+    """
+
+    def __init__(self, points: Sequence[Point], cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.points = list(points)
+        self.cell_degrees = cell_degrees
+        self.rows = math.ceil(180 / cell_degrees)
+        self.columns = math.ceil(360 / cell_degrees)
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for index, (lat, lon) in enumerate(self.points):
+            self.cells.setdefault((self._row(lat), self._column(lon)), []).append(index)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _row(self, lat: float) -> int:
+        return min(self.rows - 1, max(0, int((lat + 90) // self.cell_degrees)))
+
+    def _column(self, lon: float) -> int:
+        return int((lon + 180) // self.cell_degrees) % self.columns
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> Iterator[int]:
+        """Yield the indexes of the points in every cell that may lie within radius_km of (lat, lon)."""
+        angle = radius_km / EARTH_RADIUS_KM
+        if angle >= math.pi:
+            for indexes in self.cells.values():
+                yield from indexes
+            return
+        dlat = math.degrees(angle)
+        rows = range(self._row(max(-90.0, lat - dlat)), self._row(min(90.0, lat + dlat)) + 1)
+        cos_lat = math.cos(math.radians(lat))
+        if lat - dlat <= -90 or lat + dlat >= 90 or math.sin(angle) >= cos_lat:
+            # The search area contains a pole, so it spans every longitude
+            columns = range(self.columns)
+        else:
+            dlon = math.degrees(math.asin(math.sin(angle) / cos_lat))
+            first = int((lon - dlon + 180) // self.cell_degrees)
+            last = int((lon + dlon + 180) // self.cell_degrees)
+            columns = range(self.columns) if last - first + 1 >= self.columns else \
+                [column % self.columns for column in range(first, last + 1)]
+        cells = self.cells
+        for row in rows:
+            for column in columns:
+                indexes = cells.get((row, column))
+                if indexes:
+                    yield from indexes
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[float, int]]:
+        """Return (distance km, index) of the points within radius_km of (lat, lon), nearest first."""
+        points = self.points
+        hits = []
+        for index in self._candidates(lat, lon, radius_km):
+            distance = haversine_km(lat, lon, *points[index])
+            if distance <= radius_km:
+                hits.append((distance, index))
+        hits.sort()
+        return hits
+
+    def nearest(self, lat: float, lon: float, count: int,
+                max_km: Optional[float] = None) -> List[Tuple[float, int]]:
+        """Return (distance km, index) of the count points nearest to (lat, lon), optionally within max_km."""
+        radius = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            if max_km is not None:
+                radius = min(radius, max_km)
+            hits = self.within(lat, lon, radius)
+            if len(hits) >= count or radius >= HALF_CIRCUMFERENCE_KM or radius == max_km:
+                return hits[:count]
+            radius *= 2
+
+    def near_route(self, route: Sequence[Point], count: Optional[int] = None,
+                   max_km: Optional[float] = None) -> List[Tuple[float, float, int]]:
+        """Return (km along the route, distance km, index) of points near a route, in route order.
+
+        With count, the count points nearest to the route are returned; with max_km,
+        only points within max_km of the route. At least one of them must be given.
+        """
+        if count is None and max_km is None:
+            raise ValueError("A route query needs a count, a maximum distance, or both")
+        segments = _route_segments(route)
+        corridor = max_km if count is None else self.cell_degrees * KM_PER_DEGREE
+        while True:
+            if max_km is not None:
+                corridor = min(corridor, max_km)
+            hits = self._route_corridor(segments, corridor)
+            if count is None or len(hits) >= count or corridor >= HALF_CIRCUMFERENCE_KM or corridor == max_km:
+                break
+            corridor *= 2
+        if count is not None:
+            hits = sorted(hits, key=lambda hit: (hit[1], hit[2]))[:count]
+        return sorted(hits)
+
+    def _route_corridor(self, segments: List[tuple], corridor_km: float) -> List[Tuple[float, float, int]]:
+        """Return (km along the route, distance km, index) of the points within corridor_km of the route."""
+        candidates = set()
+        for start, end, offset, length in segments:
+            # Every point of the segment is within half a step of a sample, so a point within
+            # corridor_km of the segment is within 1.5 * corridor_km of a sample
+            steps = max(1, math.ceil(length / corridor_km))
+            for step in range(steps + 1):
+                lat, lon = _interpolate(start, end, step / steps)
+                candidates.update(self._candidates(lat, lon, 1.5 * corridor_km))
+        hits = []
+        for index in candidates:
+            along, distance = _route_position(segments, self.points[index])
+            if distance <= corridor_km:
+                hits.append((along, distance, index))
+        return hits
+
+
+def _interpolate(start: Point, end: Point, fraction: float) -> Point:
+    """Return the point at fraction of the way from start to end, crossing the antimeridian if shorter."""
+    dlon = (end[1] - start[1] + 180) % 360 - 180
+    lon = (start[1] + fraction * dlon + 180) % 360 - 180
+    return start[0] + fraction * (end[0] - start[0]), lon
+
+
+def _route_segments(route: Sequence[Point]) -> List[tuple]:
+    """Split a route into (start, end, km from the route start, length km) segments."""
+    if len(route) == 1:
+        return [(route[0], route[0], 0.0, 0.0)]
+    segments = []
+    offset = 0.0
+    for start, end in zip(route, route[1:]):
+        length = haversine_km(*start, *end)
+        segments.append((start, end, offset, length))
+        offset += length
+    return segments
+
+
+def _route_position(segments: List[tuple], point: Point) -> Tuple[float, float]:
+    """Return (km along the route, distance km) of the route position nearest to point.
+
+    Each segment is projected onto a plane around its start, which is accurate
+    for the segment lengths of a travel route.
+    """
+    best = None
+    for start, end, offset, length in segments:
+        scale = KM_PER_DEGREE * math.cos(math.radians((start[0] + end[0]) / 2))
+        ex = ((end[1] - start[1] + 180) % 360 - 180) * scale
+        ey = (end[0] - start[0]) * KM_PER_DEGREE
+        px = ((point[1] - start[1] + 180) % 360 - 180) * scale
+        py = (point[0] - start[0]) * KM_PER_DEGREE
+        squared = ex * ex + ey * ey
+        fraction = min(1.0, max(0.0, (px * ex + py * ey) / squared)) if squared else 0.0
+        distance = haversine_km(*point, *_interpolate(start, end, fraction))
+        if best is None or distance < best[1]:
+            best = (offset + fraction * length, distance)
+    return best
+
+
+def channel_location(header_index: Dict[str, int], cells: list) -> Optional[Point]:
+    """Return the location of a row, or None if it has none or 'Use Location' is not 'Yes'."""
+    use_location = header_index.get(USE_LOCATION)
+    if use_location is not None and (len(cells) <= use_location or cells[use_location] != YES):
+        return None
+    try:
+        lat = float(cells[header_index[LATITUDE]])
+        lon = float(cells[header_index[LONGITUDE]])
+    except (IndexError, ValueError):
+        return None
+    if -90 <= lat <= 90 and -180 <= lon <= 180:
+        return lat, lon
+    return None
+
+
+class ChannelSelection:
+    """Select the input rows near a point or a route, for the select argument of transform_channels.
+
+    With near, rows within radius_km of the point are selected, or the nearest
+    count rows (within radius_km if given), nearest first. With route, rows
+    within radius_km of the route or the count rows nearest to it are selected,
+    in the order they are passed along the route. Rows without a location are
+    never selected.
+    """
+
+    def __init__(self, near: Optional[Point] = None, route: Optional[Sequence[Point]] = None,
+                 radius_km: Optional[float] = None, count: Optional[int] = None,
+                 cell_degrees: float = DEFAULT_CELL_DEGREES):
+        if (near is None) == (route is None):
+            raise ValueError("Select channels either near a point or along a route")
+        if radius_km is None and count is None:
+            raise ValueError("A channel selection needs a radius, a number of channels, or both")
+        self.near = near
+        self.route = route
+        self.radius_km = radius_km
+        self.count = count
+        self.cell_degrees = cell_degrees
+
+    def __call__(self, header: List[str], rows: Iterable[list]) -> List[list]:
+        header_index = {column: position for position, column in enumerate(header)}
+        if LATITUDE not in header_index or LONGITUDE not in header_index:
+            raise ValueError(f"Selecting channels by location needs the '{LATITUDE}' and '{LONGITUDE}' columns")
+        located = []
+        points = []
+        for cells in rows:
+            location = channel_location(header_index, cells) if cells else None
+            if location is not None:
+                located.append(cells)
+                points.append(location)
+        index = GridIndex(points, self.cell_degrees)
+        return [located[hit[-1]] for hit in self.query(index)]
+
+    def query(self, index: GridIndex) -> list:
+        """Run the selection on an index; each result ends with the point index."""
+        if self.route is not None:
+            return index.near_route(self.route, self.count, self.radius_km)
+        lat, lon = self.near
+        if self.count is None:
+            return index.within(lat, lon, self.radius_km)
+        return index.nearest(lat, lon, self.count, self.radius_km)
+
+
+def _option_value(options: dict, name: str, parse):
+    """Parse the value of a --name=value option, or return None if it is not given."""
+    if name not in options:
+        return None
+    if options[name] is True:
+        raise ValueError(f"--{name} requires a value: --{name}=VALUE")
+    return parse(options[name])
+
+
+def selection_from_options(options: dict) -> ChannelSelection:
+    """Build a ChannelSelection from the --near, --route, --radius and --nearest command line options."""
+    radius_km = _option_value(options, "radius", float)
+    count = _option_value(options, "nearest", int)
+    if (radius_km is not None and radius_km <= 0) or (count is not None and count <= 0):
+        raise ValueError("--radius and --nearest must be greater than zero")
+    return ChannelSelection(_option_value(options, "near", parse_point), _option_value(options, "route", parse_route),
+                            radius_km, count)
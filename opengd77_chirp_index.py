@@ -0,0 +1,147 @@
+"""Row-offset index of a CSV codeplug, for converting a range of its rows without reading the rest.
+
+The index is a JSON sidecar next to the input holding the byte offset of every
+INDEX_INTERVAL-th row, found with the record boundary scan of parallel mode, so
+quoted fields with embedded newlines are handled. Rows are counted as a
+conversion numbers them: blank lines are not rows. The sidecar records the size
+and modification time of the file it indexes; an index that no longer matches
+is rebuilt. Reading a range of rows seeks to the offset of the nearest indexed
+row before it and scans at most INDEX_INTERVAL rows to the first one, so the
+cost depends on the size of the range, not of the file.
+"""
+import io
+import json
+import locale
+import logging
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, TextIO, Tuple
+
+from opengd77_chirp_csv_coverter import STDIO_PATH, input_compression, open_output_file
+from opengd77_chirp_parallel import BLANK_RECORDS, iter_record_boundaries
+
+INDEX_SUFFIX = '.index.json'
+INDEX_VERSION = 1
+# Number of rows between two indexed offsets
+INDEX_INTERVAL = 1000
+RANGE_SEPARATOR = "-"
+
+RowRange = Tuple[int, int]
+
+
+def index_file_for(input_file: str) -> str:
+    """Return the path of the index sidecar of an input file."""
+    return input_file + INDEX_SUFFIX
+
+
+def parse_row_range(value: str) -> RowRange:
+    """Parse a '--range' value of the form START-END: the first and last row to convert, counting from 1."""
+    start, separator, end = value.partition(RANGE_SEPARATOR)
+    try:
+        row_range = int(start), int(end)
+    except ValueError:
+        raise ValueError(f"Invalid range '{value}'; expected START-END, such as 50000-50200")
+    if not separator or row_range[0] < 1 or row_range[1] < row_range[0]:
+        raise ValueError(f"Invalid range '{value}'; expected START-END with 1 <= START <= END")
+    return row_range
+
+
+def _file_signature(path: str) -> Dict[str, int]:
+    status = os.stat(path)
+    return {"size": status.st_size, "mtime_ns": status.st_mtime_ns}
+
+
+def _iter_rows(data, start: int) -> Iterator[Tuple[int, int]]:
+    """Yield the (start, end) byte offsets of the non-blank records in data from start on."""
+    for end in iter_record_boundaries(data, start, 0):
+        if data[start:end] not in BLANK_RECORDS:
+            yield start, end
+        start = end
+    # The last record need not end in a newline
+    if data[start:] not in (b"", b"\r"):
+        yield start, len(data)
+
+
+def build_index(input_file: str, interval: Optional[int] = None) -> Dict[str, Any]:
+    """Scan an input file and return its index, with an offset every interval (default INDEX_INTERVAL) rows."""
+    interval = interval or INDEX_INTERVAL
+    signature = _file_signature(input_file)
+    offsets = []
+    rows = 0
+    with open(input_file, 'rb') as infile:
+        if signature["size"] == 0:
+            return {"version": INDEX_VERSION, **signature, "interval": interval, "header_end": 0, "rows": 0,
+                    "offsets": []}
+        with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            header_end = next(iter_record_boundaries(data, 0, 0), len(data))
+            for rows, (start, _) in enumerate(_iter_rows(data, header_end), 1):
+                if (rows - 1) % interval == 0:
+                    offsets.append(start)
+    return {"version": INDEX_VERSION, **signature, "interval": interval, "header_end": header_end, "rows": rows,
+            "offsets": offsets}
+
+
+def save_index(input_file: str, index: Dict[str, Any]):
+    """Write the index sidecar of an input file."""
+    with open_output_file(index_file_for(input_file)) as outfile:
+        outfile.write(json.dumps(index))
+
+
+def load_index(input_file: str) -> Optional[Dict[str, Any]]:
+    """Return the index of an input file, or None if it has none or the file changed since it was indexed."""
+    try:
+        with open(index_file_for(input_file), 'r') as infile:
+            index = json.load(infile)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        logging.warning(f"Ignoring invalid index {index_file_for(input_file)}")
+        return None
+    signature = _file_signature(input_file)
+    if index.get("version") != INDEX_VERSION or any(index.get(key) != value for key, value in signature.items()):
+        logging.info(f"{input_file} changed since it was indexed")
+        return None
+    return index
+
+
+def row_index(input_file: str) -> Dict[str, Any]:
+    """Return the up to date index of an input file, building and saving it if needed."""
+    index = load_index(input_file)
+    if index is None:
+        index = build_index(input_file)
+        logging.info(f"Indexed {index['rows']} rows of {input_file}")
+        try:
+            save_index(input_file, index)
+        except ValueError as e:
+            logging.warning(f"Could not save the index of {input_file}: {e}")
+    return index
+
+
+@contextmanager
+def open_row_range(input_file: str, row_range: RowRange) -> Iterator[TextIO]:
+    """Yield a CSV stream of the header and the rows in row_range; rows past the end of the file are left out."""
+    if input_file == STDIO_PATH or input_compression(input_file):
+        raise ValueError("--range needs an uncompressed input file; stdin and compressed files cannot be indexed")
+    try:
+        index = row_index(input_file)
+    except FileNotFoundError as e:
+        raise ValueError(f"File not found: {e.filename}")
+    first, last = row_range
+    skipped = first - 1
+    encoding = locale.getpreferredencoding(False)
+    with open(input_file, 'rb') as infile:
+        if skipped >= index["rows"]:
+            logging.warning(f"{input_file} has only {index['rows']} rows")
+            yield io.StringIO(infile.read(index["header_end"]).decode(encoding), newline='')
+            return
+        with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            checkpoint = skipped // index["interval"]
+            rows = _iter_rows(data, index["offsets"][checkpoint])
+            for _ in range(skipped - checkpoint * index["interval"]):
+                next(rows)
+            start, end = next(rows)
+            for _, (_, end) in zip(range(last - first), rows):
+                pass
+            text = (data[:index["header_end"]] + data[start:end]).decode(encoding)
+    yield io.StringIO(text, newline='')
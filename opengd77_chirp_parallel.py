@@ -0,0 +1,172 @@
+"""Parallel conversion of a single large CSV file.
+
+The input is memory-mapped and split into byte ranges that end on record
+boundaries, taking quoted fields with embedded newlines into account. Worker
+processes first count the rows of every chunk from its record boundaries,
+without decoding it; a prefix sum over those counts
+gives each chunk its first channel number, so the chunks can then be transformed
+independently. The converted chunks are written to temporary files and joined
+in order, producing output identical to transform_channels.
+"""
+import csv
+import io
+import locale
+import logging
+import mmap
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from typing import Iterator, List, Optional
+
+from opengd77_chirp_csv_coverter import (ConversionStats, DEFAULT_ENGINE, STDIO_PATH, input_compression,
+                                         iter_transformed_cells, open_output_file, output_fieldnames,
+                                         transform_channels)
+
+MIN_CHUNK_BYTES = 1 << 20  # Smaller inputs are converted sequentially
+CHUNKS_PER_WORKER = 4  # More chunks than workers keeps every worker busy until the end
+QUOTE = ord('"')
+FIELD_SEPARATORS = b",\r\n"  # A quote only opens a quoted field directly after one of these
+# Records csv.reader reads as blank lines, which are not rows
+BLANK_RECORDS = (b"\n", b"\r\n")
+
+
+def iter_record_boundaries(data, start: int, min_gap: int) -> Iterator[int]:
+    """Yield offsets in data just after a record ending newline, at least min_gap bytes apart.
+
+    A newline inside a quoted field does not end a record. Quotes are tracked the way
+    csv.reader reads them: a quote opens a quoted field only at the start of a field,
+    and inside a quoted field a doubled quote is an escaped quote.
+    """
+    size = len(data)
+    quote = data.find(b'"', start)
+    quoted = False
+    search = start + min_gap
+    while search < size:
+        newline = data.find(b"\n", search)
+        if newline < 0:
+            return
+        # Replay the quotes before the newline to learn whether it is inside a quoted field
+        while 0 <= quote < newline:
+            if quoted:
+                if quote + 1 < size and data[quote + 1] == QUOTE:
+                    quote = data.find(b'"', quote + 2)
+                    continue
+                quoted = False
+            elif quote == 0 or data[quote - 1] in FIELD_SEPARATORS:
+                quoted = True
+            quote = data.find(b'"', quote + 1)
+        if quoted:
+            search = newline + 1
+            continue
+        yield newline + 1
+        search = newline + 1 + min_gap
+
+
+def split_chunks(data, start: int, chunk_bytes: int) -> List[tuple]:
+    """Split data[start:] into (start, end) byte ranges of about chunk_bytes that end on record boundaries."""
+    offsets = [start]
+    offsets.extend(offset for offset in iter_record_boundaries(data, start, chunk_bytes) if offset < len(data))
+    offsets.append(len(data))
+    return list(zip(offsets, offsets[1:]))
+
+
+def _read_chunk(input_file: str, start: int, end: int, encoding: str) -> io.StringIO:
+    """Return the text of a byte range of the input file, ready for csv.reader."""
+    with open(input_file, 'rb') as infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return io.StringIO(data[start:end].decode(encoding), newline='')
+
+
+def count_records(data, start: int, end: int) -> int:
+    """Count the non-blank records in data[start:end], a range starting and ending on record boundaries."""
+    count = 0
+    for boundary in iter_record_boundaries(data, start, 0):
+        if boundary > end:
+            break
+        # csv.DictReader skips blank lines too
+        if boundary - start > 2 or data[start:boundary] not in BLANK_RECORDS:
+            count += 1
+        start = boundary
+    # The last record need not end in a newline
+    if start < end and data[start:end] != b"\r":
+        count += 1
+    return count
+
+
+def _count_chunk_rows(input_file: str, start: int, end: int) -> int:
+    """Count the rows of a chunk without decoding it."""
+    with open(input_file, 'rb') as infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return count_records(data, start, end)
+
+
+def _transform_chunk(input_file: str, start: int, end: int, encoding: str, header: List[str], operation: str,
+                     start_channel: int, engine: str, part_file: str,
+                     collect_stats: bool) -> Optional[ConversionStats]:
+    """Transform one chunk, numbering its rows from start_channel, and write the rows to part_file."""
+    rows = csv.reader(_read_chunk(input_file, start, end, encoding))
+    stats = ConversionStats() if collect_stats else None
+    with open(part_file, 'w', newline='', encoding=encoding) as outfile:
+        writer = csv.writer(outfile)
+        if stats is None:
+            writer.writerows(iter_transformed_cells(header, rows, operation, start_channel, engine))
+        else:
+            rows = stats.timed_rows(rows)
+            stats.write_rows(writer, iter_transformed_cells(header, rows, operation, start_channel, engine, stats))
+    return stats
+
+
+def transform_channels_parallel(operation: str, input_file: str, output_file: str, start_channel: int,
+                                max_workers: Optional[int] = None, engine: str = DEFAULT_ENGINE,
+                                stats: Optional[ConversionStats] = None, chunk_bytes: Optional[int] = None,
+                                compress_level: Optional[int] = None):
+    """Transform a single CSV file using a process pool; the output matches transform_channels.
+
+    chunk_bytes sets the approximate chunk size; by default the input is split into
+    CHUNKS_PER_WORKER chunks per worker of at least MIN_CHUNK_BYTES. Inputs that fit in
+    one chunk, stdin and compressed inputs, which cannot be split at byte offsets,
+    are converted sequentially. Worker stats are merged into stats.
+    """
+    if input_file == STDIO_PATH or input_compression(input_file):
+        return transform_channels(operation, input_file, output_file, start_channel, engine, stats,
+                                  compress_level=compress_level)
+    workers = max_workers or os.cpu_count() or 1
+    size = os.path.getsize(input_file)
+    if chunk_bytes is None:
+        chunk_bytes = max(MIN_CHUNK_BYTES, size // (workers * CHUNKS_PER_WORKER))
+    if size <= chunk_bytes:
+        return transform_channels(operation, input_file, output_file, start_channel, engine, stats,
+                                  compress_level=compress_level)
+
+    started = time.perf_counter()
+    encoding = locale.getpreferredencoding(False)
+    with open(input_file, 'rb') as infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        header_end = next(iter_record_boundaries(data, 0, 0), size)
+        header = next(csv.reader(io.StringIO(data[:header_end].decode(encoding), newline='')), [])
+        chunks = split_chunks(data, header_end, chunk_bytes)
+
+    directory = os.path.dirname(os.path.abspath(output_file)) if output_file != STDIO_PATH else None
+    with ProcessPoolExecutor(max_workers=workers) as executor, \
+            tempfile.TemporaryDirectory(prefix=".chunks.", dir=directory) as parts_dir:
+        counts = [future.result() for future in [executor.submit(_count_chunk_rows, input_file, start, end)
+                                                 for start, end in chunks]]
+        first_channels = [start_channel + offset for offset in accumulate([0] + counts[:-1])]
+        logging.info(f"Converting {sum(counts)} rows in {len(chunks)} chunks using {workers} workers")
+
+        part_files = [os.path.join(parts_dir, f"{index}.csv") for index in range(len(chunks))]
+        futures = [executor.submit(_transform_chunk, input_file, start, end, encoding, header, operation,
+                                   first_channel, engine, part_file, stats is not None)
+                   for (start, end), first_channel, part_file in zip(chunks, first_channels, part_files)]
+        chunk_stats = [future.result() for future in futures]
+
+        with open_output_file(output_file, compress_level) as outfile:
+            csv.writer(outfile).writerow(output_fieldnames(operation))
+            for part_file in part_files:
+                with open(part_file, 'r', newline='', encoding=encoding) as part:
+                    for block in iter(lambda: part.read(MIN_CHUNK_BYTES), ""):
+                        outfile.write(block)
+
+    if stats is not None:
+        for worker_stats in chunk_stats:
+            stats.merge(worker_stats)
+        stats.total_seconds += time.perf_counter() - started
@@ -0,0 +1,257 @@
+"""Long-running converter service.
+
+Serves transform_stream over HTTP on localhost or on a Unix domain socket, so
+callers converting many small files pay for interpreter start-up and imports
+once. Requests are handled by a fixed pool of worker threads fed by a bounded
+queue; when the queue is full, new requests get 503 Service Unavailable.
+
+    POST /convert/gd77?start_channel=0   CSV body in, converted CSV out
+    POST /convert/chirp?start_channel=0
+    GET  /health                         liveness, as JSON
+    GET  /metrics                        request, row and timing counters, as JSON
+
+Use opengd77_chirp_client.py to send files to the service.
+"""
+import http.client
+import io
+import json
+import logging
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from opengd77_chirp_client import (CONVERT_PATH, DEFAULT_SERVICE_HOST, DEFAULT_SERVICE_PORT, HEALTH_PATH,
+                                   METRICS_PATH)
+from opengd77_chirp_csv_coverter import (CONVERSION_OPERATIONS, ConversionStats, DEFAULT_ENGINE, DEFAULT_START_CHANNEL,
+                                         ENGINES, __version__, split_arguments, transform_stream)
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 64
+MAX_BODY_BYTES = 64 * 1024 * 1024
+SERVICE_OPTIONS = ("socket", "port", "jobs", "queue")
+BUSY_RESPONSE = (b"HTTP/1.0 503 Service Unavailable\r\nContent-Type: text/plain\r\nContent-Length: 5\r\n"
+                 b"Connection: close\r\n\r\nBusy\n")
+
+
+class ServiceMetrics:
+    """Counters reported by the /metrics endpoint, shared by the worker threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.conversions = 0
+        self.failed = 0
+        self.rejected = 0
+        self.rows = 0
+        self.conversion_seconds = 0.0
+
+    def record(self, stats: Optional[ConversionStats] = None, failed: bool = False):
+        """Count a handled request and, for conversions, its rows and time."""
+        with self.lock:
+            self.requests += 1
+            self.failed += failed
+            if stats is not None:
+                self.conversions += 1
+                self.rows += stats.rows
+                self.conversion_seconds += stats.total_seconds
+
+    def record_rejected(self):
+        with self.lock:
+            self.rejected += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "uptime_seconds": round(time.time() - self.started, 3),
+                "requests": self.requests,
+                "conversions": self.conversions,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "rows": self.rows,
+                "conversion_seconds": round(self.conversion_seconds, 6),
+            }
+
+
+class PooledServerMixIn:
+    """Handle requests on a fixed pool of worker threads fed by a bounded queue.
+
+    Requests arriving while the queue is full are answered with 503 straight away.
+    """
+
+    def start_workers(self, workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.workers = workers
+        self.pending = queue.Queue(maxsize=queue_size)
+        self.metrics = ServiceMetrics()
+        self.worker_threads = [threading.Thread(target=self.process_pending, daemon=True) for _ in range(workers)]
+        for thread in self.worker_threads:
+            thread.start()
+
+    def process_request(self, request, client_address):
+        try:
+            self.pending.put_nowait((request, client_address))
+        except queue.Full:
+            self.metrics.record_rejected()
+            try:
+                request.sendall(BUSY_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+
+    def process_pending(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self.worker_threads:
+            self.pending.put(None)
+        for thread in self.worker_threads:
+            thread.join()
+
+
+class ConverterHTTPServer(PooledServerMixIn, HTTPServer):
+    """The converter service on a localhost TCP port."""
+
+
+class UnixConverterHTTPServer(PooledServerMixIn, socketserver.UnixStreamServer):
+    """The converter service on a Unix domain socket."""
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+class ConverterRequestHandler(BaseHTTPRequestHandler):
+    server_version = f"OpenGD77ChirpConverter/{__version__}"
+
+    def address_string(self):
+        # Unix domain socket clients have no address
+        return self.client_address[0] if self.client_address else "local"
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} - {format % args}")
+
+    def send_body(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: int, document: Dict[str, Any]):
+        self.send_body(status, json.dumps(document).encode("utf-8"), "application/json")
+
+    def send_text(self, status: int, text: str):
+        self.send_body(status, text.encode("utf-8") + b"\n", "text/plain; charset=utf-8")
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        metrics = self.server.metrics
+        if path == HEALTH_PATH:
+            self.send_json(http.client.OK, {"status": "ok", "version": __version__})
+        elif path == METRICS_PATH:
+            self.send_json(http.client.OK, {**metrics.as_dict(), "workers": self.server.workers,
+                                            "queued": self.server.pending.qsize(),
+                                            "queue_size": self.server.pending.maxsize})
+        else:
+            self.send_text(http.client.NOT_FOUND, f"Unknown path '{path}'")
+            metrics.record(failed=True)
+            return
+        metrics.record()
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        metrics = self.server.metrics
+        operation = url.path[len(CONVERT_PATH):] if url.path.startswith(CONVERT_PATH) else None
+        if operation not in CONVERSION_OPERATIONS:
+            allowed = ', '.join(CONVERT_PATH + name for name in CONVERSION_OPERATIONS)
+            self.send_text(http.client.NOT_FOUND, f"Unknown operation path '{url.path}'. Allowed operations are: "
+                                                  f"{allowed}.")
+            metrics.record(failed=True)
+            return
+        length = int(self.headers.get("Content-Length", -1))
+        if length < 0:
+            self.send_text(http.client.LENGTH_REQUIRED, "Content-Length required")
+            metrics.record(failed=True)
+            return
+        if length > MAX_BODY_BYTES:
+            self.send_text(http.client.REQUEST_ENTITY_TOO_LARGE, f"Request body exceeds {MAX_BODY_BYTES} bytes")
+            metrics.record(failed=True)
+            return
+
+        body = self.rfile.read(length)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        stats = ConversionStats()
+        try:
+            start_channel = int(query.get("start_channel", DEFAULT_START_CHANNEL))
+            engine = query.get("engine", DEFAULT_ENGINE)
+            if engine not in ENGINES:
+                raise ValueError(f"Invalid engine '{engine}'. Allowed engines are: {', '.join(ENGINES)}.")
+            outfile = io.StringIO(newline='')
+            transform_stream(operation, io.StringIO(body.decode("utf-8"), newline=''), outfile, start_channel,
+                             engine, stats)
+        except (KeyError, ValueError) as e:
+            self.send_text(http.client.BAD_REQUEST, f"{type(e).__name__}: {e}")
+            metrics.record(stats, failed=True)
+            return
+        except Exception as e:
+            logging.exception(f"Conversion failed: {e}")
+            self.send_text(http.client.INTERNAL_SERVER_ERROR, f"{type(e).__name__}: {e}")
+            metrics.record(stats, failed=True)
+            return
+        self.send_body(http.client.OK, outfile.getvalue().encode("utf-8"), "text/csv; charset=utf-8")
+        metrics.record(stats)
+
+
+def create_server(socket_path: Optional[str] = None, port: int = DEFAULT_SERVICE_PORT,
+                  workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE):
+    """Create the service on socket_path, or on localhost:port if no socket is given, and start its workers."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixConverterHTTPServer(socket_path, ConverterRequestHandler)
+    else:
+        server = ConverterHTTPServer((DEFAULT_SERVICE_HOST, port), ConverterRequestHandler)
+    server.start_workers(workers, queue_size)
+    return server
+
+
+def main():
+    args, options = split_arguments(sys.argv[1:])
+    unknown_options = sorted(set(options) - set(SERVICE_OPTIONS))
+    if args or unknown_options:
+        print("Usage: python opengd77_chirp_service.py [--socket=PATH | --port=N] [--jobs=N] [--queue=N]")
+        sys.exit(1)
+
+    server = create_server(options.get("socket"), int(options.get("port", DEFAULT_SERVICE_PORT)),
+                           int(options.get("jobs", DEFAULT_WORKERS)), int(options.get("queue", DEFAULT_QUEUE_SIZE)))
+    address = options.get("socket") or f"http://{DEFAULT_SERVICE_HOST}:{server.server_address[1]}"
+    logging.info(f"Converter service listening on {address} with {server.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logging.info("Converter service stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Split a conversion into capacity-bounded codeplug files and zones, in a single pass.
+
+Channels are grouped by a key: their band, their channel type (analogue or
+digital) or a prefix of their name. Each group is written to its own files,
+GROUP-1.csv, GROUP-2.csv and so on, starting a new file whenever one holds
+shard_channels channels, and each file is numbered from the start channel as a
+conversion of its own. Within a file the channels are listed in zones of at most
+zone_channels channels, written next to it as GROUP-N.zones.csv in the OpenGD77
+zone format.
+
+Files are opened when a channel is written to them, and at most MAX_OPEN_FILES
+are kept open: writing to another file closes the least recently used one,
+which is reopened for appending when needed. Only the zone being filled is kept
+in memory per group, so memory does not grow with the number of channels.
+Files are written to a temporary directory and moved into the output directory
+once the conversion succeeds.
+"""
+import csv
+import logging
+import os
+import re
+import shutil
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, TextIO
+
+from opengd77_chirp_csv_coverter import (Channel, compile_channel_formatter, compile_channel_reader,
+                                         first_channel_number, open_csv_file, output_fieldnames)
+from opengd77_chirp_filter import band_name
+
+SHARD_KEYS = ("band", "mode", "prefix")
+KEY_SEPARATOR = ":"
+DEFAULT_PREFIX_LENGTH = 3
+# OpenGD77 codeplug capacity: channels, zones and channels per zone
+MAX_CHANNELS = 1024
+MAX_ZONES = 68
+MAX_ZONE_CHANNELS = 80
+ZONE_COLUMNS = ("Zone Name", *(f"Channel{number}" for number in range(1, MAX_ZONE_CHANNELS + 1)))
+ZONES_SUFFIX = ".zones.csv"
+# Number of shard files kept open at once
+MAX_OPEN_FILES = 32
+# Group of channels whose name has no prefix
+NO_PREFIX = "none"
+UNSAFE_FILE_CHARACTERS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def compile_shard_key(key: str) -> Callable[[Channel], str]:
+    """Parse 'band', 'mode' or 'prefix[:LENGTH]' into a function returning the group of a channel."""
+    name, _, length = key.partition(KEY_SEPARATOR)
+    if name not in SHARD_KEYS or (length and name != "prefix"):
+        raise ValueError(f"Invalid shard key '{key}'. Allowed keys are: band, mode, prefix or prefix:LENGTH.")
+    if name == "band":
+        return lambda channel: band_name(channel.rx_hz)
+    if name == "mode":
+        return lambda channel: channel.channel_type
+    if length and not (length.isdecimal() and int(length) > 0):
+        raise ValueError(f"Invalid prefix length '{length}'")
+    length = int(length) if length else DEFAULT_PREFIX_LENGTH
+    return lambda channel: channel.name[:length].strip() or NO_PREFIX
+
+
+def check_capacity(shard_channels: int, zone_channels: int):
+    """Raise ValueError unless files of shard_channels channels in zones of zone_channels fit an OpenGD77 radio."""
+    if not 1 <= shard_channels <= MAX_CHANNELS:
+        raise ValueError(f"Shard files can hold 1 to {MAX_CHANNELS} channels")
+    if not 1 <= zone_channels <= MAX_ZONE_CHANNELS:
+        raise ValueError(f"Zones can hold 1 to {MAX_ZONE_CHANNELS} channels")
+    if -(-shard_channels // zone_channels) > MAX_ZONES:
+        raise ValueError(f"{shard_channels} channels in zones of {zone_channels} need more than {MAX_ZONES} zones")
+
+
+class ShardFiles:
+    """CSV writers for the shard and zone files, keeping at most MAX_OPEN_FILES files open."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.open_files: "OrderedDict[str, tuple]" = OrderedDict()
+        self.created = set()
+
+    def writer(self, name: str, header) -> csv.writer:
+        """Return the writer of a file, opening it, and writing its header if it is new."""
+        entry = self.open_files.get(name)
+        if entry is not None:
+            self.open_files.move_to_end(name)
+            return entry[1]
+        if len(self.open_files) >= MAX_OPEN_FILES:
+            _, (outfile, _) = self.open_files.popitem(last=False)
+            outfile.close()
+        outfile: TextIO = open(os.path.join(self.directory, name), 'a' if name in self.created else 'w', newline='')
+        writer = csv.writer(outfile)
+        if name not in self.created:
+            writer.writerow(header)
+            self.created.add(name)
+        self.open_files[name] = outfile, writer
+        return writer
+
+    def close(self):
+        for outfile, _ in self.open_files.values():
+            outfile.close()
+        self.open_files.clear()
+
+
+class Shard:
+    """The files of one group of channels: the one being filled and the zone being filled in it."""
+
+    def __init__(self, group: str, stem: str):
+        self.group = group
+        self.stem = stem
+        self.part = 0
+        self.channels = 0
+        self.zones = 0
+        self.zone: List[str] = []
+
+    @property
+    def name(self) -> str:
+        return f"{self.stem}-{self.part}.csv"
+
+    def write_zone(self, files: ShardFiles):
+        """Write the zone being filled to the zone listing of the current file."""
+        if self.zone:
+            self.zones += 1
+            files.writer(f"{self.stem}-{self.part}{ZONES_SUFFIX}", ZONE_COLUMNS).writerow(
+                [f"{self.group} {self.zones}", *self.zone])
+            self.zone = []
+
+
+def transform_sharded(operation: str, input_file: str, output_dir: str, start_channel: int, key: str,
+                      shard_channels: int = MAX_CHANNELS, zone_channels: int = MAX_ZONE_CHANNELS, select=None,
+                      where: Optional[str] = None) -> Dict[str, int]:
+    """Convert the input of the operation into shard files of each group in output_dir.
+
+    key is 'band', 'mode' or 'prefix[:LENGTH]'. select and where pick the
+    converted rows as in transform_channels. Returns the number of channels
+    written to each shard file, by file name.
+    """
+    group_of = compile_shard_key(key)
+    check_capacity(shard_channels, zone_channels)
+    os.makedirs(output_dir, exist_ok=True)
+    first_channel = first_channel_number(operation, start_channel)
+    format_channel = compile_channel_formatter(operation)
+    fieldnames = output_fieldnames(operation)
+    shards: Dict[str, Shard] = {}
+    stems = set()
+    counts: Dict[str, int] = {}
+
+    staging = tempfile.mkdtemp(prefix=".shards.", dir=output_dir)
+    files = ShardFiles(staging)
+    try:
+        with open_csv_file(input_file, 'r') as infile:
+            reader = csv.reader(infile)
+            header = next(reader, [])
+            rows = reader if select is None else select(header, reader)
+            try:
+                read_channel = compile_channel_reader(operation, header)
+            except KeyError as e:
+                raise ValueError(f"Missing column {e} in the input")
+            matches = None
+            if where:
+                from opengd77_chirp_filter import compile_row_filter
+                matches = compile_row_filter(where, operation, header)
+
+            # The header is line 1
+            for line_number, cells in enumerate(rows, 2):
+                if not cells or (matches is not None and not matches(cells)):
+                    continue
+                try:
+                    channel = read_channel(cells)
+                except (IndexError, KeyError, ValueError) as e:
+                    logging.error(f"Invalid value in row: {cells}")
+                    raise ValueError(f"Line {line_number}: {type(e).__name__}: {e}")
+                group = group_of(channel)
+                shard = shards.get(group)
+                if shard is None:
+                    shard = shards[group] = Shard(group, _unique_stem(group, stems))
+                if shard.channels == shard_channels:
+                    # A full file ends with its last zone; zones are numbered on across the files of a group
+                    shard.write_zone(files)
+                    shard.channels = 0
+                if shard.channels == 0:
+                    shard.part += 1
+                files.writer(shard.name, fieldnames).writerow(format_channel(channel, first_channel + shard.channels))
+                shard.channels += 1
+                counts[shard.name] = shard.channels
+                shard.zone.append(channel.name)
+                if len(shard.zone) == zone_channels:
+                    shard.write_zone(files)
+        for shard in shards.values():
+            shard.write_zone(files)
+        files.close()
+        for name in files.created:
+            os.replace(os.path.join(staging, name), os.path.join(output_dir, name))
+    finally:
+        files.close()
+        shutil.rmtree(staging, ignore_errors=True)
+    logging.info(f"Wrote {sum(counts.values())} channels in {len(shards)} groups to {len(counts)} files "
+                 f"in {output_dir}")
+    return counts
+
+
+def _unique_stem(group: str, stems: set) -> str:
+    """Return a file name stem for a group that no other group uses."""
+    stem = UNSAFE_FILE_CHARACTERS.sub("_", group).strip("._") or NO_PREFIX
+    candidate = stem
+    number = 1
+    while candidate.lower() in stems:
+        number += 1
+        candidate = f"{stem}_{number}"
+    stems.add(candidate.lower())
+    return candidate
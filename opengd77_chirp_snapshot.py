@@ -0,0 +1,234 @@
+"""Save parsed channels as a binary snapshot and convert from it without parsing CSV.
+
+A snapshot holds the Channel values of a codeplug, in either format, as it was
+parsed by the conversions. The file starts with a fixed header, followed by one
+fixed-width little-endian record per channel and a string table:
+
+    header   magic, version, record size, record count, string count
+    records  RX Hz, TX Hz (int64), skip flag, and the string table index (uint32)
+             of the name, mode, RX and TX tone, power and DMR details
+    strings  string count + 1 uint32 offsets into the UTF-8 text that follows
+
+Every distinct string is stored once. Snapshot memory-maps the file, so opening
+one takes constant time whatever its size, and record(index) unpacks a single
+record straight from the mapping. Converting a snapshot to OpenGD77 or CHIRP
+formats the channels as the conversions do, so the output matches converting
+the original codeplug.
+"""
+import csv
+import logging
+import mmap
+import struct
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional
+
+from opengd77_chirp_csv_coverter import (SNAPSHOT_MAGIC, STDIO_PATH, Channel, compile_channel_formatter,
+                                         first_channel_number, open_output_file, output_fieldnames, parse_gd77_tone)
+from opengd77_chirp_diff import open_codeplug
+
+SNAPSHOT_VERSION = 1
+# magic, version, record size, record count, string count
+HEADER = struct.Struct("<8sHHII")
+# rx_hz, tx_hz, name, mode, rx_tone, tx_tone, power, dmr_id, tg_list, colour_code, timeslot, contact, skip
+RECORD = struct.Struct("<qq10IB3x")
+STRING_OFFSET = struct.Struct("<I")
+# String table indexes and offsets are uint32
+MAX_STRING_INDEX = (1 << 32) - 1
+# Number of records unpacked at a time when iterating over a snapshot
+ITER_RECORDS = 4096
+
+
+class SnapshotRecord(NamedTuple):
+    """A snapshot record as stored: frequencies, string table indexes and the skip flag."""
+    rx_hz: int
+    tx_hz: int
+    name: int
+    mode: int
+    rx_tone: int
+    tx_tone: int
+    power: int
+    dmr_id: int
+    tg_list: int
+    colour_code: int
+    timeslot: int
+    contact: int
+    skip: int
+
+
+class _ToneTable(dict):
+    """Maps string table indexes to parsed tones, parsing each tone string on first use."""
+
+    def __init__(self, strings: List[str]):
+        super().__init__()
+        self.strings = strings
+
+    def __missing__(self, index: int):
+        tone = self[index] = parse_gd77_tone(self.strings[index])
+        return tone
+
+
+class StringTable:
+    """Assigns each distinct string an index, in order of first use."""
+
+    def __init__(self):
+        self.indexes: Dict[str, int] = {"": 0}
+
+    def index(self, value: str) -> int:
+        index = self.indexes.get(value)
+        if index is None:
+            index = self.indexes[value] = len(self.indexes)
+        return index
+
+    def write(self, outfile: BinaryIO):
+        """Write the offsets and the text of the strings."""
+        encoded = [value.encode() for value in self.indexes]
+        offset = 0
+        offsets = [0]
+        for text in encoded:
+            offset += len(text)
+            offsets.append(offset)
+        if offset > MAX_STRING_INDEX:
+            raise ValueError("The snapshot strings exceed 4 GiB")
+        outfile.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        outfile.write(b"".join(encoded))
+
+
+def write_snapshot(input_file: str, output_file: str) -> int:
+    """Save the channels of a codeplug, in either format, as a snapshot and return the number of channels."""
+    strings = StringTable()
+    index = strings.index
+    count = 0
+    # The header is rewritten once the records are counted, which stdout cannot seek back to
+    if output_file == STDIO_PATH:
+        raise ValueError("Snapshots cannot be written to stdout")
+    with open_codeplug(input_file) as codeplug, open_output_file(output_file, binary=True) as outfile:
+        outfile.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, RECORD.size, 0, 0))
+        pack = RECORD.pack
+        for row in codeplug:
+            channel = row.channel
+            try:
+                outfile.write(pack(channel.rx_hz, channel.tx_hz, index(channel.name), index(channel.mode),
+                                   index(channel.rx_tone.cell), index(channel.tx_tone.cell), index(channel.power),
+                                   index(channel.dmr_id), index(channel.tg_list), index(channel.colour_code),
+                                   index(channel.timeslot), index(channel.contact), channel.skip))
+            except struct.error:
+                raise ValueError(f"{input_file} line {row.line_number}: frequency out of range for a snapshot")
+            count += 1
+        if count > MAX_STRING_INDEX:
+            raise ValueError("The codeplug has too many channels for a snapshot")
+        strings.write(outfile)
+        outfile.seek(0)
+        outfile.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, RECORD.size, count, len(strings.indexes)))
+    logging.info(f"Saved {count} channels with {len(strings.indexes)} distinct strings to {output_file}")
+    return count
+
+
+class Snapshot:
+    """A memory-mapped snapshot file; iterate over it for its Channel values.
+
+    Raises ValueError if path is not a snapshot of a supported version.
+    Use as a context manager, or call close(), to unmap the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, 'rb') as infile:
+                self.mmap = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError as e:
+            raise ValueError(f"File not found: {e.filename}")
+        except ValueError:
+            # mmap refuses empty files
+            raise ValueError(f"{path} is not a snapshot")
+        try:
+            self._read_header()
+        except ValueError:
+            self.mmap.close()
+            raise
+        self.view = memoryview(self.mmap)
+        self._strings: Optional[List[str]] = None
+
+    def _read_header(self):
+        if len(self.mmap) < HEADER.size:
+            raise ValueError(f"{self.path} is not a snapshot")
+        magic, version, record_size, self.count, self.string_count = HEADER.unpack_from(self.mmap)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{self.path} is not a snapshot")
+        if version != SNAPSHOT_VERSION or record_size != RECORD.size:
+            raise ValueError(f"{self.path} is a version {version} snapshot; this converter reads version "
+                             f"{SNAPSHOT_VERSION}")
+        self.offsets_start = HEADER.size + self.count * RECORD.size
+        self.text_start = self.offsets_start + (self.string_count + 1) * STRING_OFFSET.size
+        if self.text_start > len(self.mmap) or self.text_start + STRING_OFFSET.unpack_from(
+                self.mmap, self.text_start - STRING_OFFSET.size)[0] > len(self.mmap):
+            raise ValueError(f"{self.path} is truncated")
+
+    def close(self):
+        self.view.release()
+        self.mmap.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def record(self, index: int) -> SnapshotRecord:
+        """Unpack the record of a channel straight from the mapped file."""
+        if not 0 <= index < self.count:
+            raise IndexError(f"Snapshot record {index} out of range")
+        return SnapshotRecord._make(RECORD.unpack_from(self.mmap, HEADER.size + index * RECORD.size))
+
+    def string(self, index: int) -> str:
+        """Decode one string of the string table."""
+        start, end = struct.unpack_from("<2I", self.mmap, self.offsets_start + index * STRING_OFFSET.size)
+        return str(self.view[self.text_start + start:self.text_start + end], "utf-8")
+
+    @property
+    def strings(self) -> List[str]:
+        """The whole string table, decoded on first use."""
+        if self._strings is None:
+            offsets = struct.unpack_from(f"<{self.string_count + 1}I", self.mmap, self.offsets_start)
+            text = self.view[self.text_start:]
+            self._strings = [str(text[start:end], "utf-8") for start, end in zip(offsets, offsets[1:])]
+        return self._strings
+
+    def channel(self, index: int) -> Channel:
+        """Return a channel, decoding only the strings it refers to."""
+        string = self.string
+        (rx_hz, tx_hz, name, mode, rx_tone, tx_tone, power, dmr_id, tg_list, colour_code, timeslot, contact,
+         skip) = self.record(index)
+        return Channel(string(name), rx_hz, tx_hz, string(mode), parse_gd77_tone(string(rx_tone)),
+                       parse_gd77_tone(string(tx_tone)), string(power), bool(skip), string(dmr_id),
+                       string(tg_list), string(colour_code), string(timeslot), string(contact))
+
+    def __iter__(self) -> Iterator[Channel]:
+        strings = self.strings
+        tones = _ToneTable(strings)
+        block_size = ITER_RECORDS * RECORD.size
+        # Records are unpacked from copies of blocks of the mapping, so no view of it is held across a yield,
+        # and an iteration cut short by an error does not keep the file from being unmapped
+        for start in range(HEADER.size, self.offsets_start, block_size):
+            records = self.mmap[start:min(start + block_size, self.offsets_start)]
+            for (rx_hz, tx_hz, name, mode, rx_tone, tx_tone, power, dmr_id, tg_list, colour_code, timeslot,
+                 contact, skip) in RECORD.iter_unpack(records):
+                yield Channel(strings[name], rx_hz, tx_hz, strings[mode], tones[rx_tone], tones[tx_tone],
+                              strings[power], skip == 1, strings[dmr_id], strings[tg_list], strings[colour_code],
+                              strings[timeslot], strings[contact])
+
+
+def convert_snapshot(operation: str, snapshot_file: str, output_file: str, start_channel: int,
+                     compress_level: Optional[int] = None) -> int:
+    """Write the channels of a snapshot in the operation's format and return the number of channels."""
+    format_channel = compile_channel_formatter(operation)
+    channel_number = first_channel_number(operation, start_channel)
+    with Snapshot(snapshot_file) as snapshot, open_output_file(output_file, compress_level) as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(output_fieldnames(operation))
+        writer.writerows(format_channel(channel, number)
+                         for number, channel in enumerate(snapshot, channel_number))
+        count = len(snapshot)
+    logging.info(f"Converted {count} channels from snapshot {snapshot_file}")
+    return count
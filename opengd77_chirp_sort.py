@@ -0,0 +1,155 @@
+"""Sort the input rows of a conversion, spilling sorted runs to disk for inputs larger than memory.
+
+Rows are sorted by frequency, name or band before the conversion numbers them.
+Rows are collected in memory until their estimated size reaches the memory
+limit; inputs that fit are sorted in memory. Otherwise each full buffer is
+sorted and written to a temporary run file, and the runs are merged with
+heapq.merge, so the sorted rows stream out of the merge with at most
+MAX_MERGE_RUNS run files open. Every row carries its input position as the last
+part of its sort key, so rows with equal keys keep their input order.
+"""
+import csv
+import heapq
+import logging
+import os
+import shutil
+import tempfile
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from opengd77_chirp_csv_coverter import CHANNEL_NAME, FREQUENCY, NAME, ROW_ERRORS, RX_FREQUENCY, parse_hz
+from opengd77_chirp_filter import BANDS, band_name
+
+SORT_KEYS = ("frequency", "name", "band")
+# Bands sort in the order of BANDS, followed by frequencies outside every band
+BAND_ORDER = {name: position for position, (name, _, _) in enumerate(BANDS)}
+BYTES_PER_MB = 1 << 20
+DEFAULT_SORT_MEMORY_MB = 64
+# Approximate memory a buffered row takes besides the text of its cells: the list, the key and one str per cell
+ROW_OVERHEAD_BYTES = 200
+CELL_OVERHEAD_BYTES = 57
+# Number of runs merged at once; more runs are first merged into longer runs
+MAX_MERGE_RUNS = 64
+# Rows without a valid sort value are sorted after all other rows
+INVALID = 1
+
+SortKey = tuple
+
+
+def compile_sort_key(key: str, header: List[str]) -> Callable[[list], SortKey]:
+    """Resolve a sort key against the header of either format and return a function computing it from cells.
+
+    Frequencies sort numerically on the RX frequency, names case-insensitively and
+    bands in the order of BANDS, by frequency within a band. Rows with an invalid
+    frequency or too few cells sort last.
+    """
+    if key not in SORT_KEYS:
+        raise ValueError(f"Invalid sort key '{key}'. Allowed keys are: {', '.join(SORT_KEYS)}.")
+    header_index = {column: position for position, column in enumerate(header)}
+    frequency_column, name_column = (FREQUENCY, NAME) if FREQUENCY in header_index else (RX_FREQUENCY, CHANNEL_NAME)
+    column = name_column if key == "name" else frequency_column
+    if column not in header_index:
+        raise ValueError(f"Sorting by {key} needs the '{column}' column")
+    position = header_index[column]
+
+    if key == "name":
+        def name_key(cells: list) -> SortKey:
+            if position >= len(cells):
+                return INVALID, ""
+            return 0, cells[position].casefold()
+        return name_key
+
+    def frequency_key(cells: list) -> SortKey:
+        try:
+            hz = parse_hz(cells[position])
+        except (IndexError, *ROW_ERRORS):
+            return INVALID, 0, 0
+        return 0, BAND_ORDER.get(band_name(hz), len(BANDS)) if key == "band" else 0, hz
+    return frequency_key
+
+
+def _write_run(directory: str, entries: Iterable[tuple]) -> str:
+    """Write sorted (key, sequence, cells) entries to a new run file and return its path."""
+    fd, path = tempfile.mkstemp(suffix=".csv", dir=directory)
+    with open(fd, 'w', newline='') as outfile:
+        csv.writer(outfile).writerows([sequence, *cells] for _, sequence, cells in entries)
+    return path
+
+
+def _read_run(path: str, sort_key: Callable[[list], SortKey]) -> Iterator[tuple]:
+    """Yield the (key, sequence, cells) entries of a run file, deleting it once it is read."""
+    with open(path, 'r', newline='') as infile:
+        for row in csv.reader(infile):
+            cells = row[1:]
+            yield sort_key(cells), int(row[0]), cells
+    os.unlink(path)
+
+
+def _merge_runs(runs: List[str], sort_key: Callable[[list], SortKey], directory: str) -> Iterator[tuple]:
+    """Merge run files into one stream of entries, first merging them into longer runs if there are too many."""
+    while len(runs) > MAX_MERGE_RUNS:
+        merged = []
+        for start in range(0, len(runs), MAX_MERGE_RUNS):
+            group = [_read_run(path, sort_key) for path in runs[start:start + MAX_MERGE_RUNS]]
+            merged.append(_write_run(directory, heapq.merge(*group)) if len(group) > 1 else runs[start])
+        runs = merged
+    return heapq.merge(*(_read_run(path, sort_key) for path in runs))
+
+
+class ChannelSort:
+    """Sort the input rows by a key, for the select argument of transform_channels.
+
+    Sorting uses at most about memory_mb MiB for buffered rows, spilling sorted
+    runs to temporary files in temp_dir (by default the system temporary
+    directory) beyond that. With select, the rows it picks are sorted.
+    """
+
+    def __init__(self, key: str, memory_mb: float = DEFAULT_SORT_MEMORY_MB, temp_dir: Optional[str] = None,
+                 select=None):
+        if key not in SORT_KEYS:
+            raise ValueError(f"Invalid sort key '{key}'. Allowed keys are: {', '.join(SORT_KEYS)}.")
+        if memory_mb <= 0:
+            raise ValueError("The sort memory limit must be positive")
+        self.key = key
+        self.memory_bytes = int(memory_mb * BYTES_PER_MB)
+        self.temp_dir = temp_dir
+        self.select = select
+
+    def __call__(self, header: List[str], rows: Iterable[list]) -> Iterator[list]:
+        sort_key = compile_sort_key(self.key, header)
+        if self.select is not None:
+            rows = self.select(header, rows)
+        return self.sorted_rows(sort_key, rows)
+
+    def sorted_rows(self, sort_key: Callable[[list], SortKey], rows: Iterable[list]) -> Iterator[list]:
+        """Yield rows in sort order, merging spilled runs if they do not fit in memory."""
+        # Entries are (key, sequence, cells); the sequence is unique, so cells are never compared
+        entries = []
+        buffered = 0
+        runs = []
+        directory = None
+        memory_bytes = self.memory_bytes
+        try:
+            for sequence, cells in enumerate(rows):
+                if not cells:
+                    continue
+                entries.append((sort_key(cells), sequence, cells))
+                buffered += ROW_OVERHEAD_BYTES + CELL_OVERHEAD_BYTES * len(cells) + sum(map(len, cells))
+                if buffered >= memory_bytes:
+                    if directory is None:
+                        directory = tempfile.mkdtemp(prefix=".sort.", dir=self.temp_dir)
+                    entries.sort()
+                    runs.append(_write_run(directory, entries))
+                    entries = []
+                    buffered = 0
+            entries.sort()
+            if not runs:
+                yield from (cells for _, _, cells in entries)
+                return
+            if entries:
+                runs.append(_write_run(directory, entries))
+                entries = []
+            logging.info(f"Sorting by {self.key} in {len(runs)} runs spilled to disk")
+            yield from (cells for _, _, cells in _merge_runs(runs, sort_key, directory))
+        finally:
+            if directory is not None:
+                shutil.rmtree(directory, ignore_errors=True)
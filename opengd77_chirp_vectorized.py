@@ -0,0 +1,191 @@
+"""The 'batch' conversion engine: transform rows a block at a time, column by column.
+
+Instead of parsing every row into a Channel, BatchTransformer takes BATCH_ROWS
+rows at once, splits them into columns and computes each output column in one
+go, mapping the row engines' cached parsers and formatters over whole columns.
+The frequency arithmetic (TX frequency from duplex and offset, duplex sign and
+offset from a frequency pair) runs on NumPy int64 arrays when NumPy is
+installed, and in plain Python otherwise; both give the compiled engine's
+values exactly. A block containing a row the parsers reject is transformed row
+by row instead, so failing rows are reported exactly as before.
+"""
+import time
+from itertools import islice, repeat
+from operator import eq, itemgetter
+from typing import Iterable, Iterator, List, Optional
+
+from opengd77_chirp_csv_coverter import (ALL_SKIP, CHIRP_CHANNEL_INPUTS, CHIRP_CHANNEL_OUTPUTS, CHIRP_DEFAULT_VALUES,
+                                         CHIRP_FIELDNAMES, COMMENT, DMR, GD77_CHANNEL_INPUTS, GD77_CHANNEL_OUTPUTS,
+                                         GD77_DEFAULT_VALUES, GD77_FIELDNAMES, HZ_PER_MHZ, NFM, NO_DMR_DETAILS,
+                                         ROW_ERRORS, STAGE_TRANSFORM, YES, ConversionStats, _chirp_tone_settings,
+                                         _output_template, _resolve_columns, calculate_tone_frequency, chirp_comment,
+                                         compile_row_transformer, determine_channel_type, determine_mode,
+                                         duplex_sign, format_mhz, offset_mhz, parse_chirp_comment, parse_gd77_tone,
+                                         parse_hz, power_level, tone_from_chirp)
+
+try:
+    import numpy
+except ImportError:  # Optional; the frequency arithmetic then runs in plain Python
+    numpy = None
+
+# Number of rows transformed together
+BATCH_ROWS = 4096
+
+
+def tx_frequencies(rx_hz: List[int], duplexes: tuple, offsets: tuple) -> List[int]:
+    """Compute the TX frequencies of CHIRP rows, as tx_hz_from_offset does for each row."""
+    if numpy is None:
+        return [rx if duplex == "" or offset == "" else
+                rx + parse_hz(offset) if duplex == "+" else rx - parse_hz(offset)
+                for rx, duplex, offset in zip(rx_hz, duplexes, offsets)]
+    # Offsets are only parsed where tx_hz_from_offset parses them
+    shifted = [duplex != "" and offset != "" for duplex, offset in zip(duplexes, offsets)]
+    steps = numpy.zeros(len(rx_hz), dtype=numpy.int64)
+    steps[numpy.array(shifted, dtype=bool)] = [parse_hz(offset) for offset, shift in zip(offsets, shifted) if shift]
+    signs = numpy.where(numpy.array([duplex == "+" for duplex in duplexes], dtype=bool), 1, -1)
+    return (numpy.array(rx_hz, dtype=numpy.int64) + signs * steps).tolist()
+
+
+def duplexes_and_offsets(rx_hz: List[int], tx_hz: List[int]) -> tuple:
+    """Compute the CHIRP Duplex and Offset columns, as duplex_sign and offset_mhz do for each row."""
+    if numpy is None:
+        return list(map(duplex_sign, tx_hz, rx_hz)), list(map(offset_mhz, tx_hz, rx_hz))
+    difference = numpy.array(tx_hz, dtype=numpy.int64) - numpy.array(rx_hz, dtype=numpy.int64)
+    duplexes = numpy.where(difference > 0, "+", numpy.where(difference == 0, "", "-")).tolist()
+    # Dividing the exact int64 difference gives the same float as offset_mhz
+    offsets = (numpy.abs(difference) / HZ_PER_MHZ).tolist()
+    return duplexes, [offset if duplex else "" for duplex, offset in zip(duplexes, offsets)]
+
+
+def _chirp_columns(columns: List[list]) -> List[list]:
+    """Compute the GD77_CHANNEL_OUTPUTS columns from the CHIRP_CHANNEL_INPUTS columns (and Comment) of a block."""
+    (names, frequencies, duplexes, offsets, tones, rtone_freqs, ctone_freqs, dtcs_codes, dtcs_polarities,
+     rx_dtcs_codes, cross_modes, modes, skips, powers) = columns[:len(CHIRP_CHANNEL_INPUTS)]
+    comments = columns[len(CHIRP_CHANNEL_INPUTS)] if len(columns) > len(CHIRP_CHANNEL_INPUTS) else None
+    rx_hz = list(map(parse_hz, frequencies))
+    tx_hz = tx_frequencies(rx_hz, duplexes, offsets)
+    if comments is None or DMR not in modes:
+        dmr_ids, tg_lists, colour_codes, timeslots, contacts = ([value] * len(names) for value in NO_DMR_DETAILS)
+    else:
+        dmr = [parse_chirp_comment(comment) if mode == DMR and comment else NO_DMR_DETAILS
+               for mode, comment in zip(modes, comments)]
+        dmr_ids, tg_lists, colour_codes, timeslots, contacts = zip(*dmr)
+    no_skip = GD77_DEFAULT_VALUES[ALL_SKIP]
+    return [
+        list(map(determine_channel_type, modes)), names, [12.5 if mode == NFM else 25 for mode in modes],
+        list(map(format_mhz, rx_hz)), list(map(format_mhz, tx_hz)),
+        list(map(tone_from_chirp, repeat("r"), tones, cross_modes, rtone_freqs, dtcs_codes, rx_dtcs_codes,
+                 dtcs_polarities)),
+        list(map(tone_from_chirp, repeat("c"), tones, cross_modes, ctone_freqs, dtcs_codes, rx_dtcs_codes,
+                 dtcs_polarities)),
+        list(map(power_level, powers)), [YES if skip == "S" else no_skip for skip in skips],
+        colour_codes, timeslots, contacts, tg_lists, dmr_ids,
+    ]
+
+
+def _gd77_columns(columns: List[list]) -> List[list]:
+    """Compute the CHIRP_CHANNEL_OUTPUTS columns from the GD77_CHANNEL_INPUTS columns of a block."""
+    (names, rx_frequencies, tx_frequencies_, rx_tone_cells, tx_tone_cells, bandwidths, channel_types, all_skips,
+     dmr_ids, tg_lists, colour_codes, timeslots, contacts) = columns[:len(GD77_CHANNEL_INPUTS)]
+    rx_hz = list(map(parse_hz, rx_frequencies))
+    duplexes, offsets = duplexes_and_offsets(rx_hz, list(map(parse_hz, tx_frequencies_)))
+    modes = list(map(determine_mode, bandwidths, channel_types))
+    rx_tones = list(map(parse_gd77_tone, rx_tone_cells))
+    tx_tones = list(map(parse_gd77_tone, tx_tone_cells))
+    settings = list(map(_chirp_tone_settings, rx_tones, tx_tones, map(eq, rx_tone_cells, tx_tone_cells)))
+    comments = [chirp_comment(*dmr) if mode == DMR else ""
+                for mode, *dmr in zip(modes, dmr_ids, tg_lists, colour_codes, timeslots, contacts)]
+    return [
+        names, list(map(format_mhz, rx_hz)), duplexes, offsets, [tone for tone, _, _ in settings],
+        [rx.frequency if rx.frequency is not None else calculate_tone_frequency(rx.cell) for rx in rx_tones],
+        [tx.frequency if tx.frequency is not None else calculate_tone_frequency(tx.cell) for tx in tx_tones],
+        [tx.code for tx in tx_tones], [polarity for _, polarity, _ in settings], [rx.code for rx in rx_tones],
+        [cross_mode for _, _, cross_mode in settings], modes, ["S" if skip == YES else "" for skip in all_skips],
+        comments,
+    ]
+
+
+class BatchTransformer:
+    """A row transformer for iter_transformed_cells that computes its rows a block at a time.
+
+    Pass the screened rows through blocks(), then call the transformer on the cells
+    of each as it comes out, before taking the next one; rows it was not prepared for
+    are transformed by the 'compiled' engine. Raises KeyError if the header
+    lacks a column the transformer reads.
+    """
+
+    def __init__(self, operation: str, header: List[str], stats: Optional[ConversionStats] = None):
+        header_index = {column: position for position, column in enumerate(header)}
+        self.row_transform = compile_row_transformer(operation, header)
+        if operation == "gd77":
+            inputs, optional_inputs, self.compute_columns = CHIRP_CHANNEL_INPUTS, (COMMENT,), _chirp_columns
+            outputs, fieldnames, default_values = GD77_CHANNEL_OUTPUTS, GD77_FIELDNAMES, GD77_DEFAULT_VALUES
+        else:
+            inputs, optional_inputs, self.compute_columns = GD77_CHANNEL_INPUTS, (), _gd77_columns
+            outputs, fieldnames, default_values = CHIRP_CHANNEL_OUTPUTS, CHIRP_FIELDNAMES, CHIRP_DEFAULT_VALUES
+        # Output column i comes from computed column sources[i], or is the constant template[i] if that is None
+        self.sources = [outputs.index(field) if field in outputs else None for field in fieldnames]
+        self.sources[0] = None
+        self.template = _output_template(fieldnames, default_values)
+        positions = _resolve_columns(header_index, inputs)
+        positions += [header_index[column] for column in optional_inputs if column in header_index]
+        self.cell_getters = [itemgetter(position) for position in positions]
+        self.width = len(header)
+        self.stats = stats
+        self.pending = None
+
+    def transform_block(self, block: List[list]) -> Optional[List[list]]:
+        """Return the output rows of a block of rows as the header is wide, or None if a row fails."""
+        try:
+            columns = [list(map(cell, block)) for cell in self.cell_getters]
+            outputs = self.compute_columns(columns)
+        except (OverflowError, *ROW_ERRORS):
+            # Frequencies beyond int64 are left to the row engine too
+            return None
+        # The channel number (the first column) is filled in when the row is taken
+        columns = [repeat(default) if source is None else outputs[source]
+                   for source, default in zip(self.sources, self.template)]
+        return list(map(list, zip(*columns)))
+
+    def blocks(self, rows: Iterable[tuple]) -> Iterator[tuple]:
+        """Yield screened rows, transforming every BATCH_ROWS of them before they are yielded.
+
+        Rows are (cells, matched, key, cached) tuples, as screened by the conversion;
+        only the rows that matched and have no cached output are transformed.
+        """
+        rows = iter(rows)
+        width = self.width
+        while True:
+            block = list(islice(rows, BATCH_ROWS))
+            if not block:
+                self.pending = None
+                return
+            start = time.perf_counter()
+            full_rows = [row[0] for row in block if row[1] and row[3] is None and len(row[0]) == width]
+            outputs = self.transform_block(full_rows) if full_rows else None
+            if self.stats is not None:
+                self.stats.stage_seconds[STAGE_TRANSFORM] += time.perf_counter() - start
+            if outputs is None:
+                self.pending = None
+                yield from block
+                continue
+            if len(full_rows) == len(block):
+                for row, self.pending in zip(block, zip(full_rows, outputs)):
+                    yield row
+                continue
+            prepared = iter(zip(full_rows, outputs))
+            upcoming = next(prepared)
+            for row in block:
+                if row[0] is upcoming[0]:
+                    self.pending = upcoming
+                    upcoming = next(prepared, (None, None))
+                yield row
+
+    def __call__(self, cells: list, channel_number: int) -> list:
+        pending = self.pending
+        if pending is not None and pending[0] is cells:
+            self.pending = None
+            out = pending[1]
+            out[0] = channel_number
+            return out
+        return self.row_transform(cells, channel_number)
@@ -0,0 +1,23 @@
+CHIRP_CSV = """Location,Name,Frequency,Duplex,Offset,Tone,rToneFreq,cToneFreq,DtcsCode,DtcsPolarity,RxDtcsCode,CrossMode,Mode,TStep,Skip,Power,Comment,URCALL,RPT1CALL,RPT2CALL,DVCODE
+0,GB3WE,145.775000,-,0.600000,Tone,88.5,88.5,023,NN,023,Tone->Tone,FM,12.50,,50W,,,,,
+1,GB7XX,439.600000,-,7.600000,,88.5,88.5,023,NN,023,Tone->Tone,DMR,12.50,S,5.0W,,,,,
+2,SIMPLEX,145.500000,,0.000000,TSQL,88.5,67.0,023,NN,023,Tone->Tone,NFM,12.50,,1.5W,,,,,
+3,DCSRPT,433.125000,+,1.600000,DTCS,88.5,88.5,754,RN,023,Tone->Tone,FM,12.50,,4W,,,,,
+4,CROSS1,145.600000,-,0.600000,Cross,100.0,88.5,023,RR,131,DTCS->DTCS,FM,12.50,,0.5W,,,,,
+5,CROSS2,145.650000,+,0.600000,Cross,100.0,123.0,023,NN,131,Tone->Tone,NFM,12.50,,2.5W,,,,,
+"""
+
+GD77_CSV = """Channel Number,Channel Name,Channel Type,Rx Frequency,Tx Frequency,Bandwidth (kHz),Colour Code,Timeslot,Contact,TG List,DMR ID,TS1_TA_Tx,TS2_TA_Tx ID,RX Tone,TX Tone,Squelch,Power,Rx Only,Zone Skip,All Skip,TOT,VOX,No Beep,No Eco,APRS,Latitude,Longitude,Use Location
+1,GB3WE,Analogue,145.77500,145.17500,25,,,,,,,,88.5,88.5,Disabled,Master,No,No,No,0,Off,No,No,None,51.500,-0.120,Yes
+2,GB7XX,Digital,439.60000,432.00000,12.5,1,2,TG 235,UK,2341234,Off,Off,None,None,Disabled,P9,No,No,Yes,0,Off,No,No,None,52.200,0.120,Yes
+3,SIMPLEX,Analogue,145.50000,145.50000,12.5,,,,,,,,None,None,Disabled,P5,No,No,No,0,Off,No,No,None,0.128,0.008,No
+4,DCSRPT,Analogue,433.12500,434.72500,25,,,,,,,,D754N,D754N,Disabled,P8,No,No,No,0,Off,No,No,None,53.480,-2.240,Yes
+5,CROSS1,Analogue,145.60000,145.00000,25,,,,,,,,D131I,D023I,Disabled,P1,No,No,No,0,Off,No,No,None,0.128,0.008,No
+6,CROSS2,Analogue,145.65000,146.25000,12.5,,,,,,,,100.0,123.0,Disabled,P6,No,No,No,0,Off,No,No,None,0.128,0.008,No
+"""
+
+
+def write_sample(path, content):
+    with open(path, "w", newline="") as outfile:
+        outfile.write(content)
+    return str(path)
@@ -0,0 +1,91 @@
+import csv
+import sys
+import pytest
+import opengd77_chirp_bandplan as bandplan
+from opengd77_chirp_bandplan import BandPlan, OPENGD77_BANDS, parse_band_plans, validate_codeplug
+from opengd77_chirp_csv_coverter import main
+from opengd77_chirp_filter import OTHER_BAND, band_name
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+OUT_OF_BAND_ROWS = ("6,AIRBAND,125.000000,,0.000000,,88.5,88.5,023,NN,023,Tone->Tone,FM,12.50,,5W,,,,,\n"
+                    "7,WIDESPLIT,145.800000,+,30.000000,,88.5,88.5,023,NN,023,Tone->Tone,FM,12.50,,5W,,,,,\n")
+
+
+def read_rows(path):
+    with open(path, newline="") as infile:
+        return list(csv.reader(infile))[1:]
+
+
+def test_band_lookup():
+    plan = BandPlan("opengd77", OPENGD77_BANDS)
+    assert plan.band(145_500_000) == "VHF" and plan.band(136_000_000) == "VHF" and plan.band(174_000_000) == "VHF"
+    assert plan.band(300_000_000) is None and plan.band(1) is None and plan.band(500_000_000) is None
+    frequencies = [1, 136_000_000, 174_000_001, 433_000_000, 470_000_000, 900_000_000]
+    assert plan.bands(frequencies) == [plan.band(hz) for hz in frequencies]
+
+
+def test_bisect_and_vectorized_lookups_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    frequencies = list(range(0, 1_400_000_000, 997_331))
+    expected = BandPlan("amateur", bandplan.BANDS).bands(frequencies)
+    monkeypatch.setattr(bandplan, "numpy", None)
+    plan = BandPlan("amateur", bandplan.BANDS)
+    assert plan.start_array is None
+    assert plan.bands(frequencies) == expected
+
+
+def test_bisect_lookups_match_band_names(monkeypatch):
+    monkeypatch.setattr(bandplan, "numpy", None)
+    frequencies = list(range(0, 1_400_000_000, 997_331))
+    bands = BandPlan("amateur", bandplan.BANDS).bands(frequencies)
+    assert [band or OTHER_BAND for band in bands] == [band_name(hz) for hz in frequencies]
+
+
+def test_invalid_band_plans(tmp_path):
+    with pytest.raises(ValueError, match="overlaps"):
+        BandPlan("bad", [("a", 10, 20), ("b", 20, 30)])
+    with pytest.raises(ValueError, match="ends below"):
+        BandPlan("bad", [("a", 20, 10)])
+    with pytest.raises(ValueError, match="Allowed band plans"):
+        parse_band_plans("amateur,cb")
+    plan_file = write_sample(tmp_path / "plan.csv", "# name,low,high\nlow,1.0\n")
+    with pytest.raises(ValueError, match="line 2"):
+        parse_band_plans("@" + plan_file)
+
+
+def test_validate_reports_rx_and_offset_violations(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV + OUT_OF_BAND_ROWS)
+    output_file = str(tmp_path / "report.csv")
+    counts = validate_codeplug(input_file, output_file, parse_band_plans("amateur,opengd77"))
+    assert counts == {"channels": 8, "violations": 4}
+    assert read_rows(output_file) == [
+        ["8", "AIRBAND", "RX", "125.00000", "amateur", "outside the amateur band plan"],
+        ["8", "AIRBAND", "RX", "125.00000", "opengd77", "outside the opengd77 band plan"],
+        ["9", "WIDESPLIT", "TX", "175.80000", "amateur", "offset takes TX out of the 2m band"],
+        ["9", "WIDESPLIT", "TX", "175.80000", "opengd77", "offset takes TX out of the VHF band"],
+    ]
+
+
+def test_validate_with_a_band_plan_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(bandplan, "VALIDATION_BATCH_ROWS", 2)
+    plan_file = write_sample(tmp_path / "uk.csv", "2m,144.0,146.0\n70cm,430.0,440.0\n")
+    input_file = write_sample(tmp_path / "in.csv", GD77_CSV)
+    counts = validate_codeplug(input_file, str(tmp_path / "report.csv"), parse_band_plans("@" + plan_file))
+    assert counts == {"channels": 6, "violations": 1}
+    assert read_rows(tmp_path / "report.csv") == [["7", "CROSS2", "TX", "146.25000", "uk",
+                                                   "offset takes TX out of the 2m band"]]
+
+
+def test_command_line_validate(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    output_file = str(tmp_path / "report.csv")
+    monkeypatch.setattr(sys, "argv", ["converter", "validate", input_file, output_file])
+    main()
+    assert read_rows(output_file) == []
+
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV + OUT_OF_BAND_ROWS)
+    monkeypatch.setattr(sys, "argv", ["converter", "validate", input_file, output_file, "--bandplan=opengd77"])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+    assert [row[1] for row in read_rows(output_file)] == ["AIRBAND", "WIDESPLIT"]
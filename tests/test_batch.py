@@ -0,0 +1,66 @@
+import csv
+import sys
+import pytest
+from opengd77_chirp_csv_coverter import collect_batch_inputs, is_batch_source, main, transform_batch
+from tests.sample_data import CHIRP_CSV, write_sample
+
+
+def read_channel_numbers(path):
+    with open(path, newline="") as infile:
+        return [row["Channel Number"] for row in csv.DictReader(infile)]
+
+
+def test_is_batch_source(tmp_path):
+    assert is_batch_source(str(tmp_path))
+    assert is_batch_source("exports/*.csv")
+    assert is_batch_source("@manifest.txt")
+    assert not is_batch_source("Channels.csv")
+
+
+def test_existing_files_named_like_patterns_are_converted(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "club[north].csv", CHIRP_CSV)
+    assert not is_batch_source(input_file)
+    output_file = str(tmp_path / "out.csv")
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, output_file])
+    main()
+    assert read_channel_numbers(output_file) == ["1", "2", "3", "4", "5", "6"]
+
+
+def test_collect_batch_inputs_directory_and_glob(tmp_path):
+    write_sample(tmp_path / "b.csv", CHIRP_CSV)
+    write_sample(tmp_path / "a.csv", CHIRP_CSV)
+    write_sample(tmp_path / "notes.txt", "")
+    expected = [str(tmp_path / "a.csv"), str(tmp_path / "b.csv")]
+    assert collect_batch_inputs(str(tmp_path)) == expected
+    assert collect_batch_inputs(str(tmp_path / "*.csv")) == expected
+
+
+def test_collect_batch_inputs_manifest(tmp_path):
+    write_sample(tmp_path / "manifest.txt", "# nightly\na.csv\n\nsub/b.csv\n")
+    assert collect_batch_inputs("@" + str(tmp_path / "manifest.txt")) == [
+        str(tmp_path / "a.csv"), str(tmp_path / "sub" / "b.csv")]
+
+
+def test_transform_batch_reports_each_file(tmp_path):
+    good = write_sample(tmp_path / "good.csv", CHIRP_CSV)
+    bad = write_sample(tmp_path / "bad.csv", "Location,Name\n0,x\n")
+    results = transform_batch("gd77", [good, bad], str(tmp_path / "out"), 10, max_workers=2)
+    assert [result.ok for result in results] == [True, False]
+    assert results[1].error.startswith("KeyError")
+    assert read_channel_numbers(results[0].output_file) == ["11", "12", "13", "14", "15", "16"]
+
+
+def test_main_batch_exits_on_failure(tmp_path, monkeypatch):
+    write_sample(tmp_path / "bad.csv", "Location,Name\n0,x\n")
+    monkeypatch.setattr(sys, "argv", ["prog", "gd77", str(tmp_path), str(tmp_path / "out"), "--jobs=1"])
+    with pytest.raises(SystemExit):
+        main()
+
+
+def test_main_unknown_option(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["prog", "gd77", "--bogus"])
+    printed = {}
+    monkeypatch.setattr("builtins.print", lambda msg: printed.setdefault('msg', msg))
+    with pytest.raises(SystemExit):
+        main()
+    assert "Unknown option" in printed['msg']
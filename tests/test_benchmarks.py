@@ -0,0 +1,41 @@
+import csv
+from benchmarks.codeplug_generator import CodeplugGenerator, write_codeplug
+from benchmarks.run_benchmarks import bench_transform_channels, find_regressions
+from opengd77_chirp_csv_coverter import transform_channels, CHIRP_FIELDNAMES, GD77_FIELDNAMES
+
+
+def test_generator_is_seeded():
+    assert list(CodeplugGenerator(5).chirp_rows(50)) == list(CodeplugGenerator(5).chirp_rows(50))
+    assert list(CodeplugGenerator(5).gd77_rows(50)) != list(CodeplugGenerator(6).gd77_rows(50))
+
+
+def test_generator_row_widths():
+    assert all(len(row) == len(CHIRP_FIELDNAMES) for row in CodeplugGenerator().chirp_rows(200))
+    assert all(len(row) == len(GD77_FIELDNAMES) for row in CodeplugGenerator().gd77_rows(200))
+
+
+def test_generated_codeplugs_convert(tmp_path):
+    write_codeplug(str(tmp_path / "chirp.csv"), "chirp", 500)
+    write_codeplug(str(tmp_path / "gd77.csv"), "gd77", 500)
+    transform_channels("gd77", str(tmp_path / "chirp.csv"), str(tmp_path / "out_gd77.csv"), 0)
+    transform_channels("chirp", str(tmp_path / "gd77.csv"), str(tmp_path / "out_chirp.csv"), 0)
+    with open(tmp_path / "out_chirp.csv", newline="") as infile:
+        rows = list(csv.DictReader(infile))
+    assert len(rows) == 500
+    assert {row["Mode"] for row in rows} == {"FM", "NFM", "DMR"}
+
+
+def test_bench_transform_channels(tmp_path):
+    write_codeplug(str(tmp_path / "chirp.csv"), "chirp", 100)
+    result = bench_transform_channels("gd77", "compiled", str(tmp_path / "chirp.csv"), 100)
+    assert result["rows"] == 100
+    assert result["rows_per_second"] > 0
+    assert not (tmp_path / "chirp.csv.out").exists()
+
+
+def test_find_regressions():
+    def document(rate):
+        return {"results": [{"name": "transform_channels", "operation": "gd77", "engine": "compiled", "rows": 1000,
+                             "rows_per_second": rate}]}
+    assert find_regressions(document(95.0), document(100.0), 0.10) == []
+    assert len(find_regressions(document(80.0), document(100.0), 0.10)) == 1
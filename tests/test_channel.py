@@ -0,0 +1,103 @@
+import csv
+import io
+import pytest
+from opengd77_chirp_csv_coverter import (calculate_offset, chirp_comment, determine_duplex, format_mhz,
+                                         parse_chirp_comment, parse_hz, transform_channels, Channel, DmrDetails,
+                                         GD77_TONES)
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+
+@pytest.mark.parametrize("value, hz", [
+    ("145.775000", 145775000), ("145.77500", 145775000), ("439", 439000000), ("0.600000", 600000),
+    (".0125", 12500), ("1e1", 10000000), ("-0.6", -600000),
+])
+def test_parse_hz(value, hz):
+    assert parse_hz(value) == hz
+
+
+def test_parse_hz_invalid():
+    with pytest.raises(ValueError):
+        parse_hz("145,5")
+
+
+@pytest.mark.parametrize("hz, decimals, text", [
+    (145775000, 5, "145.77500"), (145775000, 6, "145.775000"), (433006250, 5, "433.00625"),
+    (145000005, 5, "145.00001"), (-600000, 6, "-0.600000"),
+])
+def test_format_mhz(hz, decimals, text):
+    assert format_mhz(hz, decimals) == text
+
+
+def test_offset_has_no_float_drift():
+    assert calculate_offset("145.60000", "145.00000") == 0.6
+    assert calculate_offset("446.0125", "446.0000") == 0.0125
+    assert calculate_offset("145.5", "145.50000") == ""
+    assert determine_duplex("145.0", "145.6") == "-"
+
+
+def test_channel_from_chirp_row():
+    row = next(csv.DictReader(io.StringIO(CHIRP_CSV)))
+    channel = Channel.from_chirp_row(row)
+    assert (channel.rx_hz, channel.tx_hz) == (145775000, 145175000)
+    assert channel.rx_tone is GD77_TONES["88.5"]
+    assert channel.power == "Master"
+    assert not channel.skip
+
+
+def test_channel_from_gd77_row():
+    row = list(csv.DictReader(io.StringIO(GD77_CSV)))[1]
+    channel = Channel.from_gd77_row(row)
+    assert channel.mode == "DMR"
+    assert channel.channel_type == "Digital"
+    assert channel.skip
+    assert (channel.dmr_id, channel.tg_list, channel.contact) == ("2341234", "UK", "TG 235")
+    assert channel.power == "P9"
+
+
+def test_channel_uses_slots():
+    channel = Channel("A", 145500000, 145500000, "FM")
+    with pytest.raises(AttributeError):
+        channel.unknown = 1
+
+
+def test_channel_round_trip():
+    for row in csv.DictReader(io.StringIO(CHIRP_CSV)):
+        channel = Channel.from_chirp_row(row)
+        gd77_row = {key: str(value) for key, value in channel.to_gd77_row(1).items()}
+        assert Channel.from_gd77_row(gd77_row) == channel
+
+
+@pytest.mark.parametrize("details", [
+    DmrDetails("2341234", "UK", "1", "2", "TG 235"),
+    DmrDetails("", "", "", "", ""),
+    DmrDetails("1", "A|B", "7", "1", "C:\\net, TG List: x"),
+])
+def test_dmr_comment_round_trip(details):
+    comment = chirp_comment(*details)
+    assert comment.startswith("DMR1|")
+    assert parse_chirp_comment(comment) == details
+
+
+def test_parse_legacy_and_other_comments():
+    legacy = "DMR ID: 2341234, TG List: UK, Colour Code: 1, Timeslot: 2, Contact: TG 235"
+    assert parse_chirp_comment(legacy) == DmrDetails("2341234", "UK", "1", "2", "TG 235")
+    assert parse_chirp_comment("Club repeater") == DmrDetails()
+    assert parse_chirp_comment("DMR1|1|2|3") == DmrDetails()
+
+
+def test_dmr_strings_are_interned():
+    first = Channel.from_gd77("A", "439.6", "432.0", "None", "None", "12.5", "Digital", "No", "1", "".join(["U", "K"]),
+                              "1", "2", "".join(["TG ", "235"]))
+    second = Channel.from_chirp("B", "439.6", "-", "7.6", "", "88.5", "88.5", "023", "NN", "023", "Tone->Tone", "DMR",
+                                "", "5W", chirp_comment("2", "".join(["U", "K"]), "1", "1", "TG 235"))
+    assert first.tg_list is second.tg_list and first.contact is second.contact
+
+
+def test_dmr_details_survive_a_round_trip(tmp_path):
+    gd77_file = write_sample(tmp_path / "gd77.csv", GD77_CSV)
+    transform_channels("chirp", gd77_file, str(tmp_path / "chirp.csv"), 0)
+    transform_channels("gd77", str(tmp_path / "chirp.csv"), str(tmp_path / "round_trip.csv"), 0)
+    dmr_columns = ("Channel Name", "Channel Type", "Colour Code", "Timeslot", "Contact", "TG List", "DMR ID")
+    with open(gd77_file, newline="") as original, open(tmp_path / "round_trip.csv", newline="") as round_trip:
+        assert ([[row[column] for column in dmr_columns] for row in csv.DictReader(round_trip)] ==
+                [[row[column] for column in dmr_columns] for row in csv.DictReader(original)])
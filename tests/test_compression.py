@@ -0,0 +1,128 @@
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import os
+import sys
+import pytest
+from opengd77_chirp_csv_coverter import (ConversionStats, collect_batch_inputs, input_compression, main,
+                                         open_csv_file, read_input_file, transform_channels, write_output_file)
+from opengd77_chirp_parallel import transform_channels_parallel
+from tests.sample_data import CHIRP_CSV, write_sample
+
+CODECS = {".gz": gzip, ".bz2": bz2, ".xz": lzma}
+
+
+def read_text(path):
+    with open(path, newline="") as infile:
+        return infile.read()
+
+
+def write_compressed(path, content):
+    with CODECS[path.suffix].open(path, "wt", newline="") as outfile:
+        outfile.write(content)
+    return str(path)
+
+
+def read_compressed(path):
+    with CODECS[path.suffix].open(path, "rt", newline="") as infile:
+        return infile.read()
+
+
+@pytest.mark.parametrize("suffix", CODECS)
+def test_compressed_round_trip(tmp_path, suffix):
+    expected_file = str(tmp_path / "expected.csv")
+    transform_channels("gd77", write_sample(tmp_path / "in.csv", CHIRP_CSV), expected_file, 0)
+
+    input_file = write_compressed(tmp_path / f"in.csv{suffix}", CHIRP_CSV)
+    output_file = tmp_path / f"out.csv{suffix}"
+    stats = ConversionStats()
+    transform_channels("gd77", input_file, str(output_file), 0, stats=stats)
+    assert stats.rows == 6
+    assert read_compressed(output_file) == read_text(expected_file)
+
+
+def test_input_is_detected_by_magic_bytes(tmp_path):
+    input_file = write_compressed(tmp_path / "in.xz", CHIRP_CSV)
+    misnamed_file = tmp_path / "in.csv"
+    misnamed_file.write_bytes((tmp_path / "in.xz").read_bytes())
+    assert input_compression(str(misnamed_file)) == "xz"
+    assert input_compression(write_sample(tmp_path / "plain.gz", CHIRP_CSV)) is None
+
+    with read_input_file(str(misnamed_file)) as reader:
+        assert [row["Name"] for row in reader][:2] == ["GB3WE", "GB7XX"]
+    # A plain file named like a compressed one is read as it is
+    with open_csv_file(str(tmp_path / "plain.gz"), "r") as infile:
+        assert infile.read() == CHIRP_CSV
+    assert input_compression(input_file) == "xz"
+
+
+def test_compress_level(tmp_path):
+    content = CHIRP_CSV * 50
+    sizes = []
+    for level in (0, 9):
+        output_file = tmp_path / f"out{level}.csv.gz"
+        with write_output_file(str(output_file), ["Data"], level) as writer:
+            writer.writerows({"Data": line} for line in content.splitlines())
+        sizes.append(output_file.stat().st_size)
+        with gzip.open(output_file, "rt", newline="") as infile:
+            assert len(list(csv.reader(infile))) == len(content.splitlines()) + 1
+    assert sizes[1] < sizes[0]
+
+
+def test_progress_without_total_for_compressed_input(tmp_path):
+    input_file = write_compressed(tmp_path / "in.csv.bz2", CHIRP_CSV)
+    calls = []
+    transform_channels("gd77", input_file, str(tmp_path / "out.csv"), 0,
+                       progress=lambda done, total: calls.append((done, total)))
+    assert calls == [(len(CHIRP_CSV), None)]
+
+
+def test_parallel_converts_compressed_input_sequentially(tmp_path):
+    input_file = write_compressed(tmp_path / "in.csv.gz", CHIRP_CSV)
+    expected_file = str(tmp_path / "expected.csv")
+    transform_channels("gd77", input_file, expected_file, 0)
+    output_file = str(tmp_path / "out.csv")
+    transform_channels_parallel("gd77", input_file, output_file, 0, max_workers=2, chunk_bytes=1)
+    assert read_text(output_file) == read_text(expected_file)
+
+
+def test_compressed_stdin(tmp_path, monkeypatch):
+    compressed = gzip.compress(CHIRP_CSV.encode())
+    stdin_file = tmp_path / "stdin"
+    stdin_file.write_bytes(compressed)
+    with open(stdin_file, "r") as stdin:
+        monkeypatch.setattr(sys, "stdin", stdin)
+        with open_csv_file("-", "r") as infile:
+            assert infile.read() == CHIRP_CSV
+    # Replaced streams are read as they are
+    monkeypatch.setattr(sys, "stdin", io.StringIO(CHIRP_CSV))
+    with open_csv_file("-", "r") as infile:
+        assert infile.read() == CHIRP_CSV
+
+
+def test_batch_collects_compressed_inputs(tmp_path):
+    write_sample(tmp_path / "a.csv", CHIRP_CSV)
+    write_compressed(tmp_path / "b.csv.gz", CHIRP_CSV)
+    write_sample(tmp_path / "notes.txt", "")
+    assert [path.rsplit("/", 1)[-1] for path in collect_batch_inputs(str(tmp_path))] == ["a.csv", "b.csv.gz"]
+
+
+def test_command_line_compress_level(tmp_path, monkeypatch):
+    input_file = write_compressed(tmp_path / "in.csv.gz", CHIRP_CSV)
+    output_file = tmp_path / "out.csv.xz"
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, str(output_file), "--compress-level=1"])
+    main()
+    assert len(read_compressed(output_file).splitlines()) == 7
+
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, str(output_file), "--compress-level=10"])
+    with pytest.raises(ValueError, match="compression level"):
+        main()
+
+
+def test_bzip2_rejects_level_zero(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    with pytest.raises(ValueError, match="compression level 0 for bzip2"):
+        transform_channels("gd77", input_file, str(tmp_path / "out.csv.bz2"), 0, compress_level=0)
+    assert sorted(os.listdir(tmp_path)) == ["in.csv"]
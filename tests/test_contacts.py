@@ -0,0 +1,108 @@
+import csv
+import os
+import sys
+import pytest
+from opengd77_chirp_contacts import MAX_TG_LIST_CONTACTS, DmrReferences
+from opengd77_chirp_csv_coverter import ENGINES, LenientPolicy, chirp_comment, main, transform_channels
+from tests.sample_data import CHIRP_CSV, write_sample
+
+DMR_ROWS = [
+    ("TG 235", "UK", "2341234"),
+    ("TG 91", "UK", "2341234"),
+    ("TG 235", "UK", "2345678"),
+    ("Parrot", "Local", ""),
+    ("TG 91", "", ""),
+]
+
+
+def dmr_codeplug(rows=DMR_ROWS):
+    lines = [CHIRP_CSV]
+    for number, (contact, tg_list, dmr_id) in enumerate(rows, 6):
+        comment = chirp_comment(dmr_id, tg_list, "1", "2", contact)
+        lines.append(f'{number},DMR{number},439.{number:03d}000,,,,88.5,88.5,023,NN,023,Tone->Tone,DMR,12.50,,'
+                     f'5W,"{comment}",,,,\n')
+    return "".join(lines)
+
+
+def read_rows(path):
+    with open(path, newline="") as infile:
+        return list(csv.reader(infile))[1:]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_tables_are_written_with_the_output(tmp_path, engine):
+    input_file = write_sample(tmp_path / "in.csv", dmr_codeplug())
+    transform_channels("gd77", input_file, str(tmp_path / "Channels.csv"), 0, engine=engine, contacts=True)
+    assert read_rows(tmp_path / "Channels.contacts.csv") == [["1", "TG 235", "2"], ["2", "TG 91", "2"],
+                                                             ["3", "Parrot", "1"]]
+    assert read_rows(tmp_path / "Channels.tg_lists.csv") == [["1", "UK", "3", "TG 235", "TG 91"],
+                                                             ["2", "Local", "1", "Parrot"]]
+    assert read_rows(tmp_path / "Channels.dmr_ids.csv") == [["2341234", "2"], ["2345678", "1"]]
+
+    transform_channels("gd77", input_file, str(tmp_path / "plain.csv"), 0)
+    with open(tmp_path / "Channels.csv") as converted, open(tmp_path / "plain.csv") as plain:
+        assert converted.read() == plain.read()
+
+
+def test_filtered_and_rejected_rows_are_not_collected(tmp_path):
+    ghost = chirp_comment("2340000", "Ghosts", "1", "1", "Ghost")
+    input_file = write_sample(tmp_path / "in.csv", dmr_codeplug(DMR_ROWS[3:]) +
+                              f'11,BAD,abc,,,,88.5,88.5,023,NN,023,Tone->Tone,DMR,12.50,,5W,"{ghost}",,,,\n')
+    transform_channels("gd77", input_file, str(tmp_path / "Channels.csv"), 0, lenient=LenientPolicy(),
+                       contacts=True)
+    assert read_rows(tmp_path / "Channels.contacts.csv") == [["1", "Parrot", "1"], ["2", "TG 91", "1"]]
+    transform_channels("gd77", input_file, str(tmp_path / "Channels.csv"), 0, where="type=analogue",
+                       lenient=LenientPolicy(), contacts=True)
+    assert read_rows(tmp_path / "Channels.contacts.csv") == []
+    assert read_rows(tmp_path / "Channels.tg_lists.csv") == []
+
+
+def test_incremental_conversion_collects_reused_rows(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", dmr_codeplug())
+    output_file = str(tmp_path / "Channels.csv")
+    transform_channels("gd77", input_file, output_file, 0, incremental=True, contacts=True)
+    expected = read_rows(tmp_path / "Channels.tg_lists.csv")
+    write_sample(tmp_path / "in.csv", dmr_codeplug() + "99,ADDED,145.300000,,,,88.5,88.5,023,NN,023,"
+                                                       "Tone->Tone,FM,12.50,,5W,,,,,\n")
+    transform_channels("gd77", input_file, output_file, 0, incremental=True, contacts=True)
+    assert read_rows(tmp_path / "Channels.tg_lists.csv") == expected
+
+
+def test_unchanged_incremental_conversion_writes_missing_tables(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", dmr_codeplug())
+    output_file = str(tmp_path / "Channels.csv")
+    transform_channels("gd77", input_file, output_file, 0, incremental=True)
+    transform_channels("gd77", input_file, output_file, 0, incremental=True, contacts=True)
+    assert len(read_rows(tmp_path / "Channels.contacts.csv")) == 3
+    os.remove(tmp_path / "Channels.dmr_ids.csv")
+    transform_channels("gd77", input_file, output_file, 0, incremental=True, contacts=True)
+    assert len(read_rows(tmp_path / "Channels.dmr_ids.csv")) == 2
+    modified = os.stat(output_file).st_mtime_ns
+    transform_channels("gd77", input_file, output_file, 0, incremental=True, contacts=True)
+    assert os.stat(output_file).st_mtime_ns == modified
+
+
+def test_tg_lists_hold_at_most_32_contacts():
+    references = DmrReferences()
+    for number in range(MAX_TG_LIST_CONTACTS + 2):
+        references.add(f"TG {number}", "All", "")
+    assert len(references.tg_list_contacts["All"]) == MAX_TG_LIST_CONTACTS
+    assert references.dropped == {"All": 2}
+    assert len(references.contacts) == MAX_TG_LIST_CONTACTS + 2
+
+
+def test_only_conversions_to_opengd77_collect_contacts(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", dmr_codeplug())
+    with pytest.raises(ValueError, match="OpenGD77"):
+        transform_channels("chirp", input_file, str(tmp_path / "out.csv"), 0, contacts=True)
+
+
+def test_command_line_contacts(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", dmr_codeplug())
+    output_file = str(tmp_path / "Channels.csv")
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, output_file, "--contacts"])
+    main()
+    assert len(read_rows(tmp_path / "Channels.contacts.csv")) == 3
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, output_file, "--contacts", "--parallel"])
+    with pytest.raises(ValueError, match="--parallel"):
+        main()
@@ -0,0 +1,88 @@
+import csv
+import sys
+import pytest
+from opengd77_chirp_csv_coverter import main, transform_channels
+from opengd77_chirp_diff import diff_codeplugs, merge_codeplugs
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+GD77_LINES = GD77_CSV.strip().split("\n")
+NEW_GD77_LINE = ("7,NEW,Analogue,145.30000,145.30000,25,,,,,,,,None,None,Disabled,Master,No,No,No,0,Off,No,No,None,"
+                 "0.128,0.008,No")
+
+
+def read_rows(path):
+    with open(path, newline="") as infile:
+        return list(csv.reader(infile))
+
+
+def test_diff_across_formats(tmp_path):
+    chirp_file = write_sample(tmp_path / "chirp.csv", CHIRP_CSV)
+    gd77_file = str(tmp_path / "gd77.csv")
+    transform_channels("gd77", chirp_file, gd77_file, 0)
+    counts = diff_codeplugs(chirp_file, gd77_file, str(tmp_path / "diff.csv"))
+    assert counts == {"added": 0, "removed": 0, "changed": 0, "unchanged": 6}
+    assert len(read_rows(tmp_path / "diff.csv")) == 1
+
+
+def test_diff_reports_added_removed_and_changed(tmp_path):
+    left_file = write_sample(tmp_path / "left.csv", GD77_CSV)
+    edited = [GD77_LINES[0], GD77_LINES[2], GD77_LINES[1].replace("GB3WE", "GB3WE-R").replace(",Master,", ",P5,"),
+              *GD77_LINES[4:], NEW_GD77_LINE, GD77_LINES[2]]
+    right_file = write_sample(tmp_path / "right.csv", "\n".join(edited) + "\n")
+    counts = diff_codeplugs(left_file, right_file, str(tmp_path / "diff.csv"))
+    assert counts == {"added": 2, "removed": 1, "changed": 1, "unchanged": 4}
+
+    rows = read_rows(tmp_path / "diff.csv")
+    assert [row[:4] for row in rows[1:]] == [["changed", "2", "3", "GB3WE-R"], ["added", "", "7", "NEW"],
+                                              ["added", "", "8", "GB7XX"], ["removed", "4", "", "SIMPLEX"]]
+    assert rows[1][-1] == "name: 'GB3WE' -> 'GB3WE-R'; power: 'Master' -> 'P5'"
+    assert rows[4][4:9] == ["145.50000", "145.50000", "None", "None", "NFM"]
+
+
+def test_merge_deduplicates_and_renumbers(tmp_path):
+    left_file = write_sample(tmp_path / "left.csv", "\n".join([GD77_LINES[0], GD77_LINES[4], GD77_LINES[1]]) + "\n")
+    right_file = str(tmp_path / "right.csv")
+    transform_channels("chirp", write_sample(tmp_path / "gd77.csv", GD77_CSV), right_file, 0)
+    output_file = str(tmp_path / "merged.csv")
+    assert merge_codeplugs(left_file, right_file, output_file, 10) == 6
+
+    rows = read_rows(output_file)
+    assert rows[0] == GD77_LINES[0].split(",")
+    assert [row[:2] for row in rows[1:]] == [["11", "DCSRPT"], ["12", "GB3WE"], ["13", "GB7XX"], ["14", "SIMPLEX"],
+                                             ["15", "CROSS1"], ["16", "CROSS2"]]
+    # Rows already in the output format keep all their cells
+    assert rows[1][1:] == GD77_LINES[4].split(",")[1:]
+
+
+def test_merge_in_another_format(tmp_path):
+    left_file = write_sample(tmp_path / "left.csv", GD77_CSV)
+    right_file = write_sample(tmp_path / "right.csv", GD77_CSV)
+    output_file = str(tmp_path / "merged.csv")
+    assert merge_codeplugs(left_file, right_file, output_file, 0, "chirp") == 6
+    expected_file = str(tmp_path / "expected.csv")
+    transform_channels("chirp", left_file, expected_file, 0)
+    assert read_rows(output_file) == read_rows(expected_file)
+
+
+def test_unknown_codeplug_format(tmp_path):
+    left_file = write_sample(tmp_path / "left.csv", "Frequency,Name\n145.5,A\n")
+    with pytest.raises(ValueError, match="Unknown codeplug format"):
+        diff_codeplugs(left_file, left_file, str(tmp_path / "diff.csv"))
+
+
+def test_command_line_merge(tmp_path, monkeypatch):
+    left_file = write_sample(tmp_path / "left.csv", GD77_CSV)
+    right_file = write_sample(tmp_path / "right.csv", CHIRP_CSV)
+    output_file = str(tmp_path / "merged.csv")
+    monkeypatch.setattr(sys, "argv", ["converter", "merge", left_file, right_file, output_file, "100",
+                                      "--format=chirp"])
+    main()
+    rows = read_rows(output_file)
+    assert rows[0][0] == "Location" and rows[1][:2] == ["100", "GB3WE"]
+
+
+def test_command_line_diff_options(tmp_path, monkeypatch):
+    left_file = write_sample(tmp_path / "left.csv", GD77_CSV)
+    monkeypatch.setattr(sys, "argv", ["converter", "diff", left_file, left_file, "-", "--lenient"])
+    with pytest.raises(ValueError, match="--lenient"):
+        main()
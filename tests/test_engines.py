@@ -0,0 +1,126 @@
+import csv
+import io
+import pytest
+import opengd77_chirp_vectorized as vectorized
+from benchmarks.codeplug_generator import CodeplugGenerator
+from opengd77_chirp_csv_coverter import (compile_row_transformer, transform_channels, transform_stream, ENGINES,
+                                         CHIRP_FIELDNAMES, GD77_FIELDNAMES, RejectLog)
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+
+def convert(operation, content, engine):
+    outfile = io.StringIO(newline="")
+    transform_stream(operation, io.StringIO(content), outfile, 3, engine)
+    return outfile.getvalue()
+
+
+@pytest.mark.parametrize("operation, content", [("gd77", CHIRP_CSV), ("chirp", GD77_CSV)])
+def test_engines_are_byte_identical(operation, content):
+    outputs = {engine: convert(operation, content, engine) for engine in ENGINES}
+    assert outputs["compiled"] == outputs["dict"] == outputs["batch"]
+
+
+def convert_where(operation, content, engine, where):
+    outfile = io.StringIO(newline="")
+    transform_stream(operation, io.StringIO(content), outfile, 3, engine, where=where)
+    return outfile.getvalue()
+
+
+def generated_codeplug(fieldnames, rows):
+    outfile = io.StringIO(newline="")
+    writer = csv.writer(outfile)
+    writer.writerow(fieldnames)
+    writer.writerows(rows)
+    return outfile.getvalue()
+
+
+@pytest.mark.parametrize("with_numpy", [True, False])
+def test_batch_engine_matches_on_generated_codeplugs(monkeypatch, with_numpy):
+    if with_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(vectorized, "numpy", None)
+    monkeypatch.setattr(vectorized, "BATCH_ROWS", 97)
+    gd77 = generated_codeplug(GD77_FIELDNAMES, CodeplugGenerator(3).gd77_rows(1000))
+    chirp = convert("chirp", gd77, "compiled")
+    assert convert("chirp", gd77, "batch") == chirp
+    # The CHIRP rows carry the DMR details in their comments
+    assert convert("gd77", chirp, "batch") == convert("gd77", chirp, "compiled")
+    chirp = generated_codeplug(CHIRP_FIELDNAMES, CodeplugGenerator(4).chirp_rows(1000))
+    assert convert("gd77", chirp, "batch") == convert("gd77", chirp, "compiled")
+
+
+def test_batch_engine_converts_blocks_with_invalid_rows_row_by_row(monkeypatch):
+    monkeypatch.setattr(vectorized, "BATCH_ROWS", 2)
+    rows = CHIRP_CSV.splitlines()
+    content = "\n".join([*rows[:3], rows[3].replace("145.", "abc."), *rows[4:]]) + "\n"
+    with pytest.raises(ValueError):
+        convert("gd77", content, "batch")
+    outputs = {}
+    for engine in ("compiled", "batch"):
+        outfile = io.StringIO(newline="")
+        rejects = io.StringIO(newline="")
+        transform_stream("gd77", io.StringIO(content), outfile, 3, engine, rejects=RejectLog(rejects, "gd77"))
+        outputs[engine] = outfile.getvalue(), rejects.getvalue()
+    assert outputs["batch"] == outputs["compiled"]
+    assert "abc." in outputs["batch"][1]
+
+
+def test_batch_engine_only_transforms_matching_and_changed_rows(tmp_path, monkeypatch):
+    transformed = []
+    transform_block = vectorized.BatchTransformer.transform_block
+    monkeypatch.setattr(vectorized.BatchTransformer, "transform_block",
+                        lambda self, block: transformed.extend(block) or transform_block(self, block))
+    monkeypatch.setattr(vectorized, "BATCH_ROWS", 2)
+    assert convert_where("gd77", CHIRP_CSV, "batch", "mode=dmr") == convert_where("gd77", CHIRP_CSV, "compiled",
+                                                                               "mode=dmr")
+    assert [cells[1] for cells in transformed] == ["GB7XX"]
+
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    output_file = str(tmp_path / "out.csv")
+    transform_channels("gd77", input_file, output_file, 0, engine="batch", incremental=True)
+    write_sample(tmp_path / "in.csv", CHIRP_CSV + "6,ADDED,145.300000,,,,88.5,88.5,023,NN,023,Tone->Tone,FM,12.50,,"
+                                                  "5W,,,,,\n")
+    transformed.clear()
+    transform_channels("gd77", input_file, output_file, 0, engine="batch", incremental=True)
+    assert [cells[1] for cells in transformed] == ["ADDED"]
+
+
+def test_batch_engine_screens_each_row_once(tmp_path, monkeypatch):
+    import opengd77_chirp_csv_coverter as converter
+    import opengd77_chirp_filter as row_filter
+    calls = []
+    row_key, compile_row_filter = converter.row_key, row_filter.compile_row_filter
+    monkeypatch.setattr(converter, "row_key", lambda cells: calls.append("key") or row_key(cells))
+
+    def counting_filter(*args):
+        matches = compile_row_filter(*args)
+        return lambda cells: calls.append("match") or matches(cells)
+
+    monkeypatch.setattr(row_filter, "compile_row_filter", counting_filter)
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    transform_channels("gd77", input_file, str(tmp_path / "out.csv"), 0, engine="batch", incremental=True,
+                       where="band=2m")
+    # Six rows are matched, and the four 2m rows are keyed
+    assert calls.count("match") == 6 and calls.count("key") == 4
+
+
+def test_engines_match_on_blank_and_ragged_rows():
+    content = CHIRP_CSV + "\n" + CHIRP_CSV.splitlines()[1] + ",extra\n"
+    assert convert("gd77", content, "compiled") == convert("gd77", content, "dict") == convert("gd77", content, "batch")
+
+
+def test_missing_column_falls_back_to_dict_engine():
+    content = "Location,Name,Frequency\n0,A,145.5\n"
+    with pytest.raises(KeyError):
+        convert("gd77", content, "compiled")
+
+
+def test_compile_row_transformer_requires_columns():
+    with pytest.raises(KeyError):
+        compile_row_transformer("chirp", ["Channel Number", "Channel Name"])
+
+
+def test_invalid_engine():
+    with pytest.raises(ValueError, match="Invalid engine"):
+        convert("gd77", CHIRP_CSV, "turbo")
@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+import pytest
+import opengd77_chirp_csv_coverter as converter
+from opengd77_chirp_csv_coverter import main, transform_channels
+from opengd77_chirp_fanout import parse_sinks, transform_fanout
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+
+def read_text(path):
+    with open(path, newline="") as infile:
+        return infile.read()
+
+
+def test_fanout_matches_chained_conversions(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    sinks = [("gd77", str(tmp_path / "gd77.csv")), ("chirp", str(tmp_path / "chirp.csv")),
+             ("jsonl", str(tmp_path / "channels.jsonl"))]
+    assert transform_fanout("gd77", input_file, sinks, 0) == 6
+
+    transform_channels("gd77", input_file, str(tmp_path / "expected_gd77.csv"), 0)
+    transform_channels("chirp", str(tmp_path / "expected_gd77.csv"), str(tmp_path / "expected_chirp.csv"), 0)
+    assert read_text(tmp_path / "gd77.csv") == read_text(tmp_path / "expected_gd77.csv")
+    assert read_text(tmp_path / "chirp.csv") == read_text(tmp_path / "expected_chirp.csv")
+
+    records = [json.loads(line) for line in read_text(tmp_path / "channels.jsonl").splitlines()]
+    assert [record["number"] for record in records] == list(range(6))
+    assert records[0]["name"] == "GB3WE" and records[0]["rx_hz"] == 145_775_000 and records[0]["tx_hz"] == 145_175_000
+    assert records[1]["type"] == "Digital" and records[1]["skip"] is True
+
+
+def test_input_is_parsed_once(tmp_path, monkeypatch):
+    calls = []
+    from_gd77 = converter.Channel.from_gd77
+    monkeypatch.setattr(converter.Channel, "from_gd77", lambda *cells: calls.append(cells[0]) or from_gd77(*cells))
+    monkeypatch.setattr("opengd77_chirp_fanout.FANOUT_BATCH_ROWS", 2)
+    input_file = write_sample(tmp_path / "in.csv", GD77_CSV)
+    sinks = [("chirp", str(tmp_path / "a.csv")), ("chirp", str(tmp_path / "b.csv")), ("jsonl", str(tmp_path / "c"))]
+    transform_fanout("chirp", input_file, sinks, 5, where="band=2m")
+    assert calls == ["GB3WE", "SIMPLEX", "CROSS1", "CROSS2"]
+    assert read_text(tmp_path / "a.csv") == read_text(tmp_path / "b.csv")
+    assert read_text(tmp_path / "a.csv").splitlines()[-1].startswith("8,CROSS2,")
+
+
+def test_failed_fanout_writes_no_output(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV + "6,BAD,abc,,,,,,,,,,FM,,,5W,,,,,\n")
+    sinks = [("gd77", str(tmp_path / "gd77.csv")), ("jsonl", str(tmp_path / "channels.jsonl"))]
+    with pytest.raises(ValueError, match="Line 8"):
+        transform_fanout("gd77", input_file, sinks, 0)
+    assert os.listdir(tmp_path) == ["in.csv"]
+
+
+@pytest.mark.parametrize("value", ["gd77", "csv:out.csv", "gd77:"])
+def test_invalid_sinks(value):
+    with pytest.raises(ValueError):
+        parse_sinks(value)
+
+
+def test_command_line_fanout(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    output_file = str(tmp_path / "Channels.csv")
+    jsonl_file = str(tmp_path / "channels.jsonl")
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, output_file, "--also=jsonl:" + jsonl_file])
+    main()
+    assert len(read_text(output_file).splitlines()) == 7
+    assert len(read_text(jsonl_file).splitlines()) == 6
@@ -0,0 +1,90 @@
+import csv
+import sys
+import pytest
+import opengd77_chirp_csv_coverter as converter
+from opengd77_chirp_csv_coverter import ConversionStats, LenientPolicy, main, reject_file_for, transform_channels
+from opengd77_chirp_filter import band_name, compile_row_filter, parse_where
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+CHIRP_HEADER = CHIRP_CSV.split("\n")[0].split(",")
+GD77_HEADER = GD77_CSV.split("\n")[0].split(",")
+
+
+def converted_names(tmp_path, operation, content, where, **options):
+    input_file = write_sample(tmp_path / "in.csv", content)
+    output_file = tmp_path / "out.csv"
+    transform_channels(operation, input_file, str(output_file), 0, where=where, **options)
+    with open(output_file, newline="") as infile:
+        rows = list(csv.reader(infile))
+    name = rows[0].index("Channel Name" if operation == "gd77" else "Name")
+    return [row[name] for row in rows[1:]]
+
+
+def test_band_name():
+    assert band_name(145_775_000) == "2m"
+    assert band_name(144_000_000) == "2m" and band_name(148_000_000) == "2m"
+    assert band_name(433_125_000) == "70cm"
+    assert band_name(160_000_000) == "other" and band_name(1_000) == "other"
+
+
+@pytest.mark.parametrize("where, expected", [
+    ("band=70cm", ["GB7XX", "DCSRPT"]),
+    ("band!=70cm", ["GB3WE", "SIMPLEX", "CROSS1", "CROSS2"]),
+    ("mode=DMR", ["GB7XX"]),
+    ("mode=fm,nfm;band=2m", ["GB3WE", "SIMPLEX", "CROSS1", "CROSS2"]),
+    ("type=analogue;tone=tone,dtcs", ["GB3WE", "DCSRPT"]),
+    ("tone=none,tsql", ["GB7XX", "SIMPLEX"]),
+    ("skip=yes", ["GB7XX"]),
+    ("band=2m;skip=no;tone!=cross", ["GB3WE", "SIMPLEX"]),
+])
+@pytest.mark.parametrize("operation, content", [("gd77", CHIRP_CSV), ("chirp", GD77_CSV)], ids=["gd77", "chirp"])
+def test_filters_match_in_both_formats(tmp_path, operation, content, where, expected):
+    assert converted_names(tmp_path, operation, content, where) == expected
+
+
+def test_rx_only(tmp_path):
+    chirp_csv = CHIRP_CSV.replace("0,GB3WE,145.775000,-,", "0,GB3WE,145.775000,off,")
+    assert converted_names(tmp_path, "gd77", chirp_csv, "rx_only=yes") == ["GB3WE"]
+    gd77_csv = GD77_CSV.replace("Disabled,P5,No,", "Disabled,P5,Yes,")
+    assert converted_names(tmp_path, "chirp", gd77_csv, "rx_only=no") == ["GB3WE", "GB7XX", "DCSRPT", "CROSS1",
+                                                                          "CROSS2"]
+
+
+def test_filtered_rows_are_not_transformed(tmp_path, monkeypatch):
+    calls = []
+    from_chirp = converter.Channel.from_chirp
+    monkeypatch.setattr(converter.Channel, "from_chirp", lambda *cells: calls.append(cells[0]) or from_chirp(*cells))
+    stats = ConversionStats()
+    assert converted_names(tmp_path, "gd77", CHIRP_CSV, "band=70cm", stats=stats) == ["GB7XX", "DCSRPT"]
+    assert calls == ["GB7XX", "DCSRPT"]
+    assert stats.rows == 2 and stats.filtered == 4
+
+
+def test_invalid_rows_are_kept_for_the_conversion(tmp_path):
+    chirp_csv = CHIRP_CSV + "6,BADFREQ,abc,,0.000000,,88.5,88.5,023,NN,023,Tone->Tone,FM,12.50,,5W,,,,,\n7,SHORT\n"
+    names = converted_names(tmp_path, "gd77", chirp_csv, "band=70cm", lenient=LenientPolicy())
+    assert names == ["GB7XX", "DCSRPT"]
+    with open(reject_file_for(str(tmp_path / "out.csv")), newline="") as infile:
+        assert [row[:2] for row in list(csv.reader(infile))[1:]] == [["8", "Frequency"], ["9", "Frequency"]]
+
+
+@pytest.mark.parametrize("expression", ["", "band", "colour=red", "band=3m", "skip=maybe", "type=", "tone=ctcss"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        parse_where(expression)
+
+
+def test_filter_needs_its_columns():
+    with pytest.raises(ValueError, match="Skip"):
+        compile_row_filter("skip=no", "gd77", [column for column in CHIRP_HEADER if column != "Skip"])
+    assert compile_row_filter("band=2m", "chirp", GD77_HEADER)(["1", "A", "Analogue", "145.5"] + [""] * 24)
+
+
+def test_command_line_filter(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", GD77_CSV)
+    output_file = str(tmp_path / "out.csv")
+    monkeypatch.setattr(sys, "argv", ["converter", "chirp", input_file, output_file, "5", "--where=Mode=NFM"])
+    main()
+    with open(output_file, newline="") as infile:
+        assert [(row["Location"], row["Name"]) for row in csv.DictReader(infile)] == [("5", "SIMPLEX"),
+                                                                                     ("6", "CROSS2")]
@@ -0,0 +1,100 @@
+import csv
+import random
+import sys
+import pytest
+from opengd77_chirp_csv_coverter import main, transform_channels
+from opengd77_chirp_geo import ChannelSelection, GridIndex, haversine_km, parse_route, selection_from_options
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+LONDON = (51.5, -0.12)
+MANCHESTER = (53.48, -2.24)
+
+
+def converted_names(tmp_path, select, start_channel=0):
+    input_file = write_sample(tmp_path / "in.csv", GD77_CSV)
+    output_file = tmp_path / "out.csv"
+    transform_channels("chirp", input_file, str(output_file), start_channel, select=select)
+    with open(output_file, newline="") as infile:
+        return [(row["Location"], row["Name"]) for row in csv.DictReader(infile)]
+
+
+def test_haversine_km():
+    assert haversine_km(*LONDON, *LONDON) == 0
+    assert haversine_km(*LONDON, *MANCHESTER) == pytest.approx(262.5, abs=1)
+    assert haversine_km(0, 179.9, 0, -179.9) == pytest.approx(22.2, abs=0.1)
+
+
+def test_within_radius_is_nearest_first(tmp_path):
+    assert converted_names(tmp_path, ChannelSelection(near=LONDON, radius_km=100)) == [("0", "GB3WE"), ("1", "GB7XX")]
+
+
+def test_nearest_skips_channels_without_location(tmp_path):
+    # SIMPLEX, CROSS1 and CROSS2 have 'Use Location' set to 'No'
+    selection = ChannelSelection(near=(0.128, 0.008), count=2)
+    assert converted_names(tmp_path, selection, 10) == [("10", "GB3WE"), ("11", "GB7XX")]
+
+
+def test_route_keeps_route_order(tmp_path):
+    selection = ChannelSelection(route=[MANCHESTER, LONDON], count=2)
+    assert converted_names(tmp_path, selection) == [("0", "DCSRPT"), ("1", "GB3WE")]
+    selection = ChannelSelection(route=[LONDON, MANCHESTER], radius_km=50)
+    assert converted_names(tmp_path, selection) == [("0", "GB3WE"), ("1", "DCSRPT")]
+
+
+@pytest.mark.parametrize("center", [(0, 0), (51.5, -0.12), (10, 179.8), (-20, -179.9), (89.7, 40), (-89.9, -10)])
+def test_grid_index_matches_a_full_scan(center):
+    generator = random.Random(77)
+    points = [(generator.uniform(-90, 90), generator.uniform(-180, 180)) for _ in range(2000)]
+    points += [(center[0] + generator.uniform(-2, 2) if abs(center[0]) < 88 else center[0],
+                (center[1] + generator.uniform(-2, 2) + 180) % 360 - 180) for _ in range(500)]
+    index = GridIndex(points)
+    for radius in (10, 150, 2500):
+        expected = sorted((haversine_km(*center, *point), position) for position, point in enumerate(points)
+                          if haversine_km(*center, *point) <= radius)
+        assert index.within(*center, radius) == expected
+    expected = sorted((haversine_km(*center, *point), position) for position, point in enumerate(points))
+    assert index.nearest(*center, 25) == expected[:25]
+
+
+def test_near_route_matches_a_full_scan():
+    generator = random.Random(8)
+    points = [(generator.uniform(50, 56), generator.uniform(-5, 2)) for _ in range(3000)]
+    route = [LONDON, (52.45, -1.9), MANCHESTER]
+    index = GridIndex(points)
+    hits = index.near_route(route, count=40)
+    distances = sorted(hit[1] for hit in index.near_route(route, max_km=1000))
+    assert sorted(hit[1] for hit in hits) == distances[:40]
+    assert [hit[0] for hit in hits] == sorted(hit[0] for hit in hits)
+    assert all(hit[1] <= 5 for hit in index.near_route(route, max_km=5))
+
+
+def test_parse_route_file(tmp_path):
+    route_file = write_sample(tmp_path / "route.txt", "# London to Manchester\n51.5,-0.12\n\n53.48,-2.24\n")
+    assert parse_route("@" + route_file) == [LONDON, MANCHESTER]
+    assert parse_route("51.5,-0.12;53.48,-2.24") == [LONDON, MANCHESTER]
+
+
+@pytest.mark.parametrize("options", [{"radius": "10"}, {"near": "51.5,-0.12"}, {"near": "51.5"},
+                                     {"near": "91,0", "radius": "10"}, {"near": "51.5,-0.12", "nearest": "0"},
+                                     {"near": True, "radius": "10"},
+                                     {"near": "51.5,-0.12", "route": "51.5,-0.12", "radius": "10"}])
+def test_invalid_selection_options(options):
+    with pytest.raises(ValueError):
+        selection_from_options(options)
+
+
+def test_selection_needs_coordinates(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    with pytest.raises(ValueError, match="Latitude"):
+        transform_channels("gd77", input_file, str(tmp_path / "out.csv"), 0,
+                           select=ChannelSelection(near=LONDON, radius_km=10))
+
+
+def test_command_line_selection(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", GD77_CSV)
+    output_file = str(tmp_path / "out.csv")
+    monkeypatch.setattr(sys, "argv", ["converter", "chirp", input_file, output_file, "--near=53.4,-2.2",
+                                      "--nearest=1"])
+    main()
+    with open(output_file, newline="") as infile:
+        assert [row["Name"] for row in csv.DictReader(infile)] == ["DCSRPT"]
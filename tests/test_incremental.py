@@ -0,0 +1,83 @@
+import json
+import logging
+import pytest
+import opengd77_chirp_csv_coverter as converter
+from opengd77_chirp_csv_coverter import row_manifest_file_for, transform_channels
+from tests.sample_data import CHIRP_CSV, write_sample
+
+LINES = CHIRP_CSV.strip().split("\n")
+
+
+@pytest.fixture
+def parsed_rows(monkeypatch):
+    """Count the rows parsed by Channel.from_chirp."""
+    calls = []
+    from_chirp = converter.Channel.from_chirp
+
+    def counting_from_chirp(*cells):
+        calls.append(cells[0])
+        return from_chirp(*cells)
+
+    monkeypatch.setattr(converter.Channel, "from_chirp", counting_from_chirp)
+    return calls
+
+
+def convert(tmp_path, lines, incremental=True):
+    input_file = write_sample(tmp_path / "in.csv", "\n".join(lines) + "\n")
+    output_file = str(tmp_path / ("out.csv" if incremental else "expected.csv"))
+    transform_channels("gd77", input_file, output_file, 0, incremental=incremental)
+    return output_file
+
+
+def test_first_run_writes_manifest(tmp_path, parsed_rows):
+    output_file = convert(tmp_path, LINES)
+    manifest = json.loads(open(row_manifest_file_for(output_file)).read())
+    assert len(manifest["rows"]) == 6 and manifest["header"] == LINES[0].split(",")
+    assert manifest["version"] == converter.__version__
+    assert len(parsed_rows) == 6
+
+
+def test_unchanged_input_is_skipped(tmp_path, parsed_rows, caplog):
+    output_file = convert(tmp_path, LINES)
+    with caplog.at_level(logging.INFO):
+        convert(tmp_path, LINES)
+    assert "skipping" in caplog.text
+    assert len(parsed_rows) == 6
+    assert open(output_file).read() == open(convert(tmp_path, LINES, incremental=False)).read()
+
+
+def test_only_changed_rows_are_converted(tmp_path, parsed_rows):
+    convert(tmp_path, LINES)
+    del parsed_rows[:]
+    changed = [LINES[0], LINES[1].replace("GB3WE", "GB3WX"), *LINES[3:], LINES[2], "9,NEW,145.300000,,,,,,,,,,FM,,,5W"]
+    output_file = convert(tmp_path, changed)
+    assert parsed_rows == ["GB3WX", "NEW"]
+    assert open(output_file).read() == open(convert(tmp_path, changed, incremental=False)).read()
+
+
+def test_changed_defaults_invalidate_the_cache(tmp_path, parsed_rows, monkeypatch):
+    convert(tmp_path, LINES)
+    monkeypatch.setitem(converter.GD77_DEFAULT_VALUES, converter.TOT, "180")
+    convert(tmp_path, LINES[:-1])
+    assert len(parsed_rows) == 11
+
+
+def test_changed_version_invalidates_the_cache(tmp_path, parsed_rows, monkeypatch):
+    convert(tmp_path, LINES)
+    monkeypatch.setattr(converter, "__version__", "0.0.1")
+    convert(tmp_path, LINES)
+    assert len(parsed_rows) == 12
+
+
+def test_edited_output_invalidates_the_cache(tmp_path, parsed_rows):
+    output_file = convert(tmp_path, LINES)
+    with open(output_file, "a") as outfile:
+        outfile.write("edited\n")
+    convert(tmp_path, LINES)
+    assert len(parsed_rows) == 12
+    assert "edited" not in open(output_file).read()
+
+
+def test_incremental_needs_files(monkeypatch):
+    with pytest.raises(ValueError, match="Incremental"):
+        transform_channels("gd77", "-", "out.csv", 0, incremental=True)
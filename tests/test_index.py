@@ -0,0 +1,82 @@
+import csv
+import json
+import os
+import sys
+import pytest
+import opengd77_chirp_index as row_index
+from opengd77_chirp_csv_coverter import main, transform_channels
+from opengd77_chirp_index import build_index, index_file_for, load_index, parse_row_range
+from tests.sample_data import CHIRP_CSV, write_sample
+
+CHIRP_HEADER, *CHIRP_ROWS = CHIRP_CSV.splitlines()
+
+
+def numbered_rows(count):
+    """CHIRP rows with quoted names holding newlines and blank lines between them."""
+    rows = []
+    for number in range(count):
+        cells = CHIRP_ROWS[number % len(CHIRP_ROWS)].split(",")
+        cells[1] = f'"CH{number}\nline ""2"""'
+        rows.append(",".join(cells) + ("\r\n\r\n" if number % 7 == 0 else "\r\n"))
+    return CHIRP_HEADER + "\r\n" + "".join(rows)
+
+
+def converted(path):
+    with open(path, newline="") as infile:
+        return list(csv.reader(infile))
+
+
+@pytest.mark.parametrize("row_range", [(1, 1), (4, 9), (10, 12), (25, 40), (40, 60), (41, 41)])
+def test_range_matches_a_slice_of_the_full_conversion(tmp_path, monkeypatch, row_range):
+    monkeypatch.setattr(row_index, "INDEX_INTERVAL", 5)
+    input_file = write_sample(tmp_path / "in.csv", numbered_rows(40))
+    transform_channels("gd77", input_file, str(tmp_path / "all.csv"), 3)
+    transform_channels("gd77", input_file, str(tmp_path / "range.csv"), 3, row_range=row_range)
+    header, *rows = converted(tmp_path / "all.csv")
+    first, last = row_range
+    assert converted(tmp_path / "range.csv") == [header, *rows[first - 1:last]]
+
+
+def test_index_records_every_interval(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", numbered_rows(12))
+    index = build_index(input_file, interval=5)
+    assert index["rows"] == 12 and len(index["offsets"]) == 3
+    with open(input_file, "rb") as infile:
+        data = infile.read()
+    assert data[index["offsets"][1]:].startswith(b'5,"CH5')
+    assert data[:index["header_end"]].decode() == CHIRP_HEADER + "\r\n"
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", numbered_rows(12))
+    transform_channels("gd77", input_file, str(tmp_path / "out.csv"), 0, row_range=(2, 3))
+    assert load_index(input_file)["rows"] == 12
+    write_sample(input_file, numbered_rows(20))
+    os.utime(input_file, ns=(0, 0))
+    assert load_index(input_file) is None
+    transform_channels("gd77", input_file, str(tmp_path / "out.csv"), 0, row_range=(19, 19))
+    assert converted(tmp_path / "out.csv")[1][:2] == ["19", "CH18\nline \"2\""]
+    with open(index_file_for(input_file)) as infile:
+        assert json.load(infile)["rows"] == 20
+
+
+def test_invalid_ranges(tmp_path):
+    for value in ("5", "0-3", "9-2", "a-b"):
+        with pytest.raises(ValueError, match="Invalid range"):
+            parse_row_range(value)
+    input_file = write_sample(tmp_path / "in.csv.gz", "")
+    with pytest.raises(ValueError, match="File not found"):
+        transform_channels("gd77", str(tmp_path / "missing.csv"), str(tmp_path / "out.csv"), 0, row_range=(1, 2))
+    with pytest.raises(ValueError, match="incremental|Incremental"):
+        transform_channels("gd77", input_file, str(tmp_path / "out.csv"), 0, incremental=True, row_range=(1, 2))
+
+
+def test_command_line_range(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    output_file = str(tmp_path / "out.csv")
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, output_file, "0", "--range=2-3"])
+    main()
+    assert [row[:2] for row in converted(output_file)[1:]] == [["2", "GB7XX"], ["3", "SIMPLEX"]]
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, output_file, "--range=2-3", "--parallel"])
+    with pytest.raises(ValueError, match="ranged"):
+        main()
@@ -0,0 +1,93 @@
+import csv
+import logging
+import sys
+import pytest
+from opengd77_chirp_csv_coverter import (ConversionStats, ErrorBudgetExceeded, LenientPolicy, main, reject_file_for,
+                                         transform_channels, CHANNEL_NUMBER, NUMBERING_COMPACT)
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+HEADER, _, BODY = CHIRP_CSV.partition("\n")
+BAD_OFFSET = "7,BADOFF,145.600000,-,abc,,88.5,88.5,023,NN,023,Tone->Tone,FM,12.50,,50W,,,,,"
+BAD_POWER = "8,BADPWR,145.600000,,0.000000,,88.5,88.5,023,NN,023,Tone->Tone,FM,12.50,,lots,,,,,"
+SHORT_ROW = "9,SHORT,145.600000"
+DIRTY_CHIRP_CSV = "\n".join([HEADER, BAD_OFFSET, BODY.strip(), BAD_POWER, SHORT_ROW]) + "\n"
+
+
+def read_rows(path):
+    with open(path, newline="") as infile:
+        return list(csv.reader(infile))
+
+
+def test_lenient_conversion_writes_rejects(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", DIRTY_CHIRP_CSV)
+    output_file = str(tmp_path / "out.csv")
+    stats = ConversionStats()
+    transform_channels("gd77", input_file, output_file, 0, stats=stats, lenient=LenientPolicy())
+
+    rejects = read_rows(reject_file_for(output_file))
+    assert rejects[0][:4] == ["Line", "Column", "Reason", "Location"]
+    assert [row[:2] for row in rejects[1:]] == [["2", "Offset"], ["9", "Power"], ["10", "Duplex"]]
+    assert rejects[1][2].startswith("ValueError")
+    assert rejects[1][3:] == BAD_OFFSET.split(",")
+    assert rejects[3][2] == "row has 3 of 21 columns"
+    assert stats.rows == 6 and stats.errors == 3
+
+
+def test_lenient_numbering(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", DIRTY_CHIRP_CSV)
+    transform_channels("gd77", input_file, str(tmp_path / "skip.csv"), 0, lenient=LenientPolicy())
+    transform_channels("gd77", input_file, str(tmp_path / "compact.csv"), 0,
+                       lenient=LenientPolicy(numbering=NUMBERING_COMPACT))
+    with open(tmp_path / "skip.csv", newline="") as infile:
+        assert [row[CHANNEL_NUMBER] for row in csv.DictReader(infile)] == ["2", "3", "4", "5", "6", "7"]
+    with open(tmp_path / "compact.csv", newline="") as infile:
+        assert [row[CHANNEL_NUMBER] for row in csv.DictReader(infile)] == ["1", "2", "3", "4", "5", "6"]
+
+
+def test_lenient_chirp_rejects_unknown_tone(tmp_path):
+    bad_tone = GD77_CSV.splitlines()[1].replace("88.5,88.5", "88.5,12.x")
+    input_file = write_sample(tmp_path / "in.csv", GD77_CSV + bad_tone + "\n")
+    reject_file = str(tmp_path / "bad.csv")
+    transform_channels("chirp", input_file, str(tmp_path / "out.csv"), 0, lenient=LenientPolicy(reject_file))
+    assert [row[:2] for row in read_rows(reject_file)[1:]] == [["8", "TX Tone"]]
+
+
+def test_error_budget_stops_without_output(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", DIRTY_CHIRP_CSV)
+    output_file = tmp_path / "out.csv"
+    with pytest.raises(ErrorBudgetExceeded):
+        transform_channels("gd77", input_file, str(output_file), 0, lenient=LenientPolicy(max_errors=2))
+    assert not output_file.exists()
+    assert len(read_rows(reject_file_for(str(output_file)))) == 4
+
+
+def test_reject_logging_is_limited(tmp_path, caplog):
+    input_file = write_sample(tmp_path / "in.csv", HEADER + "\n" + (BAD_POWER + "\n") * 50)
+    with caplog.at_level(logging.WARNING):
+        transform_channels("gd77", input_file, str(tmp_path / "out.csv"), 0, lenient=LenientPolicy())
+    assert len(caplog.records) < 15
+    assert "Rejected 50 rows" in caplog.records[-1].getMessage()
+
+
+def test_strict_conversion_still_stops(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", DIRTY_CHIRP_CSV)
+    with pytest.raises(ValueError):
+        transform_channels("gd77", input_file, str(tmp_path / "out.csv"), 0)
+
+
+def test_main_lenient_options(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", DIRTY_CHIRP_CSV)
+    reject_file = tmp_path / "rejects.csv"
+    monkeypatch.setattr(sys, "argv", ["prog", "gd77", input_file, str(tmp_path / "out.csv"), "0",
+                                      f"--rejects={reject_file}", "--numbering=compact"])
+    main()
+    assert len(read_rows(reject_file)) == 4
+    assert len(read_rows(tmp_path / "out.csv")) == 7
+
+
+def test_main_rejects_invalid_numbering(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    monkeypatch.setattr(sys, "argv", ["prog", "gd77", input_file, str(tmp_path / "out.csv"), "0",
+                                      "--lenient", "--numbering=sparse"])
+    with pytest.raises(ValueError, match="Invalid numbering"):
+        main()
@@ -0,0 +1,73 @@
+import csv
+import io
+import sys
+import pytest
+from opengd77_chirp_csv_coverter import ConversionStats, main, transform_channels
+from opengd77_chirp_parallel import count_records, iter_record_boundaries, split_chunks, transform_channels_parallel
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+
+def test_record_boundaries_skip_quoted_newlines():
+    data = b'a,"b\nc",d\ne,"f ""\n"" g"\nh,i\n'
+    assert list(iter_record_boundaries(data, 0, 0)) == [10, 24, len(data)]
+
+
+def test_record_boundaries_treat_mid_field_quotes_as_text():
+    data = b'5" dish,x\n"a\nb",c\n'
+    assert list(iter_record_boundaries(data, 0, 0)) == [10, len(data)]
+
+
+def test_split_chunks_cover_the_data():
+    data = b"h\n" + b"".join(b'%d,"x\ny"\n' % i for i in range(50))
+    chunks = split_chunks(data, 2, 16)
+    assert chunks[0][0] == 2 and chunks[-1][1] == len(data)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(chunks, chunks[1:]))
+    assert all(data[end - 3:end] == b'y"\n' for _, end in chunks)
+
+
+@pytest.mark.parametrize("data", [b'a,"b\n\nc"\n\nd\r\n\r\ne', b"a\n\n", b'"x\r\n",y\r\n\r\n\r\n', b""])
+def test_count_records_matches_csv_reader(data):
+    rows = [cells for cells in csv.reader(io.StringIO(data.decode(), newline="")) if cells]
+    assert count_records(data, 0, len(data)) == len(rows)
+    # Counting stops at the end of the range
+    assert count_records(data + b"more,rows\n", 0, len(data)) == len(rows)
+
+
+@pytest.mark.parametrize("operation, content", [("gd77", CHIRP_CSV), ("chirp", GD77_CSV)])
+def test_parallel_output_matches_sequential(tmp_path, operation, content):
+    header, _, body = content.partition("\n")
+    rows = body.strip().split("\n")
+    # Repeat the sample with blank lines and a quoted multi-line name to exercise the chunk boundaries
+    quoted = rows[0].replace(rows[0].split(",")[1], '"Multi\nLine, ""Name"""', 1)
+    lines = [header] + (rows + ["", quoted]) * 40
+    input_file = write_sample(tmp_path / "input.csv", "\n".join(lines) + "\n")
+
+    transform_channels(operation, input_file, str(tmp_path / "sequential.csv"), 7)
+    stats = ConversionStats()
+    transform_channels_parallel(operation, input_file, str(tmp_path / "parallel.csv"), 7, max_workers=2,
+                                stats=stats, chunk_bytes=300)
+
+    assert (tmp_path / "parallel.csv").read_bytes() == (tmp_path / "sequential.csv").read_bytes()
+    assert stats.rows == len(rows) * 40 + 40
+
+
+def test_parallel_errors_leave_no_output(tmp_path):
+    header, _, body = CHIRP_CSV.partition("\n")
+    input_file = write_sample(tmp_path / "input.csv", header + "\n" + body * 20 + "0,bad,abc\n")
+    output_file = tmp_path / "out.csv"
+    with pytest.raises(ValueError):
+        transform_channels("gd77", input_file, str(output_file), 0)
+    with pytest.raises(ValueError):
+        transform_channels_parallel("gd77", input_file, str(output_file), 0, max_workers=2, chunk_bytes=200)
+    assert not output_file.exists()
+    assert [path.name for path in tmp_path.iterdir()] == ["input.csv"]
+
+
+def test_main_parallel_option(tmp_path, monkeypatch):
+    header, _, body = CHIRP_CSV.partition("\n")
+    input_file = write_sample(tmp_path / "input.csv", header + "\n" + body * 10)
+    output_file = tmp_path / "out.csv"
+    monkeypatch.setattr(sys, "argv", ["prog", "gd77", input_file, str(output_file), "0", "--parallel", "--jobs=2"])
+    main()
+    transform_channels("gd77", input_file, str(tmp_path / "expected.csv"), 0)
+    assert output_file.read_bytes() == (tmp_path / "expected.csv").read_bytes()
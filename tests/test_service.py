@@ -0,0 +1,78 @@
+import io
+import json
+import threading
+import pytest
+from opengd77_chirp_client import (ServiceUnavailable, convert_file, convert_via_service, request, HEALTH_PATH,
+                                   METRICS_PATH)
+from opengd77_chirp_csv_coverter import transform_stream
+from opengd77_chirp_service import create_server
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+
+def convert_locally(operation, csv_text, start_channel):
+    outfile = io.StringIO(newline="")
+    transform_stream(operation, io.StringIO(csv_text, newline=""), outfile, start_channel)
+    return outfile.getvalue()
+
+
+@pytest.fixture(params=["tcp", "unix"])
+def service(request, tmp_path):
+    """Run the service in a background thread and return the client connection arguments."""
+    socket_path = str(tmp_path / "converter.sock") if request.param == "unix" else None
+    server = create_server(socket_path, port=0, workers=2, queue_size=4)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield {"socket_path": socket_path, "port": server.server_address[1] if socket_path is None else None}
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("operation, content", [("gd77", CHIRP_CSV), ("chirp", GD77_CSV)], ids=["gd77", "chirp"])
+def test_service_matches_in_process_conversion(service, operation, content):
+    assert convert_via_service(operation, content, 5, **service) == convert_locally(operation, content, 5)
+
+
+def test_service_reports_conversion_errors(service):
+    with pytest.raises(ValueError, match="KeyError"):
+        convert_via_service("gd77", "Location,Name\n0,x\n", **service)
+
+
+def test_service_rejects_unknown_operations(service):
+    status, body = request("POST", "/convert/icom", **service)
+    assert status == 404 and b"/convert/gd77" in body
+
+
+def test_service_health_and_metrics(service):
+    convert_via_service("gd77", CHIRP_CSV, **service)
+    status, body = request("GET", HEALTH_PATH, **service)
+    assert status == 200 and json.loads(body)["status"] == "ok"
+    status, body = request("GET", METRICS_PATH, **service)
+    metrics = json.loads(body)
+    assert metrics["conversions"] == 1 and metrics["rows"] == 6 and metrics["workers"] == 2
+
+
+def test_service_handles_concurrent_requests(service):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(convert_via_service("gd77", CHIRP_CSV, **service)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [convert_locally("gd77", CHIRP_CSV, 0)] * 4
+
+
+def test_client_falls_back_to_in_process_conversion(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    with pytest.raises(ServiceUnavailable):
+        convert_via_service("gd77", CHIRP_CSV, socket_path=str(tmp_path / "missing.sock"))
+    convert_file("gd77", input_file, str(tmp_path / "out.csv"), 3, socket_path=str(tmp_path / "missing.sock"))
+    with open(tmp_path / "out.csv", newline="") as outfile:
+        assert outfile.read() == convert_locally("gd77", CHIRP_CSV, 3)
+
+
+def test_client_uses_service(service, tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", GD77_CSV)
+    convert_file("chirp", input_file, str(tmp_path / "out.csv"), 0, **service)
+    with open(tmp_path / "out.csv", newline="") as outfile:
+        assert outfile.read() == convert_locally("chirp", GD77_CSV, 0)
@@ -0,0 +1,79 @@
+import csv
+import os
+import sys
+import pytest
+from opengd77_chirp_csv_coverter import main, transform_channels
+from opengd77_chirp_shard import ZONE_COLUMNS, compile_shard_key, check_capacity, transform_sharded
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+
+def read_rows(path):
+    with open(path, newline="") as infile:
+        return list(csv.reader(infile))
+
+
+def test_shards_by_band(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    counts = transform_sharded("gd77", input_file, str(tmp_path / "out"), 0, "band")
+    assert counts == {"2m-1.csv": 4, "70cm-1.csv": 2}
+    assert sorted(os.listdir(tmp_path / "out")) == ["2m-1.csv", "2m-1.zones.csv", "70cm-1.csv", "70cm-1.zones.csv"]
+
+    # Each file is numbered as a conversion of the group's rows on their own
+    transform_channels("gd77", input_file, str(tmp_path / "all.csv"), 0, where="band=2m")
+    assert read_rows(tmp_path / "out" / "2m-1.csv") == read_rows(tmp_path / "all.csv")
+    zones = read_rows(tmp_path / "out" / "2m-1.zones.csv")
+    assert zones[0] == list(ZONE_COLUMNS)
+    assert zones[1] == ["2m 1", "GB3WE", "SIMPLEX", "CROSS1", "CROSS2"]
+
+
+def test_full_files_and_zones_roll_over(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", GD77_CSV)
+    counts = transform_sharded("chirp", input_file, str(tmp_path), 5, "mode", shard_channels=3, zone_channels=2)
+    assert counts == {"Analogue-1.csv": 3, "Analogue-2.csv": 2, "Digital-1.csv": 1}
+    assert [row[:2] for row in read_rows(tmp_path / "Analogue-2.csv")[1:]] == [["5", "CROSS1"], ["6", "CROSS2"]]
+    assert [row[:3] for row in read_rows(tmp_path / "Analogue-1.zones.csv")[1:]] == [
+        ["Analogue 1", "GB3WE", "SIMPLEX"], ["Analogue 2", "DCSRPT"]]
+    assert [row[:3] for row in read_rows(tmp_path / "Analogue-2.zones.csv")[1:]] == [
+        ["Analogue 3", "CROSS1", "CROSS2"]]
+
+
+def test_evicted_files_are_reopened(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    transform_sharded("gd77", input_file, str(tmp_path / "open"), 0, "prefix:2", 2, 1)
+    monkeypatch.setattr("opengd77_chirp_shard.MAX_OPEN_FILES", 1)
+    transform_sharded("gd77", input_file, str(tmp_path / "evicted"), 0, "prefix:2", 2, 1)
+    names = sorted(os.listdir(tmp_path / "open"))
+    assert names == sorted(os.listdir(tmp_path / "evicted"))
+    assert "GB-1.csv" in names and "CR-1.zones.csv" in names
+    for name in names:
+        assert read_rows(tmp_path / "open" / name) == read_rows(tmp_path / "evicted" / name)
+
+
+def test_failed_sharding_writes_no_files(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV + "6,BAD,abc,,,,,,,,,,FM,,,5W,,,,,\n")
+    with pytest.raises(ValueError, match="Line 8"):
+        transform_sharded("gd77", input_file, str(tmp_path / "out"), 0, "band")
+    assert os.listdir(tmp_path / "out") == []
+
+
+@pytest.mark.parametrize("key", ["frequency", "band:2", "prefix:0", "prefix:x"])
+def test_invalid_keys(key):
+    with pytest.raises(ValueError):
+        compile_shard_key(key)
+
+
+@pytest.mark.parametrize("shard_channels, zone_channels", [(0, 80), (1025, 80), (1024, 0), (1024, 81), (1024, 10)])
+def test_capacity_beyond_the_radio(shard_channels, zone_channels):
+    with pytest.raises(ValueError):
+        check_capacity(shard_channels, zone_channels)
+
+
+def test_command_line_sharding(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    output_dir = str(tmp_path / "out")
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, output_dir, "--shard=prefix", "--shard-size=1"])
+    main()
+    assert len(os.listdir(output_dir)) == 12
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, output_dir, "--shard=band", "--parallel"])
+    with pytest.raises(ValueError, match="--parallel"):
+        main()
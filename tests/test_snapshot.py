@@ -0,0 +1,97 @@
+import csv
+import os
+import struct
+import sys
+import pytest
+from opengd77_chirp_csv_coverter import main, transform_channels
+from opengd77_chirp_snapshot import HEADER, Snapshot, convert_snapshot, write_snapshot
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+DMR_ROW = "6,DMR \\| 1,439.400000,-,9.000000,,88.5,88.5,023,NN,023,Tone->Tone,DMR,12.50,,5W,DMR1|2341|UK|3|1|TG 9,,,,\n"
+
+
+def read_file(path):
+    with open(path, newline="") as infile:
+        return infile.read()
+
+
+@pytest.mark.parametrize("content, operation", [
+    (CHIRP_CSV + DMR_ROW, "gd77"),
+    (GD77_CSV, "chirp"),
+])
+def test_snapshot_converts_like_the_codeplug(tmp_path, content, operation):
+    input_file = write_sample(tmp_path / "in.csv", content)
+    snapshot_file = str(tmp_path / "channels.snap")
+    assert write_snapshot(input_file, snapshot_file) == len(content.splitlines()) - 1
+    transform_channels(operation, input_file, str(tmp_path / "expected.csv"), 5)
+    assert convert_snapshot(operation, snapshot_file, str(tmp_path / "out.csv"), 5) == len(content.splitlines()) - 1
+    assert read_file(tmp_path / "out.csv") == read_file(tmp_path / "expected.csv")
+
+
+def test_records_and_strings_are_read_individually(tmp_path):
+    snapshot_file = str(tmp_path / "channels.snap")
+    write_snapshot(write_sample(tmp_path / "in.csv", GD77_CSV), snapshot_file)
+    with Snapshot(snapshot_file) as snapshot:
+        assert len(snapshot) == 6
+        record = snapshot.record(1)
+        assert (record.rx_hz, record.tx_hz, record.skip) == (439_600_000, 432_000_000, 1)
+        assert snapshot.string(record.contact) == "TG 235" and snapshot.string(0) == ""
+        # Repeated strings are stored once
+        assert snapshot.strings.count("None") == 1
+        assert snapshot.channel(4) == list(snapshot)[4]
+        assert snapshot.channel(4).tx_tone.cell == "D023I"
+        with pytest.raises(IndexError):
+            snapshot.record(6)
+
+
+def test_failed_conversion_raises_the_original_error(tmp_path):
+    snapshot_file = str(tmp_path / "channels.snap")
+    write_snapshot(write_sample(tmp_path / "in.csv", GD77_CSV.replace(",100.0,", ",1x.5,")), snapshot_file)
+    with pytest.raises(ValueError, match="1x.5"):
+        convert_snapshot("chirp", snapshot_file, str(tmp_path / "out.csv"), 0)
+
+
+def test_overwritten_snapshot_keeps_its_permissions(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", GD77_CSV)
+    snapshot_file = str(tmp_path / "channels.snap")
+    write_snapshot(input_file, snapshot_file)
+    os.chmod(snapshot_file, 0o600)
+    write_snapshot(input_file, snapshot_file)
+    assert os.stat(snapshot_file).st_mode & 0o777 == 0o600
+    with Snapshot(snapshot_file) as snapshot:
+        assert len(snapshot) == 6
+    with pytest.raises(ValueError, match="stdout"):
+        write_snapshot(input_file, "-")
+
+
+def test_invalid_snapshots(tmp_path):
+    with pytest.raises(ValueError, match="not a snapshot"):
+        Snapshot(write_sample(tmp_path / "in.csv", GD77_CSV))
+    with pytest.raises(ValueError, match="not a snapshot"):
+        Snapshot(write_sample(tmp_path / "empty.snap", ""))
+    snapshot_file = str(tmp_path / "channels.snap")
+    write_snapshot(write_sample(tmp_path / "in.csv", GD77_CSV), snapshot_file)
+    with open(snapshot_file, "r+b") as snapshot:
+        snapshot.seek(struct.calcsize("<8s"))
+        snapshot.write(struct.pack("<H", 99))
+    with pytest.raises(ValueError, match="version 99"):
+        Snapshot(snapshot_file)
+    with open(snapshot_file, "r+b") as snapshot:
+        snapshot.truncate(HEADER.size + 10)
+    with pytest.raises(ValueError):
+        Snapshot(snapshot_file)
+
+
+def test_command_line_snapshot(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    snapshot_file = str(tmp_path / "channels.snap")
+    monkeypatch.setattr(sys, "argv", ["converter", "snapshot", input_file, snapshot_file])
+    main()
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", snapshot_file, str(tmp_path / "out.csv"), "10"])
+    main()
+    with open(tmp_path / "out.csv", newline="") as infile:
+        rows = list(csv.DictReader(infile))
+    assert [(row["Channel Number"], row["Channel Name"]) for row in rows[:2]] == [("11", "GB3WE"), ("12", "GB7XX")]
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", snapshot_file, str(tmp_path / "out.csv"), "--sort=name"])
+    with pytest.raises(ValueError, match="--sort"):
+        main()
@@ -0,0 +1,82 @@
+import csv
+import os
+import random
+import sys
+import pytest
+from opengd77_chirp_csv_coverter import main, transform_channels
+from opengd77_chirp_sort import ChannelSort, compile_sort_key
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+CHIRP_HEADER = CHIRP_CSV.split("\n")[0].split(",")
+AIRBAND_ROW = "6,AIRBAND,160.000000,,0.000000,,88.5,88.5,023,NN,023,Tone->Tone,FM,12.50,,5W,,,,,\n"
+
+
+def converted_rows(tmp_path, operation, content, sort):
+    input_file = write_sample(tmp_path / "in.csv", content)
+    output_file = tmp_path / "out.csv"
+    transform_channels(operation, input_file, str(output_file), 0, select=sort)
+    with open(output_file, newline="") as infile:
+        return [row[:2] for row in list(csv.reader(infile))[1:]]
+
+
+@pytest.mark.parametrize("key, expected", [
+    ("frequency", ["SIMPLEX", "CROSS1", "CROSS2", "GB3WE", "AIRBAND", "DCSRPT", "GB7XX"]),
+    ("band", ["SIMPLEX", "CROSS1", "CROSS2", "GB3WE", "DCSRPT", "GB7XX", "AIRBAND"]),
+    ("name", ["AIRBAND", "CROSS1", "CROSS2", "DCSRPT", "GB3WE", "GB7XX", "SIMPLEX"]),
+])
+def test_channels_are_numbered_after_sorting(tmp_path, key, expected):
+    rows = converted_rows(tmp_path, "gd77", CHIRP_CSV + AIRBAND_ROW, ChannelSort(key))
+    assert rows == [[str(number), name] for number, name in enumerate(expected, 1)]
+
+
+def test_sort_gd77_input(tmp_path):
+    rows = converted_rows(tmp_path, "chirp", GD77_CSV, ChannelSort("name"))
+    assert rows == [["0", "CROSS1"], ["1", "CROSS2"], ["2", "DCSRPT"], ["3", "GB3WE"], ["4", "GB7XX"],
+                    ["5", "SIMPLEX"]]
+
+
+def test_invalid_rows_sort_last_in_input_order():
+    sort_key = compile_sort_key("frequency", CHIRP_HEADER)
+    rows = [["0", "B", "abc"], ["1", "A", "145.5"], ["2"], ["3", "C", "144.0"]]
+    assert [cells[0] for cells in ChannelSort("frequency").sorted_rows(sort_key, rows)] == ["3", "1", "0", "2"]
+
+
+def test_spilled_sort_is_stable_and_matches_in_memory_sort(tmp_path, monkeypatch):
+    monkeypatch.setattr("opengd77_chirp_sort.MAX_MERGE_RUNS", 3)
+    generator = random.Random(7)
+    rows = [[str(index), f"CH{generator.randrange(50)}", f"{generator.choice([145, 433, 439])}.{generator.randrange(4)}"]
+            for index in range(3000)]
+    temp_dir = tmp_path / "sort"
+    temp_dir.mkdir()
+    sort_key = compile_sort_key("frequency", CHIRP_HEADER)
+    sort = ChannelSort("frequency", memory_mb=0.01, temp_dir=str(temp_dir))
+    assert list(sort.sorted_rows(sort_key, iter(rows))) == sorted(rows, key=sort_key)
+    assert os.listdir(temp_dir) == []
+
+
+def test_sort_keeps_selected_rows():
+    def first_three(header, rows):
+        return list(rows)[:3]
+    rows = [["0", "C", "145.5"], ["1", "A", "145.6"], ["2", "B", "145.7"], ["3", "0", "145.8"]]
+    assert [cells[1] for cells in ChannelSort("name", select=first_three)(CHIRP_HEADER, iter(rows))] == ["A", "B", "C"]
+
+
+def test_invalid_sorts():
+    with pytest.raises(ValueError, match="Allowed keys"):
+        ChannelSort("power")
+    with pytest.raises(ValueError, match="'Name'"):
+        ChannelSort("name")(["Location", "Frequency"], iter([]))
+
+
+def test_command_line_sort(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    output_file = str(tmp_path / "out.csv")
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, output_file, "--sort=frequency",
+                                      "--sort-memory=1", "--where=band=70cm"])
+    main()
+    with open(output_file, newline="") as infile:
+        assert [(row["Channel Number"], row["Channel Name"]) for row in csv.DictReader(infile)] == [("1", "DCSRPT"),
+                                                                                                 ("2", "GB7XX")]
+    monkeypatch.setattr(sys, "argv", ["converter", "gd77", input_file, output_file, "--sort-memory=1"])
+    with pytest.raises(ValueError, match="--sort requires"):
+        main()
@@ -0,0 +1,55 @@
+import io
+import json
+import sys
+import pytest
+from opengd77_chirp_csv_coverter import main, transform_stream, ConversionStats, STAGES
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+
+def convert(operation, content, stats=None, engine="compiled"):
+    outfile = io.StringIO(newline="")
+    transform_stream(operation, io.StringIO(content), outfile, 0, engine, stats)
+    return outfile.getvalue()
+
+
+@pytest.mark.parametrize("engine", ["compiled", "dict"])
+def test_stats_do_not_change_output(engine):
+    assert convert("gd77", CHIRP_CSV, ConversionStats(), engine) == convert("gd77", CHIRP_CSV, engine=engine)
+
+
+@pytest.mark.parametrize("engine", ["compiled", "dict"])
+def test_stats_counters_gd77(engine):
+    stats = ConversionStats()
+    convert("gd77", CHIRP_CSV, stats, engine)
+    summary = stats.as_dict()
+    assert summary["rows"] == 6
+    assert summary["errors"] == 0
+    assert summary["channel_types"] == {"Analogue": 5, "Digital": 1}
+    # Tone modes are those of the CHIRP input
+    assert summary["tone_modes"] == {"Tone": 1, "None": 1, "TSQL": 1, "DTCS": 1, "Cross": 2}
+    assert set(summary["stage_seconds"]) == set(STAGES)
+    assert summary["total_seconds"] > 0
+
+
+def test_stats_counters_chirp():
+    stats = ConversionStats()
+    convert("chirp", GD77_CSV, stats)
+    assert stats.channel_types == {"Analogue": 5, "Digital": 1}
+    assert stats.tone_modes["Cross"] == 2
+
+
+def test_stats_count_errors():
+    stats = ConversionStats()
+    with pytest.raises(ValueError):
+        convert("gd77", CHIRP_CSV.replace("0.600000", "0,6", 1), stats)
+    assert stats.errors == 1
+
+
+def test_main_stats_and_profile(tmp_path, monkeypatch):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    monkeypatch.setattr(sys, "argv", ["prog", "gd77", input_file, str(tmp_path / "out.csv"),
+                                      f"--stats={tmp_path / 'stats.json'}", f"--profile={tmp_path / 'run.prof'}"])
+    main()
+    with open(tmp_path / "stats.json") as infile:
+        assert json.load(infile)["rows"] == 6
+    assert (tmp_path / "run.prof").stat().st_size > 0
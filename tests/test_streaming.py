@@ -0,0 +1,101 @@
+import csv
+import io
+import sys
+import pytest
+from opengd77_chirp_csv_coverter import (iter_transformed, read_input_file, transform_channels, transform_stream,
+                                         ConversionCancelled, CHANNEL_NUMBER, LOCATION)
+from tests.sample_data import CHIRP_CSV, GD77_CSV, write_sample
+
+
+def test_iter_transformed_is_lazy():
+    rows = csv.DictReader(io.StringIO(CHIRP_CSV))
+    transformed = iter_transformed(rows, "gd77", 0)
+    assert next(transformed)[CHANNEL_NUMBER] == 1
+    assert next(transformed)[CHANNEL_NUMBER] == 2
+    assert len(list(transformed)) == 4
+
+
+def test_iter_transformed_chirp_numbering():
+    rows = csv.DictReader(io.StringIO(GD77_CSV))
+    assert [row[LOCATION] for row in iter_transformed(rows, "chirp", 5)] == [5, 6, 7, 8, 9, 10]
+
+
+def test_transform_stream_matches_transform_channels(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    transform_channels("gd77", input_file, str(tmp_path / "out.csv"), 0)
+    outfile = io.StringIO(newline="")
+    transform_stream("gd77", io.StringIO(CHIRP_CSV), outfile, 0)
+    with open(tmp_path / "out.csv", newline="") as expected:
+        assert outfile.getvalue() == expected.read()
+
+
+def test_read_input_file_closes_file(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    with read_input_file(input_file) as reader:
+        next(reader)
+    with pytest.raises(ValueError):
+        next(reader)
+
+
+def test_read_input_file_missing():
+    with pytest.raises(ValueError, match="File not found"):
+        with read_input_file("does-not-exist.csv"):
+            pass
+
+
+def test_transform_channels_stdin_to_stdout(monkeypatch):
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, "stdin", io.StringIO(CHIRP_CSV))
+    monkeypatch.setattr(sys, "stdout", stdout)
+    transform_channels("gd77", "-", "-", 0)
+    assert stdout.getvalue().startswith("Channel Number,Channel Name")
+    assert stdout.getvalue().count("\r\n") == 7
+
+
+def test_transform_channels_reports_progress(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    calls = []
+    transform_channels("gd77", input_file, str(tmp_path / "out.csv"), 0,
+                       progress=lambda done, total: calls.append((done, total)))
+    size = (tmp_path / "in.csv").stat().st_size
+    assert calls[-1] == (size, size)
+
+
+def test_progress_counts_bytes_of_non_ascii_input(tmp_path):
+    header, _, rows = CHIRP_CSV.replace("SIMPLEX", "SIMPLEX Ü").partition("\n")
+    content = header + "\n" + rows * 400
+    input_file = tmp_path / "in.csv"
+    input_file.write_bytes(content.encode())
+    calls = []
+    transform_channels("gd77", str(input_file), str(tmp_path / "out.csv"), 0,
+                       progress=lambda done, total: calls.append((done, total)))
+    size = input_file.stat().st_size
+    assert size > len(content)
+    assert calls[-1] == (size, size)
+    assert all(done <= size for done, _ in calls) and len(calls) > 1
+
+
+def test_cancelled_conversion_leaves_output_untouched(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    output_file = write_sample(tmp_path / "out.csv", "previous")
+
+    def cancel(done, total):
+        raise ConversionCancelled()
+
+    with pytest.raises(ConversionCancelled):
+        transform_channels("gd77", input_file, output_file, 0, progress=cancel)
+    assert (tmp_path / "out.csv").read_text() == "previous"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["in.csv", "out.csv"]
+
+
+def test_failed_conversion_writes_no_output(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV.replace("0.600000", "bad", 1))
+    with pytest.raises(ValueError):
+        transform_channels("gd77", input_file, str(tmp_path / "out.csv"), 0)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["in.csv"]
+
+
+def test_output_in_missing_directory(tmp_path):
+    input_file = write_sample(tmp_path / "in.csv", CHIRP_CSV)
+    with pytest.raises(ValueError, match="File not found"):
+        transform_channels("gd77", input_file, str(tmp_path / "missing" / "out.csv"), 0)
@@ -0,0 +1,84 @@
+import logging
+import pytest
+from opengd77_chirp_csv_coverter import (calculate_dtcs_code, calculate_power, calculate_tone, calculate_tone_frequency,
+                                         determine_cross_mode, determine_dtcs_polarity, determine_tone,
+                                         extract_polarity, parse_gd77_tone, ToneKind, CTCSS_TONES, DCS_CODES)
+
+
+def chirp_row(**cells):
+    row = {"Tone": "", "CrossMode": "Tone->Tone", "rToneFreq": "88.5", "cToneFreq": "88.5", "DtcsCode": "023",
+           "RxDtcsCode": "023", "DtcsPolarity": "NN"}
+    row.update(cells)
+    return row
+
+
+def test_standard_tables():
+    assert len(CTCSS_TONES) == len(set(CTCSS_TONES))
+    assert len(DCS_CODES) == len(set(DCS_CODES)) == 104
+
+
+@pytest.mark.parametrize("tone, kind, frequency, code, polarity", [
+    ("None", ToneKind.NONE, 88.5, 23, ""),
+    ("100.0", ToneKind.CTCSS, 100.0, 23, ""),
+    ("D023N", ToneKind.DCS, 88.5, "023", "N"),
+    ("D754I", ToneKind.DCS, 88.5, "754", "I"),
+    ("D131", ToneKind.DCS, 88.5, "131", ""),
+])
+def test_parse_gd77_tone(tone, kind, frequency, code, polarity):
+    assert tuple(parse_gd77_tone(tone)) == (kind, frequency, code, polarity, tone)
+    assert calculate_tone_frequency(tone) == frequency
+    assert calculate_dtcs_code(tone) == code
+
+
+@pytest.mark.parametrize("rx_tone, tx_tone, tone, polarity, cross_mode", [
+    ("None", "None", "", "NN", "Tone->Tone"),
+    ("88.5", "88.5", "Tone", "NN", "Tone->Tone"),
+    ("None", "88.5", "TSQL", "NN", "Tone->Tone"),
+    ("D023N", "D023N", "DTCS", "NN", "DTCS->DTCS"),
+    ("D023I", "None", "DTCS", "RR", "DTCS->DTCS"),
+    ("100.0", "123.0", "Cross", "NN", "Tone->Tone"),
+    ("D131I", "D023I", "Cross", "RR", "DTCS->DTCS"),
+])
+def test_chirp_tone_settings(rx_tone, tx_tone, tone, polarity, cross_mode):
+    assert determine_tone(rx_tone, tx_tone) == tone
+    assert determine_dtcs_polarity(rx_tone, tx_tone) == polarity
+    assert determine_cross_mode(rx_tone, tx_tone) == cross_mode
+
+
+@pytest.mark.parametrize("row, rx_tone, tx_tone", [
+    (chirp_row(Tone="Tone", rToneFreq="100.0", cToneFreq="67.0"), "100.0", "67.0"),
+    (chirp_row(Tone="TSQL"), "None", "None"),
+    (chirp_row(Tone="DTCS", DtcsCode="754", DtcsPolarity="RR"), "D754I", "D754I"),
+    (chirp_row(Tone="DTCS", DtcsPolarity="NR"), "D023", "D023"),
+    (chirp_row(Tone="Cross", CrossMode="DTCS->DTCS", RxDtcsCode="131"), "D131N", "D023N"),
+    (chirp_row(Tone="Cross", rToneFreq="100.0", cToneFreq="123.0"), "100.0", "123.0"),
+    (chirp_row(), "None", "None"),
+])
+def test_calculate_tone(row, rx_tone, tx_tone):
+    assert calculate_tone(row, "r") == rx_tone
+    assert calculate_tone(row, "c") == tx_tone
+
+
+@pytest.mark.parametrize("power, level", [
+    ("0.5W", "P1"), ("1W", "P5"), ("1.5W", "P5"), ("2.5W", "P6"), ("3W", "P7"), ("4.9W", "P8"),
+    ("5.0W", "P9"), ("5W", "Master"), ("50W", "Master"),
+])
+def test_calculate_power(power, level):
+    assert calculate_power({"Power": power}) == level
+
+
+def test_unknown_values_are_flagged_once(caplog):
+    with caplog.at_level(logging.WARNING):
+        assert calculate_dtcs_code("D999N") == "999"
+        assert calculate_dtcs_code("D999N") == "999"
+        assert extract_polarity("XX") == ""
+        assert calculate_tone(chirp_row(Tone="Tone", rToneFreq="99.9"), "r") == "99.9"
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages.count("Unknown tone 'D999N'") == 1
+    assert "Unknown DTCS polarity 'XX'" in messages
+    assert "Unknown CTCSS tone '99.9'" in messages
+
+
+def test_invalid_tone_frequency_raises():
+    with pytest.raises(ValueError):
+        calculate_tone_frequency("12..5")